@@ -1,14 +1,18 @@
 import streamlit as st
-import tabula
+import tabula_worker
+import extraction
+import result_cache
+import pdf_document
+import jobs
+import excel_export
+import upload_spool
+import text_backends
+import runtime_probe
+import tracing
 import pandas as pd
 import os
 import time
-import subprocess
-import PyPDF2
-import tempfile
-import shutil
-from pathlib import Path
-import io
+import uuid
 
 # 페이지 설정
 st.set_page_config(
@@ -17,152 +21,327 @@ st.set_page_config(
     layout="wide"
 )
 
-# 세션 상태 초기화
-if 'temp_dir' not in st.session_state:
-    st.session_state.temp_dir = tempfile.mkdtemp()
+# 상주 tabula 워커 풀 예열 (서버 프로세스당 한 번만 JVM 기동)
+tabula_worker.get_pool()
 
-def cleanup_temp_files():
-    """임시 파일 정리"""
-    try:
-        if os.path.exists(st.session_state.temp_dir):
-            shutil.rmtree(st.session_state.temp_dir)
-        st.session_state.temp_dir = tempfile.mkdtemp()
-    except Exception as e:
-        st.error(f"임시 파일 정리 중 오류 발생: {str(e)}")
+# 실행 중인 작업 상태를 다시 조회하는 간격 (초)
+JOB_POLL_SECONDS = 1
+
+# 세션 상태 초기화 (업로드 보관소에서 이 세션이 잡는 참조의 소유자 ID, 작업 대기열의 사용자로도 씀)
+if 'upload_owner' not in st.session_state:
+    st.session_state.upload_owner = f"session:{uuid.uuid4().hex}"
+
+def release_upload():
+    """세션이 잡고 있던 업로드 파일 참조 풀기 (다른 세션·작업이 쓰지 않으면 파일 삭제)"""
+    upload_spool.get_spool().release(st.session_state.upload_owner)
+    st.session_state.pop('upload', None)
+    st.session_state.pop('upload_spans', None)
 
 def save_uploaded_file(uploaded_file):
-    """업로드된 파일을 임시 디렉토리에 저장"""
+    """업로드된 파일을 업로드 보관소에 저장 (같은 내용이면 다시 쓰지 않고 기존 파일 사용)"""
     try:
-        # 파일명에서 특수문자 제거
-        safe_filename = "".join(c for c in uploaded_file.name if c.isalnum() or c in (' ', '-', '_', '.'))
-        safe_filename = safe_filename.replace(' ', '_')
-        
-        # 임시 파일 경로 생성
-        temp_path = Path(st.session_state.temp_dir) / safe_filename
-        temp_path = str(temp_path)
-        
-        # 파일 저장
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.getbuffer())
-        
-        return temp_path
+        with tracing.span(None, 'upload', filename=uploaded_file.name, bytes=uploaded_file.size) as span:
+            _, path = upload_spool.get_spool().store(
+                uploaded_file, st.session_state.upload_owner, lease=upload_spool.UPLOAD_LEASE
+            )
+        st.session_state.upload_spans = [span]
+        return path
     except Exception as e:
         st.error(f"파일 저장 중 오류 발생: {str(e)}")
         return None
 
+def safe_filename(name):
+    """파일명에서 특수문자 제거 (다운로드 파일 이름에 사용)"""
+    name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_', '.'))
+    return name.replace(' ', '_')
+
+def prepare_upload(uploaded_file):
+    """업로드 파일을 보관하고 검사한 정보 (같은 업로드는 다시 실행해도 저장·검사를 건너뜀)
+
+    {'file_id', 'path', 'filename', 'page_count'} 를 반환하고, 실패하면 오류를 표시하고 None.
+    """
+    upload = st.session_state.get('upload')
+    if upload and upload['file_id'] == uploaded_file.file_id and os.path.exists(upload['path']):
+        upload_spool.get_spool().touch(st.session_state.upload_owner)
+        return upload
+
+    pdf_path = save_uploaded_file(uploaded_file)
+    if not pdf_path:
+        st.error("파일 저장에 실패했습니다.")
+        release_upload()
+        return None
+
+    # PDF 파일 유효성 검사 (페이지 수는 기억해 두고 다시 파싱하지 않음)
+    with tracing.span(None, 'validate') as span:
+        page_count = validate_pdf_file(pdf_path)
+    st.session_state.upload_spans.append(span)
+    if page_count is None:
+        release_upload()
+        return None
+    span.set(page_count=page_count)
+
+    upload = {
+        'file_id': uploaded_file.file_id,
+        'path': pdf_path,
+        'filename': safe_filename(uploaded_file.name),
+        'page_count': page_count,
+    }
+    st.session_state.upload = upload
+    return upload
+
 def validate_pdf_file(file_path):
-    """PDF 파일 유효성 검사"""
+    """PDF 파일 유효성 검사 후 페이지 수 반환 (실패하면 None)
+
+    문서는 페이지 수만 확인하고 바로 닫으며, 추출 작업은 파일을 다시 연다.
+    """
     try:
         if not os.path.exists(file_path):
             st.error("PDF 파일을 찾을 수 없습니다.")
-            return False
+            return None
             
         if os.path.getsize(file_path) == 0:
             st.error("PDF 파일이 비어있습니다.")
-            return False
+            return None
             
         # PDF 파일 유효성 검사
-        with open(file_path, 'rb') as f:
-            pdf = PyPDF2.PdfReader(f)
-            if len(pdf.pages) == 0:
-                st.error("PDF 파일에 페이지가 없습니다.")
-                return False
+        with pdf_document.PdfDocument(file_path) as document:
+            page_count = document.page_count
+        if page_count == 0:
+            st.error("PDF 파일에 페이지가 없습니다.")
+            return None
             
-        return True
+        return page_count
     except Exception as e:
         st.error(f"PDF 파일이 손상되었거나 유효하지 않습니다: {str(e)}")
-        return False
+        return None
 
-def get_excel_download_link(df_dict, filename):
-    """Excel 파일 다운로드 링크 생성"""
+def get_excel_download_link(df_dict, filename, trace=None):
+    """Excel 파일 다운로드 링크 생성
+    
+    시트를 하나씩 스트리밍으로 쓰고, 완성된 파일 내용을 읽어 바이트로 넘긴다 (크면 거쳐 간
+    임시 파일은 읽은 뒤 바로 닫음). trace 를 주면 걸린 시간을 작업의 성능 기록에 남긴다.
+    """
     try:
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            for sheet_name, df in df_dict.items():
-                if not df.empty:
-                    df.to_excel(writer, sheet_name=sheet_name, index=False)
-        output.seek(0)
-        return output
+        with tracing.span(trace, 'excel', filename=filename) as span:
+            export = excel_export.ExcelExport()
+            export.add_tables(df_dict)
+            with export.finish() as output:
+                data = output.read()
+            span.set(sheets=export.sheets)
+        return data
     except Exception as e:
         st.error(f"Excel 파일 생성 중 오류 발생: {str(e)}")
         return None
 
-def process_pdf(file_path, start_page, end_page, lattice, stream, guess):
+def read_file_bytes(path):
+    """파일 내용을 읽고 바로 닫음 (다운로드 버튼에 열린 파일을 넘기면 다시 실행할 때마다 남음)"""
+    with open(path, 'rb') as f:
+        return f.read()
+
+def job_excel_data(job, tables_dict, filename):
+    """다운로드 버튼에 넘길 Excel 생성 함수 (작업이 페이지마다 써 둔 파일이 있으면 그 파일)"""
+    def data():
+        if job.excel_path and os.path.exists(job.excel_path):
+            return read_file_bytes(job.excel_path)
+        return get_excel_download_link(tables_dict, filename, trace=job.trace)
+    return data
+
+def show_cache_stats():
+    """결과 캐시 적중/미적중 횟수 표시"""
+    stats = result_cache.get_cache().stats()
+    st.sidebar.subheader("결과 캐시")
+    col1, col2 = st.sidebar.columns(2)
+    col1.metric("적중", stats['hits'])
+    col2.metric("미적중", stats['misses'])
+    st.sidebar.caption(f"캐시 크기: {stats['size_mb']:.1f} MB")
+
+def show_runtime_info():
+    """서버 시작 때 한 번 조사한 실행 환경과 tabula 워커 풀 구성 표시"""
+    runtime = runtime_probe.get_probe()
+    pool = tabula_worker.get_pool()
+    with st.sidebar.expander("실행 환경"):
+        if runtime['java_ok']:
+            st.caption(f"Java: {runtime['java_version'].splitlines()[0]}")
+        else:
+            st.error(f"Java 를 사용할 수 없습니다: {runtime['java_error']}")
+        st.caption(f"java 경로: {runtime['java_path'] or '-'}")
+        st.caption(f"tabula jar: {runtime['tabula_jar'] or '찾을 수 없음'}")
+        st.caption(f"jpype: {runtime['jpype'] or '없음 (호출마다 java 프로세스 실행)'}")
+        memory = runtime['available_memory_mb']
+        st.caption(f"CPU {runtime['cpu_count']}개 · 사용 가능 메모리 {f'{memory:,} MB' if memory else '알 수 없음'}")
+        st.caption(
+            f"tabula 워커 {pool.size}개 · 워커당 힙 {pool.heap_mb:,} MB "
+            f"(예산 {pool.memory_budget_mb:,} MB, 재시작 {pool.restarts}회)"
+        )
+
+def show_performance(job):
+    """작업의 단계별 시간을 접을 수 있는 패널로 표시 (단계별 합계와 구간 목록)"""
+    summary = job.trace.summary()
+    with st.expander("성능 (단계별 시간)"):
+        upload_spans = st.session_state.get('upload_spans') or []
+        if upload_spans:
+            st.caption("업로드: " + ", ".join(span.describe() for span in upload_spans))
+        if not summary:
+            st.caption("아직 기록된 단계가 없습니다.")
+            return
+        st.caption(f"작업 경과 {job.elapsed():.2f}초 (텍스트와 표 추출은 동시에 진행되므로 단계별 합계가 더 클 수 있음)")
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "단계": tracing.STAGE_LABELS.get(stage, stage),
+                    "횟수": totals['count'],
+                    "합계(초)": totals['seconds'],
+                    "최대(초)": totals['max'],
+                }
+                for stage, totals in sorted(summary.items(), key=lambda item: -item[1]['seconds'])
+            ]),
+            hide_index=True
+        )
+        spans = list(job.trace.spans)
+        st.dataframe(
+            pd.DataFrame([
+                {
+                    "시작(초)": round(span.started - (job.started or span.started), 2),
+                    "내용": span.describe(),
+                    "스레드": span.thread,
+                }
+                for span in spans
+            ]),
+            hide_index=True
+        )
+        if job.trace.dropped:
+            st.caption(f"구간이 많아 {job.trace.dropped}개는 목록에서 뺐습니다 (합계에는 포함).")
+
+def show_progress(progress_bar, done, total, elapsed):
+    """완료한 페이지 수와 초당 처리 페이지 수 표시"""
+    elapsed = max(elapsed, 1e-6)
+    progress_bar.progress(
+        done / total if total else 1.0,
+        text=f"{done}/{total} 페이지 완료 ({done / elapsed:.1f} 페이지/초)"
+    )
+
+def show_partial_downloads(pdf_filename, done, tables_dict, text_content=None):
+    """추출 도중에도 지금까지의 결과를 내려받을 수 있도록 다운로드 버튼 표시
+    
+    텍스트와 Excel 파일은 버튼을 눌렀을 때만 만든다 (작업 상태를 다시 그릴 때마다 만들지 않도록).
+    """
+    st.caption(f"{done}페이지까지의 중간 결과")
+    if text_content:
+        st.download_button(
+            label="중간 텍스트 파일 다운로드",
+            data=lambda: "\n".join(text_content).encode('utf-8'),
+            file_name=f"{pdf_filename}_text_partial.txt",
+            mime="text/plain",
+            key=f"partial_text_{done}",
+            on_click="ignore"
+        )
+    if tables_dict:
+        st.download_button(
+            label="중간 표 Excel 파일 다운로드",
+            data=lambda: get_excel_download_link(tables_dict, f"{pdf_filename}_tables_partial.xlsx"),
+            file_name=f"{pdf_filename}_tables_partial.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"partial_excel_{done}",
+            on_click="ignore"
+        )
+
+def job_export_data(job, export_format):
+    """다운로드 버튼에 넘길 long 형식 내보내기 함수 (처음 누를 때 만든 파일을 작업이 끝날 때까지 재사용)"""
+    def data():
+        return read_file_bytes(jobs.get_manager().export_file(job, export_format))
+    return data
+
+# 모든 표를 합친 내보내기: 형식 → (선택 목록 이름, Content-Type, 설명)
+EXPORT_CHOICES = {
+    'long': (
+        "한 시트로 합친 Excel (.xlsx)",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        "모든 표를 page, table_index, row_index 열과 함께 한 시트에 모으고, index 시트에 표마다 행 범위를 적음"
+    ),
+    'bundle': (
+        "CSV/Parquet 묶음 (.zip)",
+        "application/zip",
+        "한 표로 합친 tables.csv, tables.parquet 과 행 범위 목차 index.csv"
+    ),
+    'parquet': ("Parquet (.parquet)", "application/vnd.apache.parquet", "한 표로 합친 Parquet 파일"),
+    'feather': ("Feather (.feather)", "application/vnd.apache.arrow.file", "한 표로 합친 Feather 파일 (압축)"),
+    'arrow': (
+        "Arrow IPC (.arrow)",
+        "application/vnd.apache.arrow.file",
+        "한 표로 합친 압축 없는 Arrow 파일 (메모리 매핑으로 바로 열 수 있음)"
+    ),
+}
+
+def show_export_downloads(job, pdf_filename):
+    """모든 표를 하나로 합친 내보내기 (형식을 골라 다운로드, 파일은 누를 때 만듦)"""
+    col1, col2 = st.columns(2)
+    with col1:
+        export_format = st.selectbox(
+            "합친 표 내보내기 형식",
+            list(EXPORT_CHOICES),
+            format_func=lambda name: EXPORT_CHOICES[name][0],
+            key=f"export_format_{job.id}"
+        )
+    label, mime, description = EXPORT_CHOICES[export_format]
+    with col2:
+        st.download_button(
+            label="합친 표 다운로드",
+            data=job_export_data(job, export_format),
+            file_name=f"{pdf_filename}_{jobs.EXPORT_FORMATS[export_format][0]}",
+            mime=mime,
+            help=description,
+            on_click="ignore"
+        )
+
+# 페이지 시간 제한을 넘어 표 추출을 멈춘 페이지의 사유 (건너뛴 페이지 요약에 함께 표시)
+TIMED_OUT_LABEL = "시간 초과"
+
+def show_cancelled(job, done):
+    """취소되었거나 작업 시간 제한을 넘어 중단된 작업 안내 (아래에는 그때까지의 결과)"""
+    if job.status == jobs.CANCELLED:
+        st.warning(f"{job.error} {done}/{job.total} 페이지까지의 결과입니다.")
+
+def show_skipped_pages(skipped):
+    """추출 전 점검에서 건너뛴 페이지를 사유별로 요약"""
+    if not skipped:
+        return
+    by_reason = {}
+    for page, reason in skipped.items():
+        by_reason.setdefault(reason, []).append(str(page))
+    summary = ", ".join(f"{reason} {len(pages)}개 ({', '.join(pages)})" for reason, pages in by_reason.items())
+    st.info(f"추출하지 않고 건너뛴 페이지: {summary}")
+
+def process_pdf(file_path, start_page, end_page, lattice, stream, guess, auto=False, filename=None):
+    """표 추출 작업을 백그라운드에 등록하고 작업 반환 (실패하면 None)"""
+    if start_page > end_page:
+        st.error("시작 페이지가 끝 페이지보다 큽니다.")
+        return None
     try:
-        pages = f"{start_page}-{end_page}"
-        st.write(f"PDF 처리 시작: {file_path}")
-        st.write(f"페이지 범위: {pages}")
-        st.write(f"옵션: lattice={lattice}, stream={stream}, guess={guess}")
+        notes = [f"PDF 처리 시작: {file_path}", f"페이지 범위: {start_page}-{end_page}"]
+        if auto:
+            notes.append(f"옵션: 자동 선택 (괘선 수로 페이지별 lattice/stream 결정), guess={guess}")
+        else:
+            notes.append(f"옵션: lattice={lattice}, stream={stream}, guess={guess}")
         
-        # Java 버전 확인
-        java_version = subprocess.check_output(['java', '-version'], stderr=subprocess.STDOUT)
-        st.write(f"Java 버전: {java_version.decode()}")
+        # Java 버전 (서버 시작 때 한 번 조사한 값)
+        runtime = runtime_probe.get_probe()
+        notes.append(f"Java 버전: {runtime['java_version'] or runtime['java_error']}")
         
-        # 페이지별로 다른 옵션 시도
-        all_tables = []
-        for page in range(start_page, end_page + 1):
-            st.write(f"\n페이지 {page} 처리 중...")
-            
-            try:
-                # 첫 번째 시도: 기본 옵션
-                tables = tabula.read_pdf(
-                    file_path,
-                    pages=str(page),
-                    multiple_tables=True,
-                    lattice=lattice,
-                    stream=stream,
-                    guess=guess,
-                    pandas_options={'header': 0},
-                    java_options=['-Dfile.encoding=UTF8', '-Xmx4g']  # 메모리 제한 증가
-                )
-                
-                # 표를 찾지 못한 경우 다른 옵션으로 시도
-                if not tables or all(df.empty for df in tables):
-                    st.write(f"페이지 {page}에서 표를 찾지 못했습니다. 다른 옵션으로 시도합니다...")
-                    
-                    # 두 번째 시도: lattice와 stream 옵션 반전
-                    tables = tabula.read_pdf(
-                        file_path,
-                        pages=str(page),
-                        multiple_tables=True,
-                        lattice=not lattice,
-                        stream=not stream,
-                        guess=guess,
-                        pandas_options={'header': 0},
-                        java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
-                    )
-                
-                # 여전히 표를 찾지 못한 경우
-                if not tables or all(df.empty for df in tables):
-                    st.write(f"페이지 {page}에서 표를 찾지 못했습니다. 마지막 옵션으로 시도합니다...")
-                    
-                    # 마지막 시도: guess 비활성화
-                    tables = tabula.read_pdf(
-                        file_path,
-                        pages=str(page),
-                        multiple_tables=True,
-                        lattice=lattice,
-                        stream=stream,
-                        guess=False,
-                        pandas_options={'header': 0},
-                        java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
-                    )
-                
-                if tables and any(not df.empty for df in tables):
-                    all_tables.extend(tables)
-                    st.write(f"페이지 {page}에서 {len(tables)}개의 표를 찾았습니다.")
-                else:
-                    st.warning(f"페이지 {page}에서 표를 찾지 못했습니다.")
-                    
-            except Exception as e:
-                st.error(f"페이지 {page} 처리 중 오류 발생: {str(e)}")
-                continue
-        
-        if not all_tables:
-            st.warning("선택한 페이지 범위에서 표를 찾을 수 없습니다.")
-            return None
-            
-        return all_tables
+        # 구간별로 추출하며 페이지가 끝나는 대로 작업 결과에 쌓임
+        # (구간 안에서는 전략별로 한 번씩만 tabula 실행: 이전 전략에서 빈 페이지만 다음 전략으로 넘김,
+        #  자동 선택이면 페이지마다 괘선 수로 고른 전략 하나만 실행)
+        return jobs.get_manager().submit(
+            jobs.TABLES,
+            file_path,
+            range(start_page, end_page + 1),
+            {'lattice': lattice, 'stream': stream, 'guess': guess, 'auto': auto},
+            filename=filename,
+            notes=notes,
+            owner=st.session_state.upload_owner
+        )
+    except jobs.JobQueueFull as e:
+        st.warning(f"{e} 잠시 후 다시 시도해주세요.")
+        return None
     except Exception as e:
         st.error(f"PDF 처리 중 오류 발생: {str(e)}")
         st.error("다음 사항을 확인해주세요:")
@@ -171,57 +350,277 @@ def process_pdf(file_path, start_page, end_page, lattice, stream, guess):
         st.error("3. 다른 추출 옵션을 시도해보세요")
         return None
 
-def extract_text_and_tables(pdf_path, start_page, end_page):
+def extract_text_and_tables(pdf_path, start_page, end_page, auto=False, filename=None, text_backend=None):
+    """현장정보(텍스트와 표) 추출 작업을 백그라운드에 등록하고 작업 반환 (실패하면 None)"""
+    if start_page > end_page:
+        st.error("시작 페이지가 끝 페이지보다 큽니다.")
+        return None
     try:
-        text_content = []
-        tables_content = []
-        
-        # 텍스트 추출
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            for page_num in range(start_page - 1, end_page):
-                if page_num < len(pdf_reader.pages):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    text_content.append(f"=== 페이지 {page_num + 1} ===\n{text}\n")
-        
-        # 표 추출
-        for page in range(start_page, end_page + 1):
-            st.write(f"\n페이지 {page}의 표 추출 중...")
-            
-            # lattice 모드로 시도
-            tables = tabula.read_pdf(
-                pdf_path,
-                pages=str(page),
-                multiple_tables=True,
-                lattice=True,
-                stream=False,
-                guess=True,
-                pandas_options={'header': 0},
-                java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
-            )
-            
-            # 표를 찾지 못한 경우 stream 모드로 시도
-            if not tables or all(df.empty for df in tables):
-                tables = tabula.read_pdf(
-                    pdf_path,
-                    pages=str(page),
-                    multiple_tables=True,
-                    lattice=False,
-                    stream=True,
-                    guess=True,
-                    pandas_options={'header': 0},
-                    java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
-                )
-            
-            if tables and any(not df.empty for df in tables):
-                tables_content.append((page, tables))
-        
-        return text_content, tables_content
+        # 표는 lattice 로 구간 전체를 한 번에, 표가 없는 페이지만 모아 stream 으로 한 번 더
+        # (자동 선택이면 페이지마다 괘선 수로 고른 모드로 한 번만)
+        return jobs.get_manager().submit(
+            jobs.INFO,
+            pdf_path,
+            range(start_page, end_page + 1),
+            {'auto': auto, 'text_backend': text_backends.resolve(text_backend)},
+            filename=filename,
+            owner=st.session_state.upload_owner
+        )
+    except jobs.JobQueueFull as e:
+        st.warning(f"{e} 잠시 후 다시 시도해주세요.")
+        return None
     except Exception as e:
         st.error(f"내용 추출 중 오류 발생: {str(e)}")
-        return None, None
+        return None
+
+# 미리보기에서 한 번에 그리는 최대 행 수 (넘으면 행 묶음을 골라 봄)
+PREVIEW_ROWS = 200
+
+def show_table_preview(tables_dict, table_pages, key):
+    """표 목차(표, 페이지, 크기)와 고른 표 하나만 표시
+
+    표 데이터는 서버에 두고 브라우저에는 목차와 고른 표(긴 표는 PREVIEW_ROWS 행씩)만 보낸다.
+    """
+    names = list(tables_dict)
+    shapes = {name: tables_dict[name].shape for name in names}
+    st.dataframe(
+        pd.DataFrame({
+            '표': names,
+            '페이지': [table_pages[name] for name in names],
+            '행': [shapes[name][0] for name in names],
+            '열': [shapes[name][1] for name in names],
+        }),
+        hide_index=True,
+        height=min(300, 35 * (len(names) + 1) + 3)
+    )
+    name = st.selectbox(
+        f"미리볼 표 (전체 {len(names)}개)",
+        names,
+        format_func=lambda name: f"{name} · 페이지 {table_pages[name]} · {shapes[name][0]}행 × {shapes[name][1]}열",
+        key=f"preview_table_{key}"
+    )
+    df = tables_dict[name]
+    if len(df) > PREVIEW_ROWS:
+        parts = (len(df) - 1) // PREVIEW_ROWS + 1
+        part = st.number_input(
+            f"행 묶음 ({PREVIEW_ROWS}행씩, 전체 {parts}개)", min_value=1, max_value=parts, value=1,
+            key=f"preview_rows_{key}_{name}"
+        )
+        start = (part - 1) * PREVIEW_ROWS
+        st.caption(f"{start + 1:,}-{min(start + PREVIEW_ROWS, len(df)):,}행 / 전체 {len(df):,}행")
+        df = df.iloc[start:start + PREVIEW_ROWS]
+    st.dataframe(df)
+
+def show_text_preview(page_texts, key):
+    """추출한 텍스트를 한 페이지씩 표시 (전체 텍스트는 다운로드로)"""
+    pages = list(page_texts)
+    page = st.selectbox(f"텍스트를 볼 페이지 (전체 {len(pages)}개)", pages, key=f"preview_text_{key}")
+    st.text_area("텍스트 내용", page_texts[page], height=400, key=f"preview_text_{key}_{page}")
+
+def show_table_job(job):
+    """표 추출 작업의 진행 상황과 결과 표시"""
+    for message in job.messages:
+        st.write(message)
+    
+    pdf_filename = os.path.splitext(job.filename)[0]
+    results = list(job.results)
+    all_tables = []
+    # all_tables 의 표마다 나온 페이지 (미리보기 목차용)
+    table_pages = []
+    skipped = {}
+    cached_pages = 0
+    for result in results:
+        page = result.page
+        if result.skipped:
+            skipped[page] = result.skipped
+        elif result.timed_out:
+            skipped[page] = TIMED_OUT_LABEL
+            st.warning(f"페이지 {page}: {result.error}")
+        elif result.error:
+            st.error(f"페이지 {page} 처리 중 오류 발생: {result.error}")
+        elif result.strategy:
+            all_tables.extend(result.tables)
+            table_pages.extend([page] * len(result.tables))
+            st.write(f"페이지 {page}에서 {len(result.tables)}개의 표를 찾았습니다. ({result.strategy})")
+        else:
+            st.warning(f"페이지 {page}에서 표를 찾지 못했습니다.")
+        cached_pages += result.cached
+    
+    # 표를 딕셔너리로 변환 (미리보기·다운로드에 함께 씀)
+    tables_dict = {f'Table_{i+1}': df for i, df in enumerate(all_tables) if not df.empty}
+    pages_by_table = {f'Table_{i+1}': page for i, page in enumerate(table_pages)}
+    
+    if not job.is_finished:
+        # 진행 중: 지금까지의 표 목차와 고른 표 미리보기, 중간 결과
+        show_progress(st.progress(0.0), len(results), job.total, job.elapsed())
+        if tables_dict:
+            show_table_preview(tables_dict, pages_by_table, job.id)
+        if len(results) >= extraction.STREAM_WINDOW:
+            show_partial_downloads(pdf_filename, len(results), tables_dict)
+        return
+    
+    if job.status == jobs.FAILED:
+        st.error(f"PDF 처리 중 오류 발생: {job.error}")
+        st.error("다음 사항을 확인해주세요:")
+        st.error("1. PDF 파일이 손상되지 않았는지 확인")
+        st.error("2. Java가 올바르게 설치되어 있는지 확인")
+        st.error("3. 다른 추출 옵션을 시도해보세요")
+        return
+    
+    show_cancelled(job, len(results))
+    show_skipped_pages(skipped)
+    if cached_pages:
+        st.write(f"캐시에서 {cached_pages}개 페이지의 결과를 가져왔습니다.")
+    
+    if tables_dict:
+        # Excel 파일 다운로드
+        st.download_button(
+            label="Excel 파일 다운로드",
+            data=job_excel_data(job, tables_dict, f"{pdf_filename}_tables.xlsx"),
+            file_name=f"{pdf_filename}_tables.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            on_click="ignore"
+        )
+        show_export_downloads(job, pdf_filename)
+
+        # 미리보기 (목차에서 고른 표만 그림)
+        st.success("표 추출이 완료되었습니다!")
+        show_table_preview(tables_dict, pages_by_table, job.id)
+    else:
+        st.warning("선택한 페이지 범위에서 표를 찾을 수 없습니다.")
+
+def show_info_job(job):
+    """현장정보 추출 작업의 진행 상황과 결과 표시"""
+    for message in job.messages:
+        st.write(message)
+    
+    pdf_filename = os.path.splitext(job.filename)[0]
+    results = list(job.results)
+    text_content = []
+    page_texts = {}
+    tables_content = []
+    skipped = {}
+    for result in results:
+        page = result.page
+        if result.skipped:
+            skipped[page] = result.skipped
+        if result.text is not None:
+            text_content.append(f"=== 페이지 {page} ===\n{result.text}\n")
+            page_texts[page] = result.text
+        if result.timed_out:
+            skipped[page] = TIMED_OUT_LABEL
+            st.warning(f"페이지 {page}의 표 추출: {result.error}")
+        elif result.error:
+            st.warning(f"페이지 {page}의 표 추출 중 오류 발생: {result.error}")
+        elif result.strategy:
+            tables_content.append((page, result.tables))
+    tables_dict = {
+        f'Page{page}_Table{i+1}': df
+        for page, tables in tables_content
+        for i, df in enumerate(tables)
+        if not df.empty
+    }
+    pages_by_table = {
+        f'Page{page}_Table{i+1}': page
+        for page, tables in tables_content
+        for i in range(len(tables))
+    }
+    
+    if not job.is_finished:
+        # 진행 중: 지금까지의 텍스트(한 페이지씩)와 표 목차·고른 표 미리보기, 중간 결과
+        show_progress(st.progress(0.0), len(results), job.total, job.elapsed())
+        if page_texts:
+            show_text_preview(page_texts, job.id)
+        if tables_dict:
+            show_table_preview(tables_dict, pages_by_table, job.id)
+        if len(results) >= extraction.STREAM_WINDOW:
+            show_partial_downloads(pdf_filename, len(results), tables_dict, text_content)
+        return
+    
+    if job.status == jobs.FAILED:
+        st.error(f"내용 추출 중 오류 발생: {job.error}")
+        return
+    
+    show_cancelled(job, len(results))
+    show_skipped_pages(skipped)
+    if not (text_content or tables_content):
+        st.warning("내용을 추출할 수 없습니다.")
+        return
+    
+    start_page, end_page = job.pages[0], job.pages[-1]
+    
+    # 텍스트 내용 표시 (한 페이지씩)
+    if text_content:
+        st.subheader(f"추출된 텍스트 (페이지 {start_page}-{end_page})")
+        show_text_preview(page_texts, job.id)
+        
+        # 텍스트 파일 다운로드 (버튼을 눌렀을 때만 전체 텍스트를 만듦)
+        st.download_button(
+            label="텍스트 파일 다운로드",
+            data=lambda: "\n".join(text_content).encode('utf-8'),
+            file_name=f"{pdf_filename}_text.txt",
+            mime="text/plain",
+            on_click="ignore"
+        )
+    
+    # 표 내용 표시
+    if tables_content:
+        st.subheader(f"추출된 표 (페이지 {start_page}-{end_page})")
+        if tables_dict:
+            show_table_preview(tables_dict, pages_by_table, job.id)
+
+            # Excel 파일 다운로드
+            st.download_button(
+                label="표 Excel 파일 다운로드",
+                data=job_excel_data(job, tables_dict, f"{pdf_filename}_tables.xlsx"),
+                file_name=f"{pdf_filename}_tables.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                on_click="ignore"
+            )
+            show_export_downloads(job, pdf_filename)
+
+def current_job():
+    """주소의 job 파라미터로 현재 작업 조회 (새로 고침해도 주소에 남아 있음)"""
+    job_id = st.query_params.get("job")
+    return jobs.get_manager().get(job_id) if job_id else None
+
+def show_queue_position(job):
+    """대기 중인 작업의 실행 순서와 서버 전체의 실행 상황"""
+    if job.status != jobs.QUEUED:
+        return
+    manager = jobs.get_manager()
+    position = manager.queue_position(job)
+    if position is None:
+        return
+    running, queued, workers = manager.scheduler_stats()
+    st.info(
+        f"대기 중: {position}번째 차례입니다 (서버 전체 실행 중 {running}/{workers}개, 대기 {queued}개). "
+        "짧은 작업과 다른 사용자의 작업이 먼저 실행될 수 있습니다."
+    )
+
+def show_job(job):
+    """작업 상태 표시 (끝나지 않은 작업은 이 부분만 주기적으로 다시 조회)"""
+    @st.fragment(run_every=None if job.is_finished else JOB_POLL_SECONDS)
+    def poll():
+        if job.is_finished and not finished_at_start:
+            # 작업이 끝나면 조회를 멈추고 전체 화면을 다시 그림
+            st.rerun()
+        st.caption(f"작업 {job.id} · {job.filename} · {jobs.STATUS_LABELS[job.status]}")
+        show_queue_position(job)
+        if not job.is_finished:
+            if job.cancel_token.cancelled:
+                st.caption("취소하는 중입니다...")
+            elif st.button("작업 취소", key=f"cancel_{job.id}", help="진행 중인 추출을 멈추고 지금까지의 결과만 남깁니다"):
+                jobs.get_manager().cancel(job.id)
+                st.caption("취소하는 중입니다...")
+        if job.kind == jobs.INFO:
+            show_info_job(job)
+        else:
+            show_table_job(job)
+        show_performance(job)
+
+    finished_at_start = job.is_finished
+    poll()
 
 st.title("📊 PDF Analyzer")
 st.markdown("PDF 파일에서 표를 추출하여 Excel 파일로 변환합니다.")
@@ -229,41 +628,52 @@ st.markdown("PDF 파일에서 표를 추출하여 Excel 파일로 변환합니
 # 파일 업로드
 uploaded_file = st.file_uploader("PDF 파일을 선택하세요", type=['pdf'], help="PDF 파일을 선택하거나 드래그하여 업로드하세요")
 
-if uploaded_file is not None:
+if uploaded_file is None:
+    # 파일을 내리면 세션의 참조를 풀어 보관소에서 정리되게 함 (작업은 자기 참조로 계속 실행)
+    if 'upload' in st.session_state:
+        release_upload()
+else:
     try:
-        # 파일 저장
-        pdf_path = save_uploaded_file(uploaded_file)
-        if not pdf_path:
-            st.error("파일 저장에 실패했습니다.")
-            cleanup_temp_files()
+        # 파일 저장과 검사는 업로드가 바뀌었을 때만
+        upload = prepare_upload(uploaded_file)
+        if upload is None:
             st.stop()
-            
+        pdf_path = upload['path']
+        page_count = upload['page_count']
+
         # 파일 정보 표시
         file_size = os.path.getsize(pdf_path) / 1024  # KB
         file_details = {
-            "파일명": os.path.basename(pdf_path),
+            "파일명": upload['filename'],
             "파일크기": f"{file_size:.2f} KB",
+            "페이지 수": page_count,
             "파일경로": os.path.abspath(pdf_path)
         }
         st.write(file_details)
 
-        # PDF 파일 유효성 검사
-        if not validate_pdf_file(pdf_path):
-            cleanup_temp_files()
-            st.stop()
-
         # 페이지 범위 입력
         col1, col2 = st.columns(2)
         with col1:
-            start_page = st.number_input("시작 페이지", min_value=1, value=1)
+            start_page = st.number_input("시작 페이지", min_value=1, max_value=page_count, value=1)
         with col2:
-            end_page = st.number_input("끝 페이지", min_value=1, value=1)
+            end_page = st.number_input("끝 페이지", min_value=1, max_value=page_count, value=1)
 
         # 추출 옵션
         with st.expander("추출 옵션"):
             lattice = st.checkbox("격자형 표 사용", value=True, help="표에 선이 있는 경우 선택")
             stream = st.checkbox("스트림 모드 사용", value=False, help="표에 선이 없는 경우 선택")
             guess = st.checkbox("표 위치 자동 감지", value=True, help="표 위치를 자동으로 감지")
+            auto = st.checkbox(
+                "표 형식 자동 선택", value=False,
+                help="페이지의 괘선 수를 미리 세어 페이지마다 격자형/스트림 모드를 골라 한 번만 추출 (위 두 모드 설정은 무시)"
+            )
+            backends = text_backends.available_backends()
+            text_backend = st.selectbox(
+                "텍스트 추출 엔진", backends,
+                index=backends.index(text_backends.TEXT_BACKEND) if text_backends.TEXT_BACKEND in backends else 0,
+                format_func=lambda name: text_backends.BACKENDS[name].label,
+                help="현장정보 추출에서 페이지 텍스트를 뽑는 엔진 (설치된 엔진만 표시, 결과 형식은 같음)"
+            )
 
         # 버튼을 중앙에 배치하고 크기 조정
         col1, col2, col3 = st.columns([1, 2, 1])
@@ -283,91 +693,29 @@ if uploaded_file is not None:
                 extract_tables = st.button("표 추출하기", type="primary")
 
         if extract_info or extract_tables:
+            # 작업은 백그라운드에서 돌고, 작업 ID 를 주소에 남겨 다시 실행·새로 고침 후에도 이어서 조회
             if extract_info:
-                with st.spinner("현장정보 추출 중..."):
-                    # 페이지 범위 설정
-                    info_start_page = start_page if start_page > 0 else 1
-                    info_end_page = end_page if end_page > 0 else 5
-                    
-                    # 텍스트와 표 추출
-                    text_content, tables_content = extract_text_and_tables(pdf_path, info_start_page, info_end_page)
-                    
-                    if text_content or tables_content:
-                        # PDF 파일명 가져오기 (확장자 제외)
-                        pdf_filename = os.path.splitext(os.path.basename(pdf_path))[0]
-                        
-                        # 텍스트 내용 표시
-                        if text_content:
-                            st.subheader(f"추출된 텍스트 (페이지 {info_start_page}-{info_end_page})")
-                            st.text_area("텍스트 내용", "\n".join(text_content), height=400)
-                            
-                            # 텍스트 파일 다운로드
-                            text_data = "\n".join(text_content).encode('utf-8')
-                            st.download_button(
-                                label="텍스트 파일 다운로드",
-                                data=text_data,
-                                file_name=f"{pdf_filename}_text.txt",
-                                mime="text/plain"
-                            )
-                        
-                        # 표 내용 표시
-                        if tables_content:
-                            st.subheader(f"추출된 표 (페이지 {info_start_page}-{info_end_page})")
-                            tables_dict = {}
-                            for page, tables in tables_content:
-                                for i, df in enumerate(tables):
-                                    if not df.empty:
-                                        st.write(f"=== 페이지 {page}의 표 {i+1} ===")
-                                        st.dataframe(df)
-                                        tables_dict[f'Page{page}_Table{i+1}'] = df
-                            
-                            if tables_dict:
-                                # Excel 파일 다운로드
-                                excel_data = get_excel_download_link(tables_dict, f"{pdf_filename}_tables.xlsx")
-                                st.download_button(
-                                    label="표 Excel 파일 다운로드",
-                                    data=excel_data,
-                                    file_name=f"{pdf_filename}_tables.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                                )
-                    else:
-                        st.warning("내용을 추출할 수 없습니다.")
-
-            elif extract_tables:
-                with st.spinner("PDF 파일 처리 중..."):
-                    # PDF 처리
-                    tables = process_pdf(pdf_path, start_page, end_page, lattice, stream, guess)
-                    
-                    if tables and any(not df.empty for df in tables):
-                        # PDF 파일명 가져오기 (확장자 제외)
-                        pdf_filename = os.path.splitext(os.path.basename(pdf_path))[0]
-                        
-                        # 표를 딕셔너리로 변환
-                        tables_dict = {f'Table_{i+1}': df for i, df in enumerate(tables) if not df.empty}
-                        
-                        # Excel 파일 다운로드
-                        excel_data = get_excel_download_link(tables_dict, f"{pdf_filename}_tables.xlsx")
-                        st.download_button(
-                            label="Excel 파일 다운로드",
-                            data=excel_data,
-                            file_name=f"{pdf_filename}_tables.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
-
-                        # 미리보기
-                        st.success("표 추출이 완료되었습니다!")
-                        for i, df in enumerate(tables):
-                            if not df.empty:
-                                st.write(f"표 {i+1}")
-                                st.dataframe(df)
-                    else:
-                        st.warning("선택한 페이지 범위에서 표를 찾을 수 없습니다.")
+                # 페이지 범위 설정
+                info_start_page = start_page if start_page > 0 else 1
+                info_end_page = end_page if end_page > 0 else 5
+                job = extract_text_and_tables(
+                    pdf_path, info_start_page, info_end_page,
+                    auto=auto, filename=upload['filename'], text_backend=text_backend
+                )
+            else:
+                job = process_pdf(
+                    pdf_path, start_page, end_page, lattice, stream, guess, auto=auto, filename=upload['filename']
+                )
+            if job is not None:
+                st.query_params["job"] = job.id
 
     except Exception as e:
         st.error(f"파일 처리 중 오류가 발생했습니다: {str(e)}")
-    finally:
-        # 임시 파일 정리
-        cleanup_temp_files()
+
+# 현재 작업 (파일을 다시 올리지 않아도 주소의 작업 ID 로 결과 조회)
+job = current_job()
+if job is not None:
+    show_job(job)
 
 # 사용 방법
 with st.expander("사용 방법"):
@@ -380,4 +728,8 @@ with st.expander("사용 방법"):
        - 자동 감지: 표 위치를 자동으로 감지
     4. '현장정보 추출' 또는 '표 추출하기' 버튼을 클릭합니다.
     5. 추출된 결과를 다운로드합니다.
-    """) 
\ No newline at end of file
+    """) 
+
+# 캐시 통계 (추출이 끝난 뒤의 값을 보여주도록 마지막에 표시)
+show_cache_stats()
+show_runtime_info()
@@ -1,340 +1,430 @@
-import streamlit as st
-import tabula
-import pandas as pd
+"""화면 없이 쓰는 PDF 추출 HTTP API 서버
+
+Streamlit 화면의 "현장정보 추출"/"표 추출하기"와 같은 작업을 HTTP 로 제출하고,
+상태를 조회하거나 스트림으로 받은 뒤, 결과를 JSON·XLSX·텍스트로 내려받는다.
+작업은 jobs.py 의 작업 관리자에서 실행되므로 동시에 도는 작업 수가 제한되고,
+대기 중인 작업이 상한에 도달하면 429 를 돌려준다. 대기 중인 작업은 화면 세션의
+작업과 같은 대기열에서 접속 주소별로 공평하게 순서를 받는다.
+외부 서비스 없이 로컬에서 바로 띄울 수 있다.
+
+    python app_server.py --host 127.0.0.1 --port 8080
+
+엔드포인트
+    POST /jobs                      PDF 업로드(multipart, file 필드) 또는 {"path": 서버 경로} JSON 으로 작업 제출
+                                    (경로 제출은 PDF_EXTRACTOR_PATH_ROOT 를 설정했을 때만)
+    GET  /jobs/{id}                 작업 상태 (대기 중이면 queue_position 에 실행 순서)
+    GET  /jobs/{id}/events          작업 상태 스트림 (text/event-stream, 페이지가 끝날 때마다 전송)
+    GET  /jobs/{id}/result?format=  결과 (json, xlsx, text, long: 한 시트로 합친 xlsx, bundle: CSV/Parquet zip,
+                                    parquet/feather/arrow: 합친 표 하나)
+    POST /jobs/{id}/cancel          작업 취소 (진행 중인 tabula 실행을 멈추고 그때까지의 결과를 남김)
+    GET  /jobs/{id}/trace           작업의 단계별 시간 (단계별 합계와 구간 목록)
+    GET  /health                    작업 대기열 상태 (실행 중·대기 중인 작업 수와 상한)
+    GET  /diagnostics               실행 환경 점검 결과 (Java, tabula jar, CPU, 메모리)와 워커 풀 구성
+    GET  /metrics                   단계별 시간 분포 (Prometheus 텍스트 형식)
+"""
+import argparse
+import asyncio
+import json
 import os
-import time
-import subprocess
-import PyPDF2  # PDF 텍스트 추출을 위한 라이브러리 추가
-
-# 페이지 설정
-st.set_page_config(
-    page_title="PDF Analyzer",
-    page_icon="📊",
-    layout="wide"
-)
-
-def process_pdf(file_path, start_page, end_page, lattice, stream, guess):
+import uuid
+
+from aiohttp import web
+
+import jobs
+import pdf_document
+import runtime_probe
+import tabula_worker
+import text_backends
+import tracing
+import upload_spool
+
+# 경로로 제출할 수 있는 PDF 의 최상위 디렉토리 (비워 두면 경로 제출을 받지 않고 업로드만 받음)
+PATH_ROOT = os.environ.get('PDF_EXTRACTOR_PATH_ROOT', '')
+
+# 업로드 최대 크기와 상태 스트림 확인 간격(초)
+MAX_UPLOAD_MB = int(os.environ.get('PDF_EXTRACTOR_MAX_UPLOAD_MB', '200'))
+EVENT_INTERVAL = 0.5
+
+JOB_KINDS = (jobs.TABLES, jobs.INFO)
+
+# long 형식 결과: format → (내려받을 파일 이름 끝부분, Content-Type)
+EXPORT_TYPES = {
+    'long': ('tables_long.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'bundle': ('tables.zip', 'application/zip'),
+    'parquet': ('tables.parquet', 'application/vnd.apache.parquet'),
+    'feather': ('tables.feather', 'application/vnd.apache.arrow.file'),
+    'arrow': ('tables.arrow', 'application/vnd.apache.arrow.file'),
+}
+
+
+def _bool(value, default):
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).lower() in ('1', 'true', 'yes', 'on')
+
+
+def _string_field(fields, name, default=None):
+    """문자열이어야 하는 필드 (JSON 본문에서는 숫자·목록도 올 수 있으므로 검사)"""
+    value = fields.get(name, default)
+    if value is not None and not isinstance(value, str):
+        raise web.HTTPBadRequest(text=f"{name} 는 문자열이어야 합니다.")
+    return value
+
+
+def _request_options(fields):
+    """제출 요청의 작업 종류, 페이지 범위, 추출 옵션 (화면의 기본값과 같음)"""
+    kind = _string_field(fields, 'kind', jobs.TABLES)
+    if kind not in JOB_KINDS:
+        raise web.HTTPBadRequest(text=f"kind 는 {', '.join(JOB_KINDS)} 중 하나여야 합니다.")
     try:
-        pages = f"{start_page}-{end_page}"
-        st.write(f"PDF 처리 시작: {file_path}")
-        st.write(f"페이지 범위: {pages}")
-        st.write(f"옵션: lattice={lattice}, stream={stream}, guess={guess}")
-        
-        # Java 버전 확인
-        java_version = subprocess.check_output(['java', '-version'], stderr=subprocess.STDOUT)
-        st.write(f"Java 버전: {java_version.decode()}")
-        
-        # 페이지별로 다른 옵션 시도
-        all_tables = []
-        for page in range(start_page, end_page + 1):
-            st.write(f"\n페이지 {page} 처리 중...")
-            
-            try:
-                # 첫 번째 시도: 기본 옵션
-                tables = tabula.read_pdf(
-                    file_path,
-                    pages=str(page),
-                    multiple_tables=True,
-                    lattice=lattice,
-                    stream=stream,
-                    guess=guess,
-                    pandas_options={'header': 0},
-                    java_options=['-Dfile.encoding=UTF8', '-Xmx4g']  # 메모리 제한 증가
-                )
-                
-                # 표를 찾지 못한 경우 다른 옵션으로 시도
-                if not tables or all(df.empty for df in tables):
-                    st.write(f"페이지 {page}에서 표를 찾지 못했습니다. 다른 옵션으로 시도합니다...")
-                    
-                    # 두 번째 시도: lattice와 stream 옵션 반전
-                    tables = tabula.read_pdf(
-                        file_path,
-                        pages=str(page),
-                        multiple_tables=True,
-                        lattice=not lattice,
-                        stream=not stream,
-                        guess=guess,
-                        pandas_options={'header': 0},
-                        java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
-                    )
-                
-                # 여전히 표를 찾지 못한 경우
-                if not tables or all(df.empty for df in tables):
-                    st.write(f"페이지 {page}에서 표를 찾지 못했습니다. 마지막 옵션으로 시도합니다...")
-                    
-                    # 마지막 시도: guess 비활성화
-                    tables = tabula.read_pdf(
-                        file_path,
-                        pages=str(page),
-                        multiple_tables=True,
-                        lattice=lattice,
-                        stream=stream,
-                        guess=False,
-                        pandas_options={'header': 0},
-                        java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
+        start_page = int(fields.get('start_page', 1))
+        end_page = int(fields['end_page']) if fields.get('end_page') is not None else None
+    except (TypeError, ValueError):
+        raise web.HTTPBadRequest(text="start_page/end_page 는 정수여야 합니다.")
+    if end_page is not None and start_page > end_page:
+        raise web.HTTPBadRequest(text="start_page 가 end_page 보다 큽니다.")
+
+    auto = _bool(fields.get('auto'), False)
+    if kind == jobs.INFO:
+        try:
+            text_backend = text_backends.resolve(_string_field(fields, 'text_backend'))
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        params = {'auto': auto, 'text_backend': text_backend}
+    else:
+        params = {
+            'lattice': _bool(fields.get('lattice'), True),
+            'stream': _bool(fields.get('stream'), False),
+            'guess': _bool(fields.get('guess'), True),
+            'auto': auto,
+        }
+    return kind, start_page, end_page, params
+
+
+def _check_path(path):
+    """경로 제출 검사 (PATH_ROOT 를 설정했을 때만, PDF 파일이고 PATH_ROOT 아래에 있어야 함)"""
+    if not PATH_ROOT:
+        raise web.HTTPForbidden(text="경로 제출을 받지 않습니다 (PDF_EXTRACTOR_PATH_ROOT 를 설정하면 그 아래 파일만 받음).")
+    if not path or not path.lower().endswith('.pdf'):
+        raise web.HTTPBadRequest(text="path 는 .pdf 파일이어야 합니다.")
+    real_path = os.path.realpath(path)
+    root = os.path.realpath(PATH_ROOT)
+    if os.path.commonpath([real_path, root]) != root:
+        raise web.HTTPForbidden(text="허용된 디렉토리 밖의 파일입니다.")
+    if not os.path.isfile(real_path):
+        raise web.HTTPNotFound(text="PDF 파일을 찾을 수 없습니다.")
+    return real_path
+
+
+async def _save_upload(part, owner):
+    """multipart 파일 필드를 조각 단위로 업로드 보관소에 저장하고 owner 로 참조한 경로 반환"""
+    with tracing.span(None, 'upload', filename=part.filename) as span:
+        writer = upload_spool.get_spool().writer()
+        try:
+            while True:
+                chunk = await part.read_chunk(upload_spool.CHUNK_SIZE)
+                if not chunk:
+                    break
+                if writer.size + len(chunk) > MAX_UPLOAD_MB * 1024 * 1024:
+                    raise web.HTTPRequestEntityTooLarge(
+                        max_size=MAX_UPLOAD_MB * 1024 * 1024, actual_size=writer.size + len(chunk)
                     )
-                
-                if tables and any(not df.empty for df in tables):
-                    all_tables.extend(tables)
-                    st.write(f"페이지 {page}에서 {len(tables)}개의 표를 찾았습니다.")
-                else:
-                    st.warning(f"페이지 {page}에서 표를 찾지 못했습니다.")
-                    
-            except Exception as e:
-                st.error(f"페이지 {page} 처리 중 오류 발생: {str(e)}")
-                continue
-        
-        if not all_tables:
-            st.warning("선택한 페이지 범위에서 표를 찾을 수 없습니다.")
-            return None
-            
-        return all_tables
-    except Exception as e:
-        st.error(f"PDF 처리 중 오류 발생: {str(e)}")
-        st.error("다음 사항을 확인해주세요:")
-        st.error("1. PDF 파일이 손상되지 않았는지 확인")
-        st.error("2. Java가 올바르게 설치되어 있는지 확인")
-        st.error("3. 다른 추출 옵션을 시도해보세요")
-        return None
-
-def extract_text_and_tables(pdf_path, start_page, end_page):
+                writer.write(chunk)
+            if writer.size == 0:
+                raise web.HTTPBadRequest(text="PDF 파일이 비어있습니다.")
+        except BaseException:
+            writer.abort()
+            raise
+        _, path = writer.commit(owner)
+        span.set(bytes=writer.size)
+    return path
+
+
+def _submit(kind, file_path, filename, start_page, end_page, params, owner=None, notes=()):
+    """PDF 를 검사하고 페이지 범위를 문서에 맞춘 뒤 작업 제출 (실행기 스레드에서 호출)"""
+    with tracing.span(None, 'validate', filename=filename) as span:
+        try:
+            document = pdf_document.PdfDocument(file_path)
+        except Exception as e:
+            raise web.HTTPBadRequest(text=f"PDF 파일이 손상되었거나 유효하지 않습니다: {e}")
+        with document:
+            span.set(page_count=document.page_count)
+            if document.page_count == 0:
+                raise web.HTTPBadRequest(text="PDF 파일에 페이지가 없습니다.")
+            start_page, end_page = document.clamp_range(start_page, end_page or document.page_count)
+    if start_page > end_page:
+        raise web.HTTPBadRequest(text="페이지 범위가 문서에 없습니다.")
+    return jobs.get_manager().submit(
+        kind, file_path, range(start_page, end_page + 1), params, filename=filename, owner=owner,
+        notes=notes
+    )
+
+
+def _job_status(job, since=0):
+    """작업 상태 JSON (since 이후에 끝난 페이지 요약 포함)"""
+    return {
+        'id': job.id,
+        'kind': job.kind,
+        'filename': job.filename,
+        'status': job.status,
+        'done': job.done,
+        'total': job.total,
+        'elapsed': round(job.elapsed(), 3),
+        'error': job.error,
+        'queue_position': jobs.get_manager().queue_position(job),
+        'messages': list(job.messages),
+        'pages': [_page_summary(result) for result in list(job.results)[since:]],
+    }
+
+
+def _page_summary(result):
+    return {
+        'page': result.page,
+        'tables': len(result.tables),
+        'strategy': result.strategy,
+        'error': result.error,
+        'timed_out': result.timed_out,
+        'cached': result.cached,
+        'skipped': result.skipped,
+    }
+
+
+def _frame_json(df):
+    # NaN 을 null 로 바꾸기 위해 pandas 의 JSON 변환을 거침
+    return json.loads(df.to_json(orient='split', index=False, force_ascii=False))
+
+
+def _result_json(job):
+    pages = []
+    for result in list(job.results):
+        page = _page_summary(result)
+        page['text'] = result.text
+        page['tables'] = [_frame_json(df) for df in result.tables if not df.empty]
+        pages.append(page)
+    return {'id': job.id, 'kind': job.kind, 'filename': job.filename, 'status': job.status, 'pages': pages}
+
+
+def _get_job(request):
+    job = jobs.get_manager().get(request.match_info['job_id'])
+    if job is None:
+        raise web.HTTPNotFound(text="작업을 찾을 수 없거나 보관 기간이 지났습니다.")
+    return job
+
+
+async def submit_job(request):
+    """POST /jobs: PDF 업로드 또는 서버 경로로 작업 제출"""
+    loop = asyncio.get_running_loop()
+    # 업로드 파일은 작업이 자기 참조를 잡을 때까지 이 요청이 참조
+    owner = f'request:{uuid.uuid4().hex}'
     try:
-        text_content = []
-        tables_content = []
-        
-        # 텍스트 추출
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            for page_num in range(start_page - 1, end_page):
-                if page_num < len(pdf_reader.pages):
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text()
-                    text_content.append(f"=== 페이지 {page_num + 1} ===\n{text}\n")
-        
-        # 표 추출
-        for page in range(start_page, end_page + 1):
-            st.write(f"\n페이지 {page}의 표 추출 중...")
-            
-            # lattice 모드로 시도
-            tables = tabula.read_pdf(
-                pdf_path,
-                pages=str(page),
-                multiple_tables=True,
-                lattice=True,
-                stream=False,
-                guess=True,
-                pandas_options={'header': 0},
-                java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
-            )
-            
-            # 표를 찾지 못한 경우 stream 모드로 시도
-            if not tables or all(df.empty for df in tables):
-                tables = tabula.read_pdf(
-                    pdf_path,
-                    pages=str(page),
-                    multiple_tables=True,
-                    lattice=False,
-                    stream=True,
-                    guess=True,
-                    pandas_options={'header': 0},
-                    java_options=['-Dfile.encoding=UTF8', '-Xmx4g']
-                )
-            
-            if tables and any(not df.empty for df in tables):
-                tables_content.append((page, tables))
-        
-        return text_content, tables_content
-    except Exception as e:
-        st.error(f"내용 추출 중 오류 발생: {str(e)}")
-        return None, None
-
-st.title("📊 PDF Analyzer")
-st.markdown("PDF 파일에서 표를 추출하여 Excel 파일로 변환합니다.")
-
-# 파일 경로 입력
-pdf_path = st.text_input(
-    "PDF 파일의 전체 경로를 입력하세요",
-    value=st.session_state.get('pdf_path', ''),
-    help="PDF 파일의 전체 경로를 입력하세요. 예: /home/ubuntu/documents/example.pdf"
-)
-
-if pdf_path and os.path.exists(pdf_path):
-    if pdf_path.lower().endswith('.pdf'):
-        # 파일 정보 표시
-        file_size = os.path.getsize(pdf_path) / 1024  # KB
-        file_details = {
-            "파일명": os.path.basename(pdf_path),
-            "파일크기": f"{file_size:.2f} KB",
-            "파일경로": pdf_path
-        }
-        st.write(file_details)
-
-        # 페이지 범위 입력
-        col1, col2 = st.columns(2)
-        with col1:
-            start_page = st.number_input("시작 페이지", min_value=1, value=1)
-        with col2:
-            end_page = st.number_input("끝 페이지", min_value=1, value=1)
-
-        # 추출 옵션
-        with st.expander("추출 옵션"):
-            lattice = st.checkbox("격자형 표 사용", value=True, help="표에 선이 있는 경우 선택")
-            stream = st.checkbox("스트림 모드 사용", value=False, help="표에 선이 없는 경우 선택")
-            guess = st.checkbox("표 위치 자동 감지", value=True, help="표 위치를 자동으로 감지")
-
-        # 버튼을 중앙에 배치하고 크기 조정
-        col1, col2, col3 = st.columns([1, 2, 1])  # 중앙 정렬을 위한 3개 컬럼
-        with col2:
-            st.markdown("""
-                <style>
-                div[data-testid="stButton"] {
-                    width: 25%;
-                    margin: 0 auto;
-                }
-                </style>
-            """, unsafe_allow_html=True)
-            col_btn1, col_btn2 = st.columns(2)
-            with col_btn1:
-                extract_info = st.button("현장정보 추출", type="primary")
-            with col_btn2:
-                extract_tables = st.button("표 추출하기", type="primary")
-
-        if extract_info:
-            try:
-                with st.spinner("현장정보 추출 중..."):
-                    # 페이지 범위 설정
-                    info_start_page = start_page if start_page > 0 else 1
-                    info_end_page = end_page if end_page > 0 else 5
-                    
-                    # 1-5 페이지 텍스트와 표 추출
-                    text_content, tables_content = extract_text_and_tables(pdf_path, info_start_page, info_end_page)
-                    
-                    if text_content or tables_content:
-                        # PDF 파일명 가져오기 (확장자 제외)
-                        pdf_filename = os.path.splitext(os.path.basename(pdf_path))[0]
-                        
-                        # 텍스트 내용 표시
-                        if text_content:
-                            st.subheader(f"추출된 텍스트 (페이지 {info_start_page}-{info_end_page})")
-                            st.text_area("텍스트 내용", "\n".join(text_content), height=400)
-                        
-                        # 표 내용 표시
-                        if tables_content:
-                            st.subheader(f"추출된 표 (페이지 {info_start_page}-{info_end_page})")
-                            for page, tables in tables_content:
-                                st.write(f"=== 페이지 {page}의 표 ===")
-                                for i, df in enumerate(tables):
-                                    if not df.empty:
-                                        st.write(f"표 {i+1}")
-                                        st.dataframe(df)
-                        
-                        # 텍스트 파일로 다운로드
-                        text_file_path = os.path.join("temp", f"{pdf_filename}_text.txt")
-                        os.makedirs("temp", exist_ok=True)
-                        
-                        with open(text_file_path, "w", encoding="utf-8") as f:
-                            f.write("\n".join(text_content))
-                        
-                        with open(text_file_path, "r", encoding="utf-8") as f:
-                            st.download_button(
-                                label="텍스트 파일 다운로드",
-                                data=f,
-                                file_name=f"{pdf_filename}_text.txt",
-                                mime="text/plain"
-                            )
-                        
-                        # Excel 파일로 다운로드 (표만)
-                        if tables_content:
-                            excel_path = os.path.join("temp", f"{pdf_filename}_tables.xlsx")
-                            with pd.ExcelWriter(excel_path, engine='openpyxl') as writer:
-                                for page, tables in tables_content:
-                                    for i, df in enumerate(tables):
-                                        if not df.empty:
-                                            sheet_name = f'Page{page}_Table{i+1}'
-                                            df.to_excel(writer, sheet_name=sheet_name, index=False)
-                        
-                            with open(excel_path, 'rb') as f:
-                                st.download_button(
-                                    label="표 Excel 파일 다운로드",
-                                    data=f,
-                                    file_name=f"{pdf_filename}_tables.xlsx",
-                                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                                )
-                        
-                            # 임시 Excel 파일 정리
-                            if os.path.exists(excel_path):
-                                os.unlink(excel_path)
-                        
-                        # 임시 텍스트 파일 정리
-                        if os.path.exists(text_file_path):
-                            os.unlink(text_file_path)
-                    else:
-                        st.warning("내용을 추출할 수 없습니다.")
-            except Exception as e:
-                st.error(f"처리 중 오류가 발생했습니다: {str(e)}")
-                st.error("다시 시도해주세요.")
-
-        elif extract_tables:
+        if request.content_type.startswith('multipart/'):
+            fields = {}
+            file_path = filename = None
+            reader = await request.multipart()
+            async for part in reader:
+                if part.name == 'file':
+                    file_path = await _save_upload(part, owner)
+                    filename = os.path.basename(part.filename or 'upload.pdf')
+                else:
+                    fields[part.name] = await part.text()
+            if file_path is None:
+                raise web.HTTPBadRequest(text="file 필드에 PDF 파일을 넣어주세요.")
+        else:
             try:
-                with st.spinner("PDF 파일 처리 중..."):
-                    # PDF 처리
-                    tables = process_pdf(pdf_path, start_page, end_page, lattice, stream, guess)
-                    
-                    if tables and any(not df.empty for df in tables):
-                        # PDF 파일명 가져오기 (확장자 제외)
-                        pdf_filename = os.path.splitext(os.path.basename(pdf_path))[0]
-                        
-                        # Excel 파일로 저장
-                        output_path = os.path.join("temp", f"{pdf_filename}_tables.xlsx")
-                        os.makedirs("temp", exist_ok=True)
-                        
-                        with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                            for i, df in enumerate(tables):
-                                if not df.empty:
-                                    # 빈 컬럼도 포함하여 저장
-                                    df.to_excel(writer, sheet_name=f'Table_{i+1}', index=False)
-
-                        # 다운로드 버튼
-                        with open(output_path, 'rb') as f:
-                            st.download_button(
-                                label="Excel 파일 다운로드",
-                                data=f,
-                                file_name=f"{pdf_filename}_tables.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                            )
-
-                        # 미리보기
-                        st.success("표 추출이 완료되었습니다!")
-                        for i, df in enumerate(tables):
-                            if not df.empty:
-                                st.write(f"표 {i+1}")
-                                st.dataframe(df)
-
-                        # 임시 파일 정리
-                        if os.path.exists(output_path):
-                            os.unlink(output_path)
-                    else:
-                        st.warning("선택한 페이지 범위에서 표를 찾을 수 없습니다.")
-
-            except Exception as e:
-                st.error(f"처리 중 오류가 발생했습니다: {str(e)}")
-                st.error("다시 시도해주세요.")
-    else:
-        st.error("PDF 파일만 지원됩니다.")
-elif pdf_path:
-    st.error("파일을 찾을 수 없습니다. 경로를 확인해주세요.")
-
-# 사용 방법
-with st.expander("사용 방법"):
-    st.markdown("""
-    1. PDF 파일의 전체 경로를 입력합니다.
-       - 예: C:\\Users\\사용자명\\Documents\\example.pdf
-    2. 표가 있는 페이지 범위를 입력합니다.
-    3. 필요한 경우 추출 옵션을 설정합니다:
-       - 격자형 표: 표에 선이 있는 경우 선택
-       - 스트림 모드: 표에 선이 없는 경우 선택
-       - 자동 감지: 표 위치를 자동으로 감지
-    4. '표 추출하기' 버튼을 클릭합니다.
-    5. 추출된 표를 Excel 파일로 다운로드합니다.
-    """) 
\ No newline at end of file
+                fields = await request.json()
+            except ValueError:
+                raise web.HTTPBadRequest(text="JSON 본문 또는 multipart 업로드가 필요합니다.")
+            if not isinstance(fields, dict):
+                raise web.HTTPBadRequest(text="JSON 본문은 객체여야 합니다.")
+            file_path = _check_path(_string_field(fields, 'path'))
+            filename = os.path.basename(file_path)
+
+        kind, start_page, end_page, params = _request_options(fields)
+        # 대기열에서 공평하게 순서를 나누고 작업 수를 제한하는 사용자는 접속 주소
+        # (요청마다 바꿀 수 있는 user 필드는 작업 로그에 남기는 표시용 이름으로만 씀)
+        user = f"api:{request.remote}"
+        label = _string_field(fields, 'user')
+        notes = [f"요청 사용자: {label} ({request.remote})"] if label else []
+        try:
+            job = await loop.run_in_executor(
+                None, _submit, kind, file_path, filename, start_page, end_page, params, user, notes
+            )
+        except jobs.JobQueueFull as e:
+            raise web.HTTPTooManyRequests(text=str(e), headers={'Retry-After': '5'})
+    finally:
+        # 작업이 보관소 파일을 참조하므로 요청의 참조는 바로 풀기 (작업이 없으면 파일도 정리됨)
+        upload_spool.get_spool().release(owner)
+
+    return web.json_response(
+        _job_status(job), status=202, headers={'Location': f'/jobs/{job.id}'}
+    )
+
+
+async def job_status(request):
+    """GET /jobs/{id}: 작업 상태"""
+    return web.json_response(_job_status(_get_job(request)))
+
+
+async def job_events(request):
+    """GET /jobs/{id}/events: 새로 끝난 페이지가 생길 때마다 상태를 보내는 이벤트 스트림"""
+    job = _get_job(request)
+    response = web.StreamResponse(headers={'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache'})
+    await response.prepare(request)
+
+    sent = 0
+    while True:
+        finished = job.is_finished
+        done = job.done
+        if done > sent or finished:
+            payload = json.dumps(_job_status(job, since=sent), ensure_ascii=False)
+            await response.write(f"event: {job.status}\ndata: {payload}\n\n".encode('utf-8'))
+            sent = done
+        if finished:
+            break
+        await asyncio.sleep(EVENT_INTERVAL)
+
+    await response.write_eof()
+    return response
+
+
+async def job_result(request):
+    """GET /jobs/{id}/result?format=json|xlsx|text|long|bundle|parquet|feather|arrow: 작업 결과 (끝난 작업만)"""
+    job = _get_job(request)
+    if not job.is_finished:
+        raise web.HTTPConflict(text="작업이 아직 끝나지 않았습니다.")
+    if job.status == jobs.FAILED:
+        raise web.HTTPUnprocessableEntity(text=f"작업이 실패했습니다: {job.error}")
+
+    result_format = request.query.get('format', 'json')
+    pdf_filename = os.path.splitext(job.filename)[0]
+    if result_format == 'json':
+        return web.json_response(_result_json(job), dumps=lambda data: json.dumps(data, ensure_ascii=False))
+    if result_format == 'text':
+        return web.Response(
+            text="\n".join(job.text_content()),
+            content_type='text/plain',
+            charset='utf-8',
+            headers={'Content-Disposition': f'attachment; filename="{pdf_filename}_text.txt"'},
+        )
+    if result_format == 'xlsx':
+        # 작업이 페이지마다 써 둔 파일을 디스크에서 바로 스트리밍
+        if not job.excel_path or not os.path.exists(job.excel_path):
+            raise web.HTTPNotFound(text="추출된 표가 없습니다.")
+        return web.FileResponse(
+            job.excel_path,
+            headers={
+                'Content-Type': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                'Content-Disposition': f'attachment; filename="{pdf_filename}_tables.xlsx"',
+            },
+        )
+    if result_format in EXPORT_TYPES:
+        # 모든 표를 합친 long 형식 (처음 요청할 때 만들어 두고 이후에는 같은 파일)
+        path = await asyncio.get_running_loop().run_in_executor(
+            None, jobs.get_manager().export_file, job, result_format
+        )
+        if path is None:
+            raise web.HTTPNotFound(text="추출된 표가 없습니다.")
+        suffix, content_type = EXPORT_TYPES[result_format]
+        return web.FileResponse(
+            path,
+            headers={
+                'Content-Type': content_type,
+                'Content-Disposition': f'attachment; filename="{pdf_filename}_{suffix}"',
+            },
+        )
+    raise web.HTTPBadRequest(text=f"format 은 json, xlsx, text, {', '.join(EXPORT_TYPES)} 중 하나여야 합니다.")
+
+
+async def cancel_job(request):
+    """POST /jobs/{id}/cancel: 작업 취소 (이미 끝난 작업이면 409)"""
+    job = _get_job(request)
+    if not jobs.get_manager().cancel(job.id):
+        raise web.HTTPConflict(text=f"이미 끝난 작업입니다 ({job.status}).")
+    return web.json_response(_job_status(job), status=202)
+
+
+async def job_trace(request):
+    """GET /jobs/{id}/trace: 작업의 단계별 합계와 구간 목록 (진행 중에도 지금까지의 기록)"""
+    job = _get_job(request)
+    return web.json_response({
+        'id': job.id,
+        'status': job.status,
+        'elapsed': round(job.elapsed(), 3),
+        'summary': job.trace.summary(),
+        'spans': job.trace.to_dicts(),
+        'dropped': job.trace.dropped,
+    })
+
+
+async def metrics(request):
+    """GET /metrics: 프로세스 전체의 단계별 시간 분포 (Prometheus 텍스트 형식)"""
+    return web.Response(
+        text=tracing.get_metrics().prometheus_text(),
+        headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'},
+    )
+
+
+async def health(request):
+    """GET /health: 대기+실행 중인 작업 수와 상한, 실행 중·대기 중인 작업 수와 동시 실행 상한"""
+    manager = jobs.get_manager()
+    active, limit = manager.load()
+    running, queued, workers = manager.scheduler_stats()
+    return web.json_response({
+        'status': 'ok',
+        'active_jobs': active,
+        'queue_limit': limit,
+        'running_jobs': running,
+        'queued_jobs': queued,
+        'job_workers': workers,
+        'user_limit': manager.user_limit,
+    })
+
+
+async def diagnostics(request):
+    """GET /diagnostics: 서버 시작 때 한 번 조사한 실행 환경과 tabula 워커 풀 구성"""
+    loop = asyncio.get_running_loop()
+    runtime = await loop.run_in_executor(None, runtime_probe.get_probe)
+    pool = await loop.run_in_executor(None, tabula_worker.get_pool)
+    return web.json_response({
+        'runtime': runtime,
+        'pool': {
+            'workers': pool.size,
+            'heap_mb': pool.heap_mb,
+            'memory_budget_mb': pool.memory_budget_mb,
+            'restarts': pool.restarts,
+        },
+    })
+
+
+async def _warm_up(app):
+    # 상주 tabula 워커 풀 예열 (서버 프로세스당 한 번만 JVM 기동)
+    await asyncio.get_running_loop().run_in_executor(None, tabula_worker.get_pool)
+
+
+def create_app(warm_up=True):
+    """API 애플리케이션 생성 (테스트에서는 warm_up=False 로 JVM 예열 생략 가능)"""
+    app = web.Application(client_max_size=MAX_UPLOAD_MB * 1024 * 1024)
+    app.add_routes([
+        web.post('/jobs', submit_job),
+        web.get('/jobs/{job_id}', job_status),
+        web.get('/jobs/{job_id}/events', job_events),
+        web.get('/jobs/{job_id}/result', job_result),
+        web.post('/jobs/{job_id}/cancel', cancel_job),
+        web.get('/jobs/{job_id}/trace', job_trace),
+        web.get('/health', health),
+        web.get('/diagnostics', diagnostics),
+        web.get('/metrics', metrics),
+    ])
+    if warm_up:
+        app.on_startup.append(_warm_up)
+    return app
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="PDF 추출 HTTP API 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+    web.run_app(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,285 @@
+"""디렉토리·목록 단위 일괄 추출 (명령행)
+
+화면의 "현장정보 추출"(기본)이나 "표 추출하기"와 같은 로직으로 여러 PDF 를 병렬로
+처리하고, 파일마다 [PDF파일명]_text.txt 와 [PDF파일명]_tables.xlsx 를 출력
+디렉토리에 쓴다. 끝난 파일은 출력 디렉토리의 작업 일지(batch_journal.jsonl)에
+한 줄씩 남기므로, 중간에 멈춘 실행을 같은 명령으로 다시 돌리면 끝난 파일은
+건너뛰고 이어서 처리한다.
+
+    python batch_extract.py archive/ -o output/ --workers 4
+    python batch_extract.py manifest.txt -o output/ --kind tables --auto
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import excel_export
+import extraction
+import jobs
+import pdf_document
+import result_cache
+import tabula_worker
+import text_backends
+
+JOURNAL_NAME = 'batch_journal.jsonl'
+
+
+def find_pdfs(source):
+    """디렉토리면 하위의 모든 PDF, 파일이면 한 줄에 경로 하나인 목록 (# 은 주석)
+
+    (PDF 경로, 출력 하위 경로) 목록을 돌려준다. 디렉토리는 하위 구조를, 목록 파일은
+    항목들의 공통 상위 디렉토리 아래 구조를 그대로 살려 이름이 같은 PDF 의 출력이 겹치지
+    않게 한다.
+    """
+    if os.path.isdir(source):
+        found = []
+        for root, dirs, files in os.walk(source):
+            dirs.sort()
+            for name in sorted(files):
+                if name.lower().endswith('.pdf'):
+                    path = os.path.join(root, name)
+                    found.append((os.path.abspath(path), os.path.relpath(path, source)))
+        return found
+
+    base = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            paths.append(os.path.abspath(os.path.join(base, line)))
+    if not paths:
+        return []
+    try:
+        root = os.path.commonpath([os.path.dirname(path) for path in paths])
+    except ValueError:
+        # 드라이브가 다른 경로가 섞인 경우: 파일 이름에 겹치면 경로 해시를 붙임
+        return [(path, _unique_name(path, paths)) for path in paths]
+    return [(path, os.path.relpath(path, root)) for path in paths]
+
+
+def _unique_name(path, paths):
+    """파일 이름, 다른 항목과 이름이 같으면 '이름_<경로 해시 8자리>.pdf'"""
+    name = os.path.basename(path)
+    if sum(os.path.basename(other) == name for other in paths) < 2:
+        return name
+    stem, ext = os.path.splitext(name)
+    return f"{stem}_{hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]}{ext}"
+
+
+def _file_key(path):
+    """일지에서 파일을 알아보는 키 (경로 + 크기 + 수정 시각, 내용이 바뀌면 다시 처리)"""
+    stat = os.stat(path)
+    return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+class Journal:
+    """끝난 파일을 한 줄씩 기록하는 작업 일지 (JSON Lines, 기록마다 fsync)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # 기록 도중 멈춰 잘린 마지막 줄
+                        continue
+                    if record.get('status') == 'done':
+                        self.done.add(record['key'])
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def record(self, entry):
+        with self._lock:
+            self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            if entry['status'] == 'done':
+                self.done.add(entry['key'])
+
+    def close(self):
+        self._file.close()
+
+
+def _write_outputs(output_base, kind, results, exports=('sheets',)):
+    """파일 하나의 텍스트와 표 출력 (임시 이름으로 쓴 뒤 이름을 바꿔 반쯤 쓴 파일이 남지 않게 함)
+
+    exports: sheets(표마다 시트), long(한 시트로 합친 XLSX), 그 밖의 jobs.EXPORT_FORMATS
+    형식(bundle, parquet, feather, arrow)은 합친 표 하나를 그 형식으로
+    """
+    written = []
+    text_content = jobs.text_content(results)
+    if text_content:
+        path = f"{output_base}_text.txt"
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write("\n".join(text_content))
+        os.replace(path + '.tmp', path)
+        written.append(path)
+
+    tables_dict = jobs.tables_dict(kind, results)
+    if 'sheets' in exports:
+        path = excel_export.write_excel(tables_dict, f"{output_base}_tables.xlsx")
+        if path:
+            written.append(path)
+    for export_format, (suffix, write) in jobs.EXPORT_FORMATS.items():
+        if export_format in exports:
+            path = write(results, f"{output_base}_{suffix}")
+            if path:
+                written.append(path)
+    return written, len(tables_dict)
+
+
+def process_file(pdf_path, output_base, kind, params, start_page=1, end_page=None, cache=None, exports=('sheets',)):
+    """PDF 한 건 추출 후 출력 파일 작성, 일지에 남길 요약 반환"""
+    started = time.time()
+    with pdf_document.PdfDocument(pdf_path, cache, text_backend=params.get('text_backend')) as document:
+        start, end = document.clamp_range(start_page, end_page or document.page_count)
+        pages = list(range(start, end + 1))
+        results = list(extraction.iter_pages(
+            pdf_path,
+            pages,
+            jobs.job_strategies(kind, params),
+            with_text=kind == jobs.INFO,
+            cache=cache,
+            document=document,
+        ))
+    os.makedirs(os.path.dirname(output_base) or '.', exist_ok=True)
+    written, tables = _write_outputs(output_base, kind, results, exports)
+    return {
+        'pages': len(pages),
+        'tables': tables,
+        'page_errors': sum(1 for result in results if result.error),
+        'outputs': written,
+        'seconds': round(time.time() - started, 3),
+    }
+
+
+def run_batch(files, output_dir, kind, params, workers, start_page=1, end_page=None, cache=None,
+              exports=('sheets',), log=print):
+    """파일들을 병렬로 처리하고 (완료, 실패, 건너뜀, 페이지 수, 경과 시간) 요약 반환"""
+    os.makedirs(output_dir, exist_ok=True)
+    journal = Journal(os.path.join(output_dir, JOURNAL_NAME))
+    summary = {'done': 0, 'failed': 0, 'skipped': 0, 'pages': 0}
+
+    pending = []
+    for pdf_path, relative in files:
+        try:
+            key = _file_key(pdf_path)
+        except OSError as e:
+            log(f"[실패] {pdf_path}: {e}")
+            summary['failed'] += 1
+            continue
+        if key in journal.done:
+            summary['skipped'] += 1
+            continue
+        output_base = os.path.join(output_dir, os.path.splitext(relative)[0])
+        pending.append((pdf_path, output_base, key))
+    if summary['skipped']:
+        log(f"작업 일지에 따라 이미 끝난 {summary['skipped']}개 파일은 건너뜁니다.")
+
+    started = time.time()
+    executor = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        futures = {
+            executor.submit(process_file, pdf_path, output_base, kind, params, start_page, end_page, cache, exports):
+                (pdf_path, key)
+            for pdf_path, output_base, key in pending
+        }
+        for number, future in enumerate(as_completed(futures), start=1):
+            pdf_path, key = futures[future]
+            entry = {'key': key, 'file': pdf_path, 'finished': time.time()}
+            try:
+                entry.update(future.result())
+                entry['status'] = 'done'
+                summary['done'] += 1
+                summary['pages'] += entry['pages']
+                log(f"[{number}/{len(pending)}] {pdf_path}: {entry['pages']}페이지, 표 {entry['tables']}개 ({entry['seconds']:.1f}초)")
+            except Exception as e:
+                entry.update({'status': 'failed', 'error': str(e)})
+                summary['failed'] += 1
+                log(f"[{number}/{len(pending)}] [실패] {pdf_path}: {e}")
+            journal.record(entry)
+    except KeyboardInterrupt:
+        # 아직 시작하지 않은 파일은 버리고, 다음 실행에서 일지에 없는 파일부터 이어서 처리
+        executor.shutdown(wait=False, cancel_futures=True)
+        log("중단했습니다. 같은 명령으로 다시 실행하면 이어서 처리합니다.")
+        raise
+    finally:
+        executor.shutdown(wait=True)
+        journal.close()
+
+    summary['seconds'] = time.time() - started
+    return summary
+
+
+def format_summary(summary):
+    elapsed = max(summary['seconds'], 1e-6)
+    return (
+        f"완료 {summary['done']}개, 실패 {summary['failed']}개, 건너뜀 {summary['skipped']}개 / "
+        f"{summary['pages']}페이지, {summary['seconds']:.1f}초 "
+        f"({summary['done'] / elapsed:.2f} 파일/초, {summary['pages'] / elapsed:.1f} 페이지/초)"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="PDF 일괄 추출 (중단 후 이어서 실행 가능)")
+    parser.add_argument('source', help="PDF 가 있는 디렉토리 또는 한 줄에 PDF 경로 하나인 목록 파일")
+    parser.add_argument('-o', '--output', required=True, help="출력 디렉토리 (작업 일지도 여기에 저장)")
+    parser.add_argument('--kind', choices=[jobs.INFO, jobs.TABLES], default=jobs.INFO,
+                        help="info: 현장정보 추출(텍스트+표), tables: 표 추출하기 (기본 info)")
+    parser.add_argument('--start-page', type=int, default=1)
+    parser.add_argument('--end-page', type=int, default=None, help="기본은 문서의 마지막 페이지")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="동시에 처리할 파일 수 (기본은 tabula 워커 수: TABULA_WORKERS 또는 CPU·메모리로 자동)")
+    parser.add_argument('--no-lattice', dest='lattice', action='store_false', help="격자형 표 사용 안 함")
+    parser.add_argument('--stream', action='store_true', help="스트림 모드 사용")
+    parser.add_argument('--no-guess', dest='guess', action='store_false', help="표 위치 자동 감지 안 함")
+    parser.add_argument('--auto', action='store_true', help="페이지의 괘선 수로 격자형/스트림 모드 자동 선택")
+    parser.add_argument('--no-cache', action='store_true', help="결과 캐시를 쓰지 않음")
+    parser.add_argument('--text-backend', choices=list(text_backends.BACKENDS), default=text_backends.TEXT_BACKEND,
+                        help="텍스트 추출 엔진 (info 에서만, 기본 PDF_EXTRACTOR_TEXT_BACKEND 또는 pypdf2)")
+    parser.add_argument('--export', nargs='+', choices=['sheets'] + list(jobs.EXPORT_FORMATS),
+                        default=['sheets'],
+                        help="표 출력 형식: sheets(표마다 시트, 기본), long(한 시트로 합친 _tables_long.xlsx), "
+                             "bundle(CSV/Parquet 묶음 _tables.zip), parquet/feather/arrow(합친 표 하나를 "
+                             "_tables.parquet/_tables.feather/_tables.arrow 로)")
+    args = parser.parse_args(argv)
+
+    if args.kind == jobs.INFO:
+        try:
+            params = {'auto': args.auto, 'text_backend': text_backends.resolve(args.text_backend)}
+        except ValueError as e:
+            parser.error(str(e))
+    else:
+        params = {'lattice': args.lattice, 'stream': args.stream, 'guess': args.guess, 'auto': args.auto}
+
+    files = find_pdfs(args.source)
+    if not files:
+        print("처리할 PDF 파일이 없습니다.", file=sys.stderr)
+        return 1
+
+    # 상주 tabula 워커 풀 예열 (JVM 한 번만 기동, 워커 수는 실행 환경 점검으로 정함)
+    pool = tabula_worker.get_pool()
+    cache = None if args.no_cache else result_cache.get_cache()
+    try:
+        summary = run_batch(
+            files, args.output, args.kind, params, args.workers or pool.size,
+            start_page=args.start_page, end_page=args.end_page, cache=cache, exports=args.export
+        )
+    except KeyboardInterrupt:
+        return 130
+    print(format_summary(summary))
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
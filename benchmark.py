@@ -0,0 +1,588 @@
+"""추출 파이프라인 벤치마크 (명령행, 오프라인)
+
+같은 시드로 언제나 같은 바이트가 나오는 합성 PDF 모음(격자형 표, 괘선 없는 표, 텍스트
+전용, 이미지 전용, 한글/영문 혼합, 1~500 페이지)을 만들고, 화면과 같은 단계를 문서마다
+따로 잰다.
+
+- validate: 업로드 검사 (validate_pdf_file 과 같이 문서를 열어 페이지 수 확인)
+- text:<엔진>: 페이지 텍스트 추출 (현장정보 추출과 같은 PdfDocument.prefetch_texts)
+- tables:<전략>: 표 추출 (lattice, stream, 표 추출하기 기본 재시도 순서, 자동 선택)
+- info: 현장정보 추출 전체 (텍스트와 표를 함께, 작업과 같은 iter_pages)
+- excel: 표 추출하기 결과로 XLSX 만들기 (get_excel_download_link 와 같은 ExcelExport)
+
+단계마다 걸린 시간과 이 프로세스와 하위 프로세스(tabula·텍스트 워커)를 합친 최대 RSS,
+JVM 기동 횟수, tabula 실행 횟수를 기록해 JSON 으로 저장하고, 이전 결과 파일을 기준으로
+주면 단계별로 빨라졌는지 느려졌는지 비교해 보여 준다. 결과 캐시는 쓰지 않는다.
+
+    python benchmark.py --max-pages 20
+    python benchmark.py --baseline bench/results/20261018-120000.json --fail-on-regression
+
+합성 PDF 는 reportlab 으로 만든다 (pip install reportlab). 한글은 기본으로 글꼴을 넣지
+않는 CID 글꼴(HYSMyeongJo-Medium)로 쓰는데, PyPDF2 는 이 인코딩을 풀지 못하므로 실제
+문서처럼 글꼴을 넣으려면 --font 로 한글 TTF(예: NanumGothic.ttf)를 준다.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import excel_export
+import extraction
+import jobs
+import pdf_document
+import runtime_probe
+import tabula_worker
+import text_backends
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench')
+
+# 결과 파일 형식 버전 (비교할 때 같은 버전끼리만)
+RESULT_VERSION = 1
+
+# 합성 문서: (이름, 종류, 페이지 수)
+CORPUS = [
+    ('ruled-1', 'ruled', 1),
+    ('ruled-20', 'ruled', 20),
+    ('borderless-20', 'borderless', 20),
+    ('text-100', 'text', 100),
+    ('image-10', 'image', 10),
+    ('mixed-ko-30', 'mixed_ko', 30),
+    ('mixed-500', 'mixed', 500),
+]
+
+# 표 추출 단계에서 재는 전략
+TABLE_STRATEGIES = {
+    'lattice': [('lattice', {'lattice': True, 'stream': False, 'guess': True})],
+    'stream': [('stream', {'lattice': False, 'stream': True, 'guess': True})],
+    'cascade': extraction.table_strategies(True, False, True),
+    'auto': extraction.auto_strategies(),
+}
+
+# 최대 RSS 를 재는 간격(초)
+RSS_INTERVAL = 0.05
+
+# 이보다 짧은 단계는 비교에서 느려졌다고 보지 않음 (측정 잡음)
+COMPARE_MIN_SECONDS = 0.05
+
+_CID_FONT = 'HYSMyeongJo-Medium'
+
+_WORDS_EN = [
+    'site', 'area', 'total', 'contract', 'schedule', 'floor', 'steel', 'concrete', 'permit',
+    'inspection', 'amount', 'north', 'block', 'phase', 'design', 'report', 'volume', 'unit',
+]
+_WORDS_KO = [
+    '현장', '공사', '위치', '면적', '발주처', '계약', '금액', '공정', '비고', '합계', '준공',
+    '착공', '설계', '감리', '구조', '지하', '지상', '연면적', '대지', '용도', '철근', '콘크리트',
+]
+
+
+class CorpusWriter:
+    """합성 PDF 한 건을 쓰는 reportlab 캔버스 도우미 (같은 시드면 같은 바이트)"""
+
+    def __init__(self, path, seed, font=None):
+        try:
+            from reportlab.lib.pagesizes import A4
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfgen import canvas
+        except ImportError:
+            raise RuntimeError("합성 PDF 를 만들려면 reportlab 이 필요합니다 (pip install reportlab).")
+
+        if font:
+            from reportlab.pdfbase.ttfonts import TTFont
+            self.font = os.path.splitext(os.path.basename(font))[0]
+            pdfmetrics.registerFont(TTFont(self.font, font))
+        else:
+            from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+            self.font = _CID_FONT
+            pdfmetrics.registerFont(UnicodeCIDFont(_CID_FONT))
+        self.width, self.height = A4
+        self.rng = random.Random(seed)
+        self.canvas = canvas.Canvas(path, pagesize=A4, invariant=1)
+        self._image = None
+
+    def words(self, count, korean=False):
+        pool = _WORDS_KO + _WORDS_EN if korean else _WORDS_EN
+        return ' '.join(self.rng.choice(pool) for _ in range(count))
+
+    def heading(self, text):
+        self.canvas.setFont(self.font, 14)
+        self.canvas.drawString(50, self.height - 60, text)
+
+    def paragraphs(self, top, lines, korean=False):
+        self.canvas.setFont(self.font, 10)
+        y = top
+        for _ in range(lines):
+            if y < 50:
+                break
+            self.canvas.drawString(50, y, self.words(self.rng.randint(6, 12), korean))
+            y -= 14
+        return y
+
+    def table(self, top, rows, columns, ruled=True, korean=False):
+        """표 하나 (ruled 면 모든 칸에 괘선, 아니면 글자만 줄 맞춰 배치)"""
+        pool = _WORDS_KO if korean else _WORDS_EN
+        column_width = (self.width - 100) / columns
+        row_height = 16
+        header = [self.rng.choice(pool).title() for _ in range(columns)]
+        body = [
+            [self.rng.choice(pool) if column == 0 else str(self.rng.randint(1, 99999))
+             for column in range(columns)]
+            for _ in range(rows)
+        ]
+        self.canvas.setFont(self.font, 9)
+        for index, row in enumerate([header] + body):
+            y = top - index * row_height
+            for column, value in enumerate(row):
+                self.canvas.drawString(50 + column * column_width + 4, y - 12, value)
+        bottom = top - (rows + 1) * row_height
+        if ruled:
+            self.canvas.setLineWidth(0.5)
+            for index in range(rows + 2):
+                y = top - index * row_height
+                self.canvas.line(50, y, self.width - 50, y)
+            for column in range(columns + 1):
+                x = 50 + column * column_width
+                self.canvas.line(x, top, x, bottom)
+        return bottom
+
+    def image(self):
+        """페이지 전체를 덮는 회색조 잡음 이미지 (글자 없음)"""
+        if self._image is None:
+            from reportlab.lib.utils import ImageReader
+            from PIL import Image
+
+            width, height = 400, 560
+            pixels = bytes(self.rng.randrange(256) for _ in range(width * height))
+            self._image = ImageReader(Image.frombytes('L', (width, height), pixels))
+        self.canvas.drawImage(self._image, 40, 40, self.width - 80, self.height - 80)
+
+    def page(self, kind, number):
+        """종류에 맞는 페이지 하나"""
+        if kind == 'mixed':
+            kind = ['ruled', 'borderless', 'text', 'image'][(number - 1) % 4]
+        if kind == 'ruled':
+            self.heading(f"Page {number} ruled table")
+            self.table(self.height - 90, self.rng.randint(10, 25), self.rng.randint(3, 6), ruled=True)
+        elif kind == 'borderless':
+            self.heading(f"Page {number} borderless table")
+            self.table(self.height - 90, self.rng.randint(10, 25), self.rng.randint(3, 6), ruled=False)
+        elif kind == 'text':
+            self.heading(f"Page {number} text")
+            self.paragraphs(self.height - 90, 50)
+        elif kind == 'image':
+            self.image()
+        elif kind == 'mixed_ko':
+            self.heading(f"{number} 페이지 현장 정보 (site information)")
+            bottom = self.paragraphs(self.height - 90, 8, korean=True)
+            bottom = self.table(bottom - 10, self.rng.randint(6, 12), 4, ruled=number % 3 != 0, korean=True)
+            self.paragraphs(bottom - 20, 6, korean=True)
+        self.canvas.showPage()
+
+    def save(self):
+        self.canvas.save()
+
+
+def corpus_path(corpus_dir, seed, name):
+    return os.path.join(corpus_dir, f'seed-{seed}', f'{name}.pdf')
+
+
+def generate(path, kind, pages, seed, font=None):
+    """합성 PDF 한 건을 임시 이름으로 쓴 뒤 제자리로 옮김"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    staging = path + '.tmp'
+    writer = CorpusWriter(staging, f'{seed}:{os.path.basename(path)}', font)
+    for number in range(1, pages + 1):
+        writer.page(kind, number)
+    writer.save()
+    os.replace(staging, path)
+    return path
+
+
+def select_corpus(names=None, max_pages=None):
+    selected = []
+    for name, kind, pages in CORPUS:
+        if names and name not in names:
+            continue
+        if max_pages and pages > max_pages:
+            continue
+        selected.append((name, kind, pages))
+    return selected
+
+
+def _sha256(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def _process_tree(root):
+    """root 와 그 하위 프로세스 PID 목록 (/proc 기준)"""
+    children = {}
+    for name in os.listdir('/proc'):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f'/proc/{name}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # 두 번째 필드(실행 파일 이름)에 공백이 있을 수 있으므로 마지막 ')' 뒤부터
+        parent = int(stat.rsplit(')', 1)[1].split()[1])
+        children.setdefault(parent, []).append(int(name))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def tree_rss_mb(root=None):
+    """프로세스와 하위 프로세스의 RSS 합계(MB), /proc 가 없으면 None"""
+    if not os.path.isdir('/proc'):
+        return None
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    total = 0
+    for pid in _process_tree(root or os.getpid()):
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                total += int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            continue
+    return total / (1024 * 1024)
+
+
+class RssSampler:
+    """with 블록 동안 프로세스 트리의 RSS 를 주기적으로 재 최댓값을 기억"""
+
+    def __init__(self, interval=RSS_INTERVAL):
+        self.interval = interval
+        self.peak_mb = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bench-rss', daemon=True)
+
+    def _sample(self):
+        rss = tree_rss_mb()
+        if rss is not None and (self.peak_mb is None or rss > self.peak_mb):
+            self.peak_mb = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        self._sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _jvm_count(pool, jvm_resident):
+    """지금까지의 JVM 기동 횟수 (jpype 가 없으면 tabula 실행마다 java 프로세스를 띄움)"""
+    return pool.launches if jvm_resident else pool.launches + pool.requests
+
+
+def measure(work, repeat=1):
+    """work() 를 repeat 번 실행하고 시간(중앙값)·최대 RSS·JVM 기동·tabula 실행 횟수와 마지막 결과 반환"""
+    pool = tabula_worker.get_pool()
+    jvm_resident = runtime_probe.get_probe()['jpype'] is not None
+    launches, requests = _jvm_count(pool, jvm_resident), pool.requests
+    runs, peak, details = [], None, {}
+    for _ in range(max(1, repeat)):
+        with RssSampler() as sampler:
+            started = time.perf_counter()
+            details = work()
+            runs.append(time.perf_counter() - started)
+        if sampler.peak_mb is not None:
+            peak = max(peak or 0, sampler.peak_mb)
+    record = {
+        'seconds': round(statistics.median(runs), 4),
+        'runs': [round(seconds, 4) for seconds in runs],
+        'peak_rss_mb': round(peak, 1) if peak is not None else None,
+        'jvm_launches': _jvm_count(pool, jvm_resident) - launches,
+        'tabula_runs': pool.requests - requests,
+    }
+    record.update(details or {})
+    return record
+
+
+def _stage_validate(path):
+    def work():
+        with pdf_document.PdfDocument(path) as document:
+            return {'page_count': document.page_count}
+    return work
+
+
+def _stage_text(path, pages, backend):
+    def work():
+        with pdf_document.PdfDocument(path, text_backend=backend) as document:
+            document.prefetch_texts(pages)
+            return {'chars': sum(len(document.text(page) or '') for page in pages)}
+    return work
+
+
+def _table_details(results):
+    return {
+        'tables': sum(len(result.tables) for result in results if result.strategy),
+        'skipped_pages': sum(1 for result in results if result.skipped),
+        'page_errors': sum(1 for result in results if result.error),
+    }
+
+
+def _stage_tables(path, pages, strategies, keep):
+    def work():
+        results = list(extraction.iter_pages(path, pages, strategies))
+        keep[:] = results
+        return _table_details(results)
+    return work
+
+
+def _stage_info(path, pages, backend):
+    def work():
+        results = list(extraction.iter_pages(
+            path, pages, jobs.job_strategies(jobs.INFO, {}), with_text=True, text_backend=backend
+        ))
+        details = _table_details(results)
+        details['chars'] = sum(len(result.text or '') for result in results)
+        return details
+    return work
+
+
+def _stage_excel(tables_dict):
+    def work():
+        export = excel_export.ExcelExport()
+        export.add_tables(tables_dict)
+        output = export.finish()
+        size = len(output.read())
+        output.close()
+        return {'sheets': export.sheets, 'bytes': size}
+    return work
+
+
+def bench_document(path, pages, stages, text_backend_names, repeat=1, log=print):
+    """문서 한 건의 단계별 측정 결과 {단계: 기록}"""
+    page_list = list(range(1, pages + 1))
+    records = {}
+
+    def run(stage, work):
+        if stages and stage.split(':')[0] not in stages:
+            return
+        records[stage] = measure(work, repeat)
+        record = records[stage]
+        log(f"  {stage:<16} {record['seconds']:8.3f}초  최대 RSS {record['peak_rss_mb'] or 0:7.1f}MB  "
+            f"JVM 기동 {record['jvm_launches']}  tabula 실행 {record['tabula_runs']}")
+
+    run('validate', _stage_validate(path))
+    for backend in text_backend_names:
+        run(f'text:{backend}', _stage_text(path, page_list, backend))
+    cascade_results = []
+    for name, strategies in TABLE_STRATEGIES.items():
+        keep = cascade_results if name == 'cascade' else []
+        run(f'tables:{name}', _stage_tables(path, page_list, strategies, keep))
+    run('info', _stage_info(path, page_list, text_backend_names[0] if text_backend_names else None))
+    if not stages or 'excel' in stages:
+        if not cascade_results:
+            # tables 단계를 재지 않았으면 시간에 넣지 않고 재시도 순서 결과만 만듦
+            cascade_results = list(extraction.iter_pages(path, page_list, TABLE_STRATEGIES['cascade']))
+        run('excel', _stage_excel(jobs.tables_dict(jobs.TABLES, cascade_results)))
+    return records
+
+
+def _git_commit():
+    try:
+        completed = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=10
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return completed.stdout.decode().strip() or None
+
+
+def run_benchmark(corpus, corpus_dir, seed=0, stages=None, text_backend_names=None, repeat=1,
+                  font=None, regenerate=False, label=None, log=print):
+    """합성 문서를 (없으면 만들고) 차례로 재서 결과 dict 반환"""
+    text_backend_names = text_backend_names or [text_backends.TEXT_BACKEND]
+    documents = []
+    for name, kind, pages in corpus:
+        path = corpus_path(corpus_dir, seed, name)
+        if regenerate or not os.path.exists(path):
+            started = time.perf_counter()
+            generate(path, kind, pages, seed, font)
+            log(f"{name}: 합성 PDF 생성 ({time.perf_counter() - started:.1f}초)")
+        documents.append({
+            'name': name, 'kind': kind, 'pages': pages, 'path': path,
+            'bytes': os.path.getsize(path), 'sha256': _sha256(path),
+        })
+
+    # 워커 기동(JVM 예열)은 문서별 단계와 따로 잼
+    pool = tabula_worker.get_pool()
+
+    def warm_up():
+        for worker in pool.workers:
+            worker.read_pdf_pages(documents[0]['path'], [1])
+        if text_backends.TEXT_WORKERS > 1:
+            text_backends.get_pool(text_backends.TEXT_WORKERS)
+        return {}
+
+    startup = measure(warm_up) if documents else {}
+    if startup:
+        # 풀은 measure 가 횟수를 세기 전에 이미 워커를 띄우므로 이 프로세스의 기동 횟수 전체로
+        startup['jvm_launches'] = _jvm_count(pool, runtime_probe.get_probe()['jpype'] is not None)
+    log(f"워커 기동: {startup.get('seconds', 0):.2f}초 (tabula 워커 {pool.size}개, 힙 {pool.heap_mb}MB)")
+
+    for document in documents:
+        log(f"{document['name']} ({document['pages']}페이지, {document['bytes'] / 1024:.0f}KB)")
+        document['stages'] = bench_document(
+            document['path'], document['pages'], stages, text_backend_names, repeat, log
+        )
+
+    stage_records = [record for document in documents for record in document['stages'].values()]
+    peaks = [record['peak_rss_mb'] for record in stage_records if record['peak_rss_mb'] is not None]
+    return {
+        'version': RESULT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'label': label,
+        'commit': _git_commit(),
+        'runtime': runtime_probe.get_probe(),
+        'settings': {
+            'seed': seed,
+            'repeat': repeat,
+            'font': os.path.basename(font) if font else _CID_FONT,
+            'text_backends': text_backend_names,
+            'text_workers': text_backends.TEXT_WORKERS,
+            'tabula_workers': pool.size,
+            'heap_mb': pool.heap_mb,
+            'stream_window': extraction.STREAM_WINDOW,
+            'mmap': pdf_document.USE_MMAP,
+        },
+        'startup': startup,
+        'documents': documents,
+        'totals': {
+            'seconds': round(sum(record['seconds'] for record in stage_records), 3),
+            'peak_rss_mb': max(peaks) if peaks else None,
+            'jvm_launches': startup.get('jvm_launches', 0) + sum(record['jvm_launches'] for record in stage_records),
+            'tabula_runs': startup.get('tabula_runs', 0) + sum(record['tabula_runs'] for record in stage_records),
+        },
+    }
+
+
+def save_results(results, results_dir):
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, time.strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.tmp', path)
+    return path
+
+
+def compare(baseline, current, threshold=0.1):
+    """(문서, 단계, 기준 초, 이번 초, 변화율, 느려짐 여부) 목록
+
+    같은 이름의 문서 중 합성 PDF 가 같은(sha256 이 같은) 것만 비교한다. 두 값이 모두
+    COMPARE_MIN_SECONDS 보다 짧은 단계는 느려졌다고 보지 않는다.
+    """
+    if baseline.get('version') != current.get('version'):
+        raise ValueError("결과 파일 형식 버전이 달라 비교할 수 없습니다.")
+    base_documents = {document['name']: document for document in baseline['documents']}
+    rows = []
+    for document in current['documents']:
+        base = base_documents.get(document['name'])
+        if base is None or base['sha256'] != document['sha256']:
+            continue
+        for stage, record in document['stages'].items():
+            base_record = base['stages'].get(stage)
+            if base_record is None:
+                continue
+            before, after = base_record['seconds'], record['seconds']
+            change = (after - before) / before if before > 0 else 0.0
+            slower = change > threshold and max(before, after) >= COMPARE_MIN_SECONDS
+            rows.append((document['name'], stage, before, after, change, slower))
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'문서':<16} {'단계':<16} {'기준':>9} {'이번':>9} {'변화':>8}"]
+    for name, stage, before, after, change, slower in rows:
+        mark = '  느려짐' if slower else ''
+        lines.append(f"{name:<16} {stage:<16} {before:8.3f}초 {after:8.3f}초 {change:+7.1%}{mark}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="추출 파이프라인 벤치마크 (합성 PDF, 오프라인)")
+    parser.add_argument('--docs', nargs='+', choices=[name for name, _, _ in CORPUS],
+                        help="잴 합성 문서 (기본은 전체)")
+    parser.add_argument('--max-pages', type=int, default=None, help="이보다 페이지가 많은 문서는 건너뜀")
+    parser.add_argument('--stages', nargs='+', choices=['validate', 'text', 'tables', 'info', 'excel'],
+                        help="잴 단계 (기본은 전체, excel 은 tables 의 재시도 순서 결과로 만듦)")
+    parser.add_argument('--text-backends', nargs='+', choices=list(text_backends.BACKENDS),
+                        help="text 단계에서 잴 엔진 (기본 PDF_EXTRACTOR_TEXT_BACKEND 또는 pypdf2)")
+    parser.add_argument('--repeat', type=int, default=1, help="단계마다 반복 횟수 (시간은 중앙값)")
+    parser.add_argument('--seed', type=int, default=0, help="합성 PDF 시드 (같은 시드면 같은 파일)")
+    parser.add_argument('--font', help="한글을 넣어 쓸 TTF 글꼴 (기본은 글꼴을 넣지 않는 CID 글꼴)")
+    parser.add_argument('--corpus-dir', default=os.path.join(BENCH_DIR, 'corpus'), help="합성 PDF 위치")
+    parser.add_argument('--results-dir', default=os.path.join(BENCH_DIR, 'results'), help="결과 JSON 위치")
+    parser.add_argument('--regenerate', action='store_true', help="합성 PDF 를 있어도 다시 만듦")
+    parser.add_argument('--label', help="결과에 남길 이름 (예: 변경 내용)")
+    parser.add_argument('--baseline', help="비교할 이전 결과 JSON")
+    parser.add_argument('--threshold', type=float, default=0.1, help="느려졌다고 볼 변화율 (기본 0.1 = 10%%)")
+    parser.add_argument('--fail-on-regression', action='store_true', help="느려진 단계가 있으면 종료 코드 1")
+    args = parser.parse_args(argv)
+
+    try:
+        text_backend_names = [text_backends.resolve(name) for name in args.text_backends or [None]]
+    except ValueError as e:
+        parser.error(str(e))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    corpus = select_corpus(args.docs, args.max_pages)
+    if not corpus:
+        print("잴 문서가 없습니다.", file=sys.stderr)
+        return 1
+    try:
+        results = run_benchmark(
+            corpus, args.corpus_dir, seed=args.seed, stages=args.stages,
+            text_backend_names=text_backend_names, repeat=args.repeat, font=args.font,
+            regenerate=args.regenerate, label=args.label
+        )
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    path = save_results(results, args.results_dir)
+    totals = results['totals']
+    print(f"합계 {totals['seconds']:.2f}초, 최대 RSS {totals['peak_rss_mb'] or 0:.1f}MB, "
+          f"JVM 기동 {totals['jvm_launches']}번, tabula 실행 {totals['tabula_runs']}번")
+    print(f"결과: {path}")
+
+    if baseline is not None:
+        try:
+            rows = compare(baseline, results, args.threshold)
+        except ValueError as e:
+            print(str(e), file=sys.stderr)
+            return 1
+        print(f"\n기준: {args.baseline} ({baseline.get('label') or baseline.get('commit') or ''})")
+        print(format_comparison(rows))
+        if args.fail_on_regression and any(row[5] for row in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
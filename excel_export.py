@@ -0,0 +1,88 @@
+"""표를 XLSX 파일로 내보내기 (시트 단위 스트리밍)
+
+openpyxl 의 일반 모드는 통합 문서 전체를 셀 객체로 메모리에 올려 두므로, 표가 수백 개면
+데이터 크기의 몇 배를 쓴다. 여기서는 write-only 모드로 시트를 하나씩 임시 파일에 쓰고
+바로 닫기 때문에, 메모리에는 지금 쓰는 표 하나만 남는다. 페이지가 끝날 때마다 그
+페이지의 표를 시트로 추가할 수 있다. 완성된 파일은 경로에 저장하거나, 크기가 SPILL_MB
+이하면 메모리(io.BytesIO), 넘으면 임시 파일(io.FileIO)로 돌려받는다.
+"""
+import io
+import os
+import tempfile
+
+import openpyxl
+import pandas as pd
+
+# 완성된 XLSX 를 메모리에 두는 최대 크기, 넘으면 임시 파일 (환경 변수로 변경 가능)
+SPILL_MB = int(os.environ.get('PDF_EXTRACTOR_EXCEL_SPILL_MB', '16'))
+
+
+def _cell_value(value):
+    """DataFrame 값을 셀 값으로 (to_excel 과 같이 결측값은 빈 셀)"""
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+class ExcelExport:
+    """write-only 통합 문서에 시트를 하나씩 추가하는 XLSX 내보내기"""
+
+    def __init__(self, spill_bytes=SPILL_MB * 1024 * 1024):
+        self.spill_bytes = spill_bytes
+        self.sheets = 0
+        self._workbook = openpyxl.Workbook(write_only=True)
+
+    def add_sheet(self, sheet_name, df):
+        """표 하나를 시트로 쓰고 바로 닫음 (df.to_excel(index=False) 와 같은 모양)"""
+        sheet = self._workbook.create_sheet(title=sheet_name)
+        sheet.append([_cell_value(column) for column in df.columns])
+        for row in df.itertuples(index=False, name=None):
+            sheet.append([_cell_value(value) for value in row])
+        sheet.close()
+        self.sheets += 1
+
+    def add_tables(self, tables_dict):
+        """시트 이름 → 표 딕셔너리의 비어 있지 않은 표를 순서대로 추가"""
+        for sheet_name, df in tables_dict.items():
+            if not df.empty:
+                self.add_sheet(sheet_name, df)
+
+    def save(self, path):
+        """경로에 저장 (임시 이름으로 쓴 뒤 이름을 바꿔 반쯤 쓴 파일이 보이지 않게 함)"""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, staging = tempfile.mkstemp(dir=directory, suffix='.xlsx.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                self._workbook.save(f)
+            os.replace(staging, path)
+        except Exception:
+            if os.path.exists(staging):
+                os.remove(staging)
+            raise
+        return path
+
+    def finish(self):
+        """완성된 XLSX 파일 객체 (spill_bytes 이하면 io.BytesIO, 넘으면 임시 파일 io.FileIO)"""
+        spool = tempfile.SpooledTemporaryFile(max_size=self.spill_bytes)
+        self._workbook.save(spool)
+        if spool.tell() <= self.spill_bytes:
+            spool.seek(0)
+            output = io.BytesIO(spool.read())
+        else:
+            # 이미 디스크로 넘어간 임시 파일 (닫아도 복제한 디스크립터로 계속 읽을 수 있음)
+            output = io.FileIO(os.dup(spool.fileno()), 'rb')
+        spool.close()
+        output.seek(0)
+        return output
+
+
+def write_excel(tables_dict, path):
+    """시트 이름 → 표 딕셔너리를 XLSX 파일로 저장 (표가 없으면 None)"""
+    export = ExcelExport()
+    export.add_tables(tables_dict)
+    if not export.sheets:
+        return None
+    return export.save(path)
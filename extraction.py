@@ -0,0 +1,259 @@
+"""표/텍스트 추출 공통 로직 (Streamlit 과 무관)
+
+각 전략은 페이지 범위 전체에 한 번씩만 실행된다. 첫 번째 전략은 모든 페이지를,
+다음 전략은 앞 전략에서 표가 나오지 않은 페이지만 모아 한 번에 추출한다.
+iter_pages 는 페이지 범위를 작은 구간으로 나눠 구간이 끝날 때마다 페이지 결과를
+내보내므로, 화면에서 긴 문서의 결과를 페이지가 끝나는 대로 보여줄 수 있다.
+텍스트가 필요하면 텍스트 추출(파이썬)은 별도 스레드에서 구간 순서대로 먼저 달리고
+표 추출(JVM 워커)과 동시에 진행되며, 두 결과는 페이지마다 합친다.
+trace 를 주면 페이지 점검, 캐시 조회, 구간별 텍스트, 전략별 표 추출 시도와 워커별 tabula
+실행을 tracing 구간으로 남긴다. cancel(tabula_worker.CancelToken) 을 주면 구간마다, 그리고
+tabula 실행 도중에도 취소·작업 시간 제한을 확인해 ExtractionCancelled 로 멈춘다.
+페이지 시간 제한을 넘은 페이지는 오류와 함께 timed_out 으로 표시하고 나머지는 계속한다.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pdf_document
+import result_cache
+import tabula_worker
+import tracing
+
+# 모든 tabula 호출에 공통으로 쓰는 pandas 옵션
+PANDAS_OPTIONS = {'header': 0}
+
+# iter_pages 가 한 번에 추출하는 페이지 수 (구간마다 결과를 내보냄)
+STREAM_WINDOW = int(os.environ.get('PDF_EXTRACTOR_STREAM_WINDOW', '10'))
+
+# 자동 모드에서 lattice 를 고르는 최소 괘선 수 (선분 + 사각형)
+AUTO_MIN_RULINGS = 4
+
+# 현장정보 추출의 재시도 순서: lattice → stream
+INFO_STRATEGIES = [
+    ('lattice', {'lattice': True, 'stream': False, 'guess': True}),
+    ('stream', {'lattice': False, 'stream': True, 'guess': True}),
+]
+
+
+def table_strategies(lattice, stream, guess):
+    """표 추출하기의 재시도 순서: 설정 옵션 → lattice/stream 반전 → guess 비활성화"""
+    return [
+        ('기본 옵션', {'lattice': lattice, 'stream': stream, 'guess': guess}),
+        ('lattice/stream 반전', {'lattice': not lattice, 'stream': not stream, 'guess': guess}),
+        ('guess 비활성화', {'lattice': lattice, 'stream': stream, 'guess': False}),
+    ]
+
+
+def auto_strategies(guess=True):
+    """자동 모드: 페이지의 괘선 수로 lattice/stream 중 하나를 골라 페이지당 한 번만 추출
+
+    PageProfile 을 받아 그 페이지에 쓸 전략 목록(전략 하나)을 돌려주는 함수를 반환한다.
+    """
+    def choose(profile):
+        if profile.rulings >= AUTO_MIN_RULINGS:
+            return [('자동(lattice)', {'lattice': True, 'stream': False, 'guess': guess})]
+        return [('자동(stream)', {'lattice': False, 'stream': True, 'guess': guess})]
+    return choose
+
+
+def has_tables(tables):
+    """비어 있지 않은 표가 하나라도 있는지 확인"""
+    return bool(tables) and any(not df.empty for df in tables)
+
+
+class CascadeResult:
+    """재시도 전략 실행 결과
+
+    tables: {페이지: [DataFrame]} (표를 찾지 못한 페이지는 빈 리스트)
+    strategies: {페이지: 표를 찾은 전략 이름 또는 None}
+    errors: {페이지: 오류 메시지}
+    timed_out: 시간 제한을 넘어 멈춘 페이지 집합 (errors 에도 있음)
+    cached: 캐시에서 가져온 페이지 집합
+    runs: tabula 실행 횟수
+    """
+
+    def __init__(self, pages):
+        self.tables = {page: [] for page in pages}
+        self.strategies = {page: None for page in pages}
+        self.errors = {}
+        self.timed_out = set()
+        self.cached = set()
+        self.runs = 0
+
+    def empty_pages(self):
+        """표를 찾지 못했고 오류도 없으며 캐시에도 없던 페이지"""
+        return [
+            page for page, tables in self.tables.items()
+            if not has_tables(tables) and page not in self.errors and page not in self.cached
+        ]
+
+
+def _read_batch(file_path, pages, options, result, trace=None, cancel=None):
+    """여러 페이지를 워커 풀에서 나눠 추출하고 페이지별 오류·시간 초과와 실행 횟수를 기록"""
+    batch, errors, runs, timed_out = tabula_worker.get_pool().map_pages(
+        file_path, pages, trace=trace, cancel=cancel, pandas_options=PANDAS_OPTIONS, **options
+    )
+    result.errors.update(errors)
+    result.timed_out |= timed_out
+    result.runs += runs
+    return batch
+
+
+def run_cascade(file_path, pages, strategies, on_pass=None, cache=None, trace=None, cancel=None):
+    """전략을 순서대로 실행하되, 각 전략은 아직 표가 없는 페이지만 한 번에 추출
+
+    on_pass(전략 이름, 페이지 목록) 콜백으로 각 단계 시작을 알린다.
+    cache 를 주면 PDF 내용 해시 + 페이지 + 전략 목록으로 페이지 결과를 재사용한다.
+    trace 를 주면 캐시 조회와 전략별 시도를 구간으로 남긴다. cancel 이 취소되면
+    ExtractionCancelled 를 낸다.
+    """
+    result = CascadeResult(pages)
+
+    if cache is not None and pages:
+        with tracing.span(trace, 'cache', pages=pages) as span:
+            doc_hash = result_cache.file_digest(file_path)
+            for page in pages:
+                hit = cache.get_tables(doc_hash, page, strategies)
+                if hit is not None:
+                    result.tables[page], result.strategies[page] = hit
+                    result.cached.add(page)
+            span.set(hits=len(result.cached))
+    remaining = result.empty_pages()
+
+    for name, options in strategies:
+        if not remaining:
+            break
+        if on_pass is not None:
+            on_pass(name, remaining)
+
+        with tracing.span(trace, 'tables', pages=remaining, strategy=name) as span:
+            batch = _read_batch(file_path, remaining, options, result, trace, cancel)
+            found = 0
+            for page in remaining:
+                tables = batch.get(page, [])
+                if has_tables(tables):
+                    result.tables[page] = tables
+                    result.strategies[page] = name
+                    found += len(tables)
+            span.set(
+                tables=found,
+                errors=sum(1 for page in remaining if page in result.errors),
+                timed_out=sum(1 for page in remaining if page in result.timed_out),
+            )
+
+        remaining = result.empty_pages()
+
+    if cache is not None:
+        for page in pages:
+            if page not in result.errors and page not in result.cached:
+                cache.put_tables(doc_hash, page, strategies, result.tables[page], result.strategies[page])
+
+    return result
+
+
+def _run_planned(file_path, pages, strategies, document, on_pass=None, cache=None, trace=None, cancel=None):
+    """페이지마다 고른 전략 목록이 같은 페이지끼리 묶어 run_cascade 를 실행하고 결과를 합침"""
+    groups = {}
+    for page in pages:
+        plan = strategies(document.profile(page))
+        groups.setdefault(repr(plan), (plan, []))[1].append(page)
+
+    merged = CascadeResult(pages)
+    for plan, group in groups.values():
+        result = run_cascade(file_path, group, plan, on_pass=on_pass, cache=cache, trace=trace, cancel=cancel)
+        merged.tables.update(result.tables)
+        merged.strategies.update(result.strategies)
+        merged.errors.update(result.errors)
+        merged.timed_out |= result.timed_out
+        merged.cached |= result.cached
+        merged.runs += result.runs
+    return merged
+
+
+def _prefetch_texts(document, pages, trace=None):
+    """구간 하나의 텍스트를 미리 추출 (텍스트 스레드에서 실행)"""
+    with tracing.span(trace, 'text', pages=pages, backend=document.text_backend) as span:
+        document.prefetch_texts(pages)
+        span.set(chars=sum(len(document.text(page) or '') for page in pages))
+
+
+class PageResult:
+    """한 페이지의 추출 결과 (page, tables, text 와 표를 찾은 전략·오류·시간 초과·캐시 여부·건너뛴 사유)"""
+
+    def __init__(self, page, tables, text=None, strategy=None, error=None, cached=False, skipped=None,
+                 timed_out=False):
+        self.page = page
+        self.tables = tables
+        self.text = text
+        self.strategy = strategy
+        self.error = error
+        self.cached = cached
+        self.skipped = skipped
+        self.timed_out = timed_out
+
+
+def iter_pages(file_path, pages, strategies, with_text=False, cache=None,
+               window=STREAM_WINDOW, on_pass=None, document=None, text_backend=None, trace=None,
+               cancel=None):
+    """구간 단위로 표(와 텍스트)를 추출하며 페이지가 끝나는 대로 PageResult 를 내보냄
+
+    추출 전에 문서의 페이지 수와 페이지 내용 색인으로 범위 밖·빈 페이지·이미지 전용
+    페이지를 골라내 tabula 에 보내지 않는다. 각 구간 안에서는 run_cascade 와 같이
+    전략별로 한 번씩만 tabula 를 실행한다. strategies 에 auto_strategies() 처럼
+    PageProfile 을 받는 함수를 주면 페이지마다 전략을 골라 실행한다. document 로
+    이미 열어 둔 PdfDocument 를 주면 점검과 텍스트 추출에 그대로 쓴다 (text_backend 는
+    document 를 새로 열 때만 쓰임). with_text 면 텍스트는 별도 스레드에서 구간마다
+    한꺼번에 추출하므로, 표 추출과 동시에 진행되어 전체 시간은 두 단계 중 긴 쪽에 가깝다.
+    trace 를 주면 단계마다 tracing 구간으로 남긴다. cancel 이 취소되거나 작업 시간 제한을
+    넘으면 구간 사이에서든 tabula 실행 도중이든 ExtractionCancelled 로 멈춘다.
+    """
+    pages = list(pages)
+    window = max(1, window)
+    chunks = [pages[start:start + window] for start in range(0, len(pages), window)]
+    opened = document is None
+    if opened:
+        document = pdf_document.PdfDocument(file_path, cache, text_backend=text_backend)
+    text_executor = None
+    try:
+        # 페이지 점검(내용 색인)은 두 스레드가 함께 쓰므로 먼저 끝내 둠
+        with tracing.span(trace, 'plan', pages=pages) as span:
+            _, skipped = document.plan_pages(pages)
+            span.set(skipped=len(skipped))
+        if with_text:
+            text_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-text')
+            texts_ready = [text_executor.submit(_prefetch_texts, document, chunk, trace) for chunk in chunks]
+        for index, chunk in enumerate(chunks):
+            if cancel is not None:
+                cancel.check()
+            work = [page for page in chunk if page not in skipped]
+            if callable(strategies):
+                result = _run_planned(
+                    file_path, work, strategies, document, on_pass=on_pass, cache=cache, trace=trace, cancel=cancel
+                )
+            else:
+                result = run_cascade(
+                    file_path, work, strategies, on_pass=on_pass, cache=cache, trace=trace, cancel=cancel
+                )
+            if with_text:
+                # 이 구간의 텍스트가 아직이면 기다림 (추출 중 오류도 여기서 그대로 올라옴)
+                texts_ready[index].result()
+            for page in chunk:
+                text = document.text(page) if with_text else None
+                if page in skipped:
+                    yield PageResult(page, [], text=text, skipped=skipped[page])
+                    continue
+                yield PageResult(
+                    page,
+                    result.tables[page],
+                    text=text,
+                    strategy=result.strategies[page],
+                    error=result.errors.get(page),
+                    cached=page in result.cached,
+                    timed_out=page in result.timed_out,
+                )
+    finally:
+        if text_executor is not None:
+            # 중간에 멈추면 남은 텍스트 구간은 버리되, 지금 도는 구간은 문서를 닫기 전에 끝나길 기다림
+            text_executor.shutdown(wait=True, cancel_futures=True)
+        if opened:
+            document.close()
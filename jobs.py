@@ -0,0 +1,449 @@
+"""백그라운드 추출 작업 관리
+
+Streamlit 은 위젯을 건드릴 때마다 스크립트를 처음부터 다시 실행하므로, 추출을
+스크립트 안에서 돌리면 진행 중이던 작업이 버려진다. 작업은 서버 프로세스 전역의
+실행기에서 돌고, 화면은 작업 ID 로 상태를 조회해 그린다. 작업에 쓰는 PDF 는 업로드
+보관소(upload_spool)의 파일을 작업이 직접 참조하므로 화면에서 파일을 내려도 계속
+돌며, 끝난 작업은 보관 기간이 지나면 참조를 풀고 결과 파일과 함께 정리된다.
+작업마다 단계별 시간(tracing.Trace)을 남겨 화면의 성능 패널과 API 에서 볼 수 있다.
+작업은 언제든 취소할 수 있고 실행 시간 상한(JOB_TIMEOUT)이 있으며, 취소되거나 상한을
+넘으면 진행 중인 tabula 실행까지 멈추고 그때까지의 결과를 남긴 채 '중단됨'으로 끝난다.
+대기 중인 작업은 사용자(화면 세션 또는 API 사용자)별로 공평하게, 짧은 작업을 먼저
+실행한다 (scheduler.py).
+"""
+import os
+import threading
+import time
+import uuid
+
+import excel_export
+import extraction
+import result_cache
+import scheduler
+import table_export
+import tabula_worker
+import tracing
+import upload_spool
+
+# 동시에 실행하는 작업 수, 대기+실행 작업 상한, 끝난 작업 보관 시간(초), 결과 파일 위치
+# (환경 변수로 변경 가능)
+JOB_WORKERS = int(os.environ.get('PDF_EXTRACTOR_JOB_WORKERS', '2'))
+JOB_QUEUE_LIMIT = int(os.environ.get('PDF_EXTRACTOR_JOB_QUEUE', '8'))
+# 사용자 한 명이 대기+실행 중으로 둘 수 있는 작업 수
+JOB_USER_LIMIT = int(os.environ.get('PDF_EXTRACTOR_USER_QUEUE', '4'))
+JOB_TTL = int(os.environ.get('PDF_EXTRACTOR_JOB_TTL', '3600'))
+# 작업 하나의 실행 시간 상한(초), 0 이면 제한 없음 (환경 변수로 변경 가능)
+JOB_TIMEOUT = float(os.environ.get('PDF_EXTRACTOR_JOB_TIMEOUT', '1800'))
+# 결과 디렉토리에서 주인 없는 파일을 찾는 간격(초)
+ORPHAN_SCAN_SECONDS = 60
+JOB_DIR = os.environ.get(
+    'PDF_EXTRACTOR_JOB_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs')
+)
+
+# 작업 종류
+TABLES = 'tables'
+INFO = 'info'
+
+# 작업 상태
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+STATUS_LABELS = {QUEUED: '대기 중', RUNNING: '실행 중', DONE: '완료', FAILED: '실패', CANCELLED: '중단됨'}
+
+# 끝난 작업에서 처음 요청할 때 만드는 내보내기 파일: 형식 → (파일 이름 끝부분, 저장 함수)
+EXPORT_FORMATS = {
+    'long': ('tables_long.xlsx', table_export.write_long_excel),
+    'bundle': ('tables.zip', table_export.write_bundle),
+    'parquet': ('tables.parquet', table_export.write_parquet),
+    'feather': ('tables.feather', table_export.write_feather),
+    'arrow': ('tables.arrow', table_export.write_arrow),
+}
+
+
+class JobQueueFull(Exception):
+    """대기+실행 중인 작업이 상한에 도달해 새 작업을 받을 수 없음"""
+
+
+def job_strategies(kind, params):
+    """작업 종류와 옵션으로 iter_pages 에 넘길 전략 결정"""
+    if kind == INFO:
+        return extraction.auto_strategies() if params.get('auto') else extraction.INFO_STRATEGIES
+    if params.get('auto'):
+        return extraction.auto_strategies(params['guess'])
+    return extraction.table_strategies(params['lattice'], params['stream'], params['guess'])
+
+
+def text_content(results):
+    """페이지별 텍스트 목록 ('=== 페이지 N ===' 형식)"""
+    return [
+        f"=== 페이지 {result.page} ===\n{result.text}\n"
+        for result in list(results) if result.text is not None
+    ]
+
+
+def page_sheets(kind, result, table_number=0):
+    """한 페이지 결과의 (시트 이름, 표) 목록과 지금까지 센 표 번호
+
+    표 추출은 Table_N (N 은 table_number 부터 이어지는 문서 전체 번호),
+    현장정보 추출은 PageN_TableM. 빈 표는 번호만 차지하고 시트는 만들지 않는다.
+    """
+    sheets = []
+    if not result.strategy or result.error:
+        return sheets, table_number
+    for i, df in enumerate(result.tables):
+        table_number += 1
+        if df.empty:
+            continue
+        sheet_name = f'Page{result.page}_Table{i+1}' if kind == INFO else f'Table_{table_number}'
+        sheets.append((sheet_name, df))
+    return sheets, table_number
+
+
+def tables_dict(kind, results):
+    """시트 이름 → 표 (표 추출은 Table_N, 현장정보 추출은 PageN_TableM)"""
+    sheets = {}
+    table_number = 0
+    for result in list(results):
+        page, table_number = page_sheets(kind, result, table_number)
+        sheets.update(page)
+    return sheets
+
+
+class Job:
+    """추출 작업 하나의 상태와 페이지별 결과 (results 는 끝난 페이지 순서대로 늘어남)"""
+
+    def __init__(self, job_id, kind, doc_hash, file_path, filename, pages, params, owner=None):
+        self.id = job_id
+        # 대기열에서 공평하게 순서를 나눌 사용자 (화면 세션 또는 API 사용자)
+        self.owner = owner or 'anonymous'
+        self.kind = kind
+        self.doc_hash = doc_hash
+        self.file_path = file_path
+        self.filename = filename
+        self.pages = list(pages)
+        self.params = params
+        self.status = QUEUED
+        self.results = []
+        self.messages = []
+        self.error = None
+        self.excel_path = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.trace = tracing.Trace(job_id)
+        self.cancel_token = tabula_worker.CancelToken()
+        # 대기 중 취소와 실행 시작이 엇갈리지 않게 상태 전환을 묶음
+        self._state_lock = threading.Lock()
+
+    @property
+    def key(self):
+        """같은 문서·같은 요청이면 같은 값 (중복 제출 방지용)"""
+        return (self.doc_hash, self.kind, tuple(self.pages), tuple(sorted(self.params.items())))
+
+    @property
+    def total(self):
+        return len(self.pages)
+
+    @property
+    def cost(self):
+        """대기열에서 작업 크기로 보는 값 (페이지 수)"""
+        return len(self.pages)
+
+    @property
+    def done(self):
+        return len(self.results)
+
+    @property
+    def is_finished(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def log(self, message):
+        self.messages.append(message)
+
+    def text_content(self):
+        return text_content(self.results)
+
+    def tables_dict(self):
+        return tables_dict(self.kind, self.results)
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def expired(self, ttl, now=None):
+        now = time.time() if now is None else now
+        return self.is_finished and now - self.finished > ttl
+
+    def cancel(self):
+        """작업 취소 (대기 중이면 바로 '중단됨', 실행 중이면 진행 중인 tabula 실행을 멈추게 함)"""
+        with self._state_lock:
+            if self.is_finished:
+                return False
+            self.cancel_token.cancel()
+            if self.status == QUEUED:
+                self.error = self.cancel_token.reason
+                self.status = CANCELLED
+                self.finished = time.time()
+        return True
+
+
+def _run(job, excel_path):
+    """실행기 스레드에서 작업 하나를 끝까지 실행
+
+    페이지가 끝날 때마다 그 페이지의 표를 XLSX 시트로 바로 써 두고, 작업이 끝나면
+    excel_path 에 저장한다 (표가 없으면 저장하지 않음). 취소되거나 JOB_TIMEOUT 을 넘으면
+    그때까지의 결과와 XLSX 를 남기고 CANCELLED 로 끝낸다.
+    """
+    with job._state_lock:
+        if job.status == CANCELLED:
+            return
+        job.status = RUNNING
+        job.started = time.time()
+    job.cancel_token.start(JOB_TIMEOUT)
+    suffix = '의 표' if job.kind == INFO else ''
+    export = excel_export.ExcelExport()
+    table_number = 0
+    # 시트 쓰기는 페이지마다 나눠 일어나므로 합친 시간을 구간 하나로 남김
+    excel_seconds = 0.0
+    try:
+        results = extraction.iter_pages(
+            job.file_path,
+            job.pages,
+            job_strategies(job.kind, job.params),
+            with_text=job.kind == INFO,
+            cache=result_cache.get_cache(),
+            on_pass=lambda name, pages: job.log(
+                f"[{name}] 페이지 {pages[0]}-{pages[-1]} 중 {len(pages)}개 페이지{suffix} 추출 중..."
+            ),
+            text_backend=job.params.get('text_backend'),
+            trace=job.trace,
+            cancel=job.cancel_token,
+        )
+        for result in results:
+            job.results.append(result)
+            sheets, table_number = page_sheets(job.kind, result, table_number)
+            started = time.perf_counter()
+            export = _add_sheets(job, export, sheets)
+            excel_seconds += time.perf_counter() - started
+        _save_excel(job, export, excel_path, excel_seconds)
+        job.status = DONE
+    except tabula_worker.ExtractionCancelled as e:
+        job.error = str(e)
+        job.log(f"{e} {len(job.results)}/{job.total} 페이지까지의 결과를 남깁니다.")
+        try:
+            _save_excel(job, export, excel_path, excel_seconds)
+        except Exception as save_error:
+            job.log(f"Excel 파일 생성 중 오류 발생: {str(save_error)}")
+        job.status = CANCELLED
+    except Exception as e:
+        job.error = str(e)
+        job.status = FAILED
+    finally:
+        job.finished = time.time()
+        tracing.record(job.trace, 'job', job.elapsed(), kind=job.kind, pages=job.pages, status=job.status)
+        try:
+            tracing.get_metrics().write()
+        except OSError as e:
+            job.log(f"지표 파일을 쓰지 못했습니다: {e}")
+
+
+def _save_excel(job, export, excel_path, excel_seconds):
+    """페이지마다 써 둔 시트를 excel_path 에 저장 (시트가 없으면 저장하지 않음)"""
+    if export is None or not export.sheets:
+        return
+    tracing.record(job.trace, 'excel', excel_seconds, sheets=export.sheets)
+    with tracing.span(job.trace, 'excel.save', sheets=export.sheets):
+        job.excel_path = export.save(excel_path)
+
+
+def _add_sheets(job, export, sheets):
+    """XLSX 에 시트 추가 (실패하면 작업은 계속하고 결과 파일만 포기)"""
+    if export is None:
+        return None
+    try:
+        for sheet_name, df in sheets:
+            export.add_sheet(sheet_name, df)
+    except Exception as e:
+        job.log(f"Excel 파일 생성 중 오류 발생: {str(e)}")
+        return None
+    return export
+
+
+class JobManager:
+    """작업 ID 와 문서 해시로 작업을 찾고, 백그라운드 실행기에서 돌리는 관리자"""
+
+    def __init__(self, workers=JOB_WORKERS, ttl=JOB_TTL, job_dir=JOB_DIR, queue_limit=JOB_QUEUE_LIMIT,
+                 user_limit=JOB_USER_LIMIT):
+        self.ttl = ttl
+        self.queue_limit = queue_limit
+        self.user_limit = user_limit
+        self.job_dir = job_dir
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._scanned = 0.0
+        self._scheduler = scheduler.FairScheduler(
+            lambda job: _run(job, self._excel_path(job)), workers
+        )
+        os.makedirs(self.job_dir, exist_ok=True)
+
+    @staticmethod
+    def _owner(job_id):
+        """업로드 보관소에서 작업이 잡는 참조의 소유자 ID"""
+        return f'job:{job_id}'
+
+    def submit(self, kind, file_path, pages, params, filename=None, notes=(), owner=None):
+        """작업 등록 후 반환 (같은 문서·요청의 작업이 살아 있으면 그 작업을 그대로 반환)
+
+        notes 는 새 작업일 때만 작업 로그 앞에 남긴다. 대기+실행 중인 작업이 이미
+        queue_limit 개이거나 owner 의 작업이 user_limit 개면 JobQueueFull 을, 페이지가 없으면
+        ValueError 를 낸다.
+        """
+        if not pages:
+            raise ValueError("추출할 페이지가 없습니다 (시작 페이지가 끝 페이지보다 큽니다).")
+        self.expire()
+        self._remove_orphans()
+        doc_hash = result_cache.file_digest(file_path)
+        filename = filename or os.path.basename(file_path)
+        job = Job(uuid.uuid4().hex[:12], kind, doc_hash, None, filename, pages, params, owner)
+        with self._lock:
+            for existing in self._jobs.values():
+                if existing.key == job.key and existing.status not in (FAILED, CANCELLED):
+                    return existing
+            if self._active() >= self.queue_limit:
+                raise JobQueueFull(f"대기 중인 작업이 상한({self.queue_limit}개)에 도달했습니다.")
+            if self._active(job.owner) >= self.user_limit:
+                raise JobQueueFull(f"한 사용자가 대기시킬 수 있는 작업 수({self.user_limit}개)에 도달했습니다.")
+            # 보관소의 파일이면 참조만 추가, 아니면 보관소로 한 번 복사
+            _, job.file_path = upload_spool.get_spool().store_file(file_path, self._owner(job.id))
+            for note in notes:
+                job.log(note)
+            self._jobs[job.id] = job
+        self._scheduler.submit(job)
+        return job
+
+    def cancel(self, job_id):
+        """작업 취소 요청 (작업이 없으면 None, 이미 끝난 작업이면 False)"""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        cancelled = job.cancel()
+        if cancelled:
+            # 대기 중이던 작업은 실행 칸을 잡지 않도록 대기열에서도 뺌
+            self._scheduler.discard(job)
+        return cancelled
+
+    def queue_position(self, job):
+        """대기 중인 작업의 실행 순서 (1 이면 다음 차례, 대기 중이 아니면 None)"""
+        return self._scheduler.position(job)
+
+    def scheduler_stats(self):
+        """(실행 중인 작업 수, 대기 중인 작업 수, 동시에 실행하는 작업 수 상한)"""
+        return self._scheduler.stats()
+
+    def _excel_path(self, job):
+        return os.path.join(self.job_dir, f'{job.id}_tables.xlsx')
+
+    def export_file(self, job, export_format):
+        """끝난 작업의 내보내기 파일 경로 (EXPORT_FORMATS 형식, 표가 없으면 None)
+
+        처음 요청할 때 만들어 작업 디렉토리에 두고, 이후에는 같은 파일을 돌려준다.
+        """
+        suffix, write = EXPORT_FORMATS[export_format]
+        path = os.path.join(self.job_dir, f'{job.id}_{suffix}')
+        if os.path.exists(path):
+            return path
+        with tracing.span(job.trace, 'export', format=export_format):
+            return write(job.results, path)
+
+    def _active(self, owner=None):
+        return sum(
+            not job.is_finished and (owner is None or job.owner == owner)
+            for job in self._jobs.values()
+        )
+
+    def load(self):
+        """(대기+실행 중인 작업 수, 상한)"""
+        with self._lock:
+            return self._active(), self.queue_limit
+
+    def get(self, job_id):
+        """작업 ID 로 작업 조회 (없거나 만료됐으면 None)"""
+        self.expire()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def find(self, doc_hash):
+        """문서 해시로 살아 있는 작업 목록 조회 (최근 작업부터)"""
+        self.expire()
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.doc_hash == doc_hash]
+        return sorted(jobs, key=lambda job: job.created, reverse=True)
+
+    def _result_paths(self, job):
+        """작업이 만들 수 있는 결과 파일 경로 (XLSX 와 EXPORT_FORMATS 내보내기)"""
+        return [self._excel_path(job)] + [
+            os.path.join(self.job_dir, f'{job.id}_{suffix}') for suffix, _ in EXPORT_FORMATS.values()
+        ]
+
+    def expire(self):
+        """보관 시간이 지난 작업을 지우고 PDF 참조와 그 작업의 결과 파일 정리
+
+        결과 디렉토리는 화면과 API 서버가 함께 쓰므로 이 프로세스의 작업이 만든 파일만 지운다
+        (디렉토리를 훑지 않으므로 상태를 조회할 때마다 불러도 됨).
+        """
+        now = time.time()
+        expired = []
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items() if job.expired(self.ttl, now)]:
+                expired.append(self._jobs.pop(job_id))
+        spool = upload_spool.get_spool()
+        for job in expired:
+            for path in self._result_paths(job):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            spool.release(self._owner(job.id))
+
+    def _remove_orphans(self):
+        """비정상 종료한 프로세스가 남긴 결과 파일 정리 (ORPHAN_SCAN_SECONDS 마다 한 번)
+
+        다른 프로세스의 작업 파일일 수 있으므로 이 프로세스가 모르는 작업의 파일 중 보관
+        시간(ttl)보다 오래 고치지 않은 것만 지운다. 결과 파일은 작업이 끝난 뒤에 쓰이므로,
+        살아 있는 프로세스라면 그때쯤 자기 작업을 이미 정리했다.
+        """
+        now = time.time()
+        with self._lock:
+            if now - self._scanned < ORPHAN_SCAN_SECONDS:
+                return
+            self._scanned = now
+            known = set(self._jobs)
+        for name in os.listdir(self.job_dir):
+            if not name.endswith(('.xlsx', '.zip', '.parquet', '.feather', '.arrow', '.tmp')):
+                continue
+            if name.split('_', 1)[0] in known:
+                continue
+            path = os.path.join(self.job_dir, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl:
+                    os.remove(path)
+            except OSError:
+                pass
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_manager():
+    """프로세스 전역 작업 관리자"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
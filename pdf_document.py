@@ -0,0 +1,257 @@
+"""업로드 한 건에 대한 PDF 문서 핸들
+
+PyPDF2.PdfReader 로 문서를 한 번만 열어 xref 와 페이지 트리를 파싱해 두고,
+유효성 검사·페이지 수 확인·페이지 텍스트 추출이 모두 이 핸들을 함께 쓴다.
+추출 전에는 페이지 콘텐츠 스트림의 연산자만 세어 빈 페이지·이미지 전용 페이지·
+범위 밖 페이지를 골라내므로, 이런 페이지는 tabula 까지 가지 않는다.
+
+파일은 메모리 매핑으로 열어 PdfReader 가 필요한 부분만 운영체제 페이지 캐시에서 읽게
+하고, 페이지 하나를 점검하거나 텍스트를 뽑는 동안 새로 읽은 PDF 객체(콘텐츠 스트림,
+이미지, 글꼴 등)는 끝나는 대로 PdfReader 캐시에서 버린다. 그래서 문서가 커도 메모리에는
+xref 와 페이지 트리, 지금 처리하는 페이지의 객체만 남는다.
+"""
+import mmap
+import os
+import re
+import threading
+
+import PyPDF2
+
+import result_cache
+import text_backends
+
+
+# 메모리 매핑으로 PDF 를 읽을지 여부 (환경 변수 PDF_EXTRACTOR_MMAP=0 이면 일반 파일 읽기)
+USE_MMAP = os.environ.get('PDF_EXTRACTOR_MMAP', '1') != '0'
+
+# 콘텐츠 스트림 연산자 (피연산자 뒤에 공백으로 구분되어 나옴)
+_OPERATOR_PATTERN = re.compile(rb'(?:^|(?<=[\s\])>]))(re|l|Tj|TJ|\'|"|Do|BI)(?=[\s\[(<>/]|$)')
+
+# 건너뛴 페이지 사유
+SKIP_OUT_OF_RANGE = '범위 밖'
+SKIP_BLANK = '빈 페이지'
+SKIP_IMAGE_ONLY = '이미지 전용'
+
+
+class PageProfile:
+    """페이지 콘텐츠 스트림에서 센 연산자 수로 만든 간단한 내용 색인"""
+
+    def __init__(self, page, text_ops=0, lines=0, rects=0, images=0, forms=0):
+        self.page = page
+        self.text_ops = text_ops
+        self.lines = lines
+        self.rects = rects
+        self.images = images
+        self.forms = forms
+
+    @property
+    def has_text(self):
+        # 폼 XObject 안의 텍스트는 세지 않으므로 폼이 있으면 텍스트가 있다고 봄
+        return self.text_ops > 0 or self.forms > 0
+
+    @property
+    def rulings(self):
+        """선분과 사각형 경로 수 (격자형 표의 괘선 후보)"""
+        return self.lines + self.rects
+
+    @property
+    def has_rulings(self):
+        return self.rulings > 0
+
+    @property
+    def is_image_only(self):
+        return self.images > 0 and not self.has_text
+
+    @property
+    def is_blank(self):
+        return not self.has_text and not self.has_rulings and self.images == 0
+
+    def skip_reason(self):
+        """표/텍스트 추출이 필요 없는 페이지면 사유, 아니면 None"""
+        if self.is_image_only:
+            return SKIP_IMAGE_ONLY
+        if not self.has_text:
+            # 글자가 없으면 tabula 가 찾을 표도 없음
+            return SKIP_BLANK
+        return None
+
+
+def _profile_page(page_number, page):
+    """페이지 콘텐츠 스트림의 연산자 수와 XObject 종류를 세어 PageProfile 생성"""
+    counts = {}
+    contents = page.get_contents()
+    if contents is not None:
+        for match in _OPERATOR_PATTERN.finditer(contents.get_data()):
+            op = match.group(1)
+            counts[op] = counts.get(op, 0) + 1
+
+    images = counts.get(b'BI', 0)
+    forms = 0
+    resources = page.get('/Resources')
+    xobjects = resources.get_object().get('/XObject') if resources is not None else None
+    if xobjects is not None:
+        for xobject in xobjects.get_object().values():
+            subtype = xobject.get_object().get('/Subtype')
+            if subtype == '/Image':
+                images += 1
+            elif subtype == '/Form':
+                forms += 1
+
+    text_ops = sum(counts.get(op, 0) for op in (b'Tj', b'TJ', b"'", b'"'))
+    return PageProfile(
+        page_number,
+        text_ops=text_ops,
+        lines=counts.get(b'l', 0),
+        rects=counts.get(b're', 0),
+        images=images,
+        forms=forms,
+    )
+
+
+class PdfDocument:
+    """한 번 파싱한 PDF 를 검증·페이지 범위 확인·텍스트 추출에 재사용하는 핸들"""
+
+    def __init__(self, pdf_path, cache=None, use_mmap=USE_MMAP, text_backend=None):
+        self.pdf_path = pdf_path
+        self.cache = cache
+        self.text_backend = text_backends.resolve(text_backend)
+        # 엔진마다 결과가 조금씩 달라 캐시를 나눔 (기본 엔진은 예전 캐시 키 그대로)
+        self._text_options = None if self.text_backend == 'pypdf2' else {'backend': self.text_backend}
+        self._file = open(pdf_path, 'rb')
+        self._map = None
+        try:
+            if use_mmap:
+                self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.reader = PyPDF2.PdfReader(self._map if self._map is not None else self._file)
+            self.page_count = len(self.reader.pages)
+        except Exception:
+            self.close()
+            raise
+        self._doc_hash = None
+        self._texts = {}
+        self._profiles = {}
+        # PdfReader 는 스레드 안전하지 않으므로 페이지 접근을 직렬화
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def xref(self):
+        """PdfReader 가 파싱해 둔 상호 참조 테이블"""
+        return self.reader.xref
+
+    @property
+    def doc_hash(self):
+        """결과 캐시 키로 쓰는 PDF 내용 해시"""
+        if self._doc_hash is None:
+            self._doc_hash = result_cache.file_digest(self.pdf_path)
+        return self._doc_hash
+
+    def has_page(self, page):
+        return 1 <= page <= self.page_count
+
+    def _with_page(self, page, work):
+        """페이지 객체로 work 를 실행하고, 그동안 새로 읽은 PDF 객체는 캐시에서 버림
+
+        PdfReader 는 스레드 안전하지 않으므로 잠금 안에서 실행한다.
+        """
+        with self._lock:
+            resolved = self.reader.resolved_objects
+            loaded = set(resolved)
+            try:
+                return work(self.reader.pages[page - 1])
+            finally:
+                for key in [key for key in resolved if key not in loaded]:
+                    del resolved[key]
+                if self._map is not None and hasattr(mmap, 'MADV_DONTNEED'):
+                    # 이 페이지를 읽느라 올라온 매핑 페이지를 돌려줌 (다시 필요하면 페이지 캐시에서 읽음)
+                    self._map.madvise(mmap.MADV_DONTNEED)
+
+    def profile(self, page):
+        """페이지 내용 색인 (콘텐츠 스트림을 읽지 못하면 추출이 필요한 페이지로 취급)"""
+        if page not in self._profiles:
+            try:
+                profile = self._with_page(page, lambda page_object: _profile_page(page, page_object))
+            except Exception:
+                profile = PageProfile(page, text_ops=1)
+            self._profiles[page] = profile
+        return self._profiles[page]
+
+    def plan_pages(self, pages):
+        """추출 전 점검: (추출할 페이지 목록, {건너뛸 페이지: 사유}) 반환"""
+        work, skipped = [], {}
+        for page in pages:
+            if not self.has_page(page):
+                skipped[page] = SKIP_OUT_OF_RANGE
+                continue
+            reason = self.profile(page).skip_reason()
+            if reason:
+                skipped[page] = reason
+            else:
+                work.append(page)
+        return work, skipped
+
+    def clamp_range(self, start_page, end_page):
+        """페이지 범위를 문서의 실제 페이지 수 안으로 맞춤"""
+        start_page = max(1, start_page)
+        end_page = min(end_page, self.page_count)
+        return start_page, end_page
+
+    def text(self, page):
+        """페이지 텍스트 (문서에 없는 페이지면 None)
+
+        한 번 추출한 텍스트는 이 핸들과 결과 캐시(있으면)에 남겨 다시 추출하지 않는다.
+        글자가 없는 페이지(빈 페이지, 이미지 전용 페이지)는 엔진을 거치지 않고 빈 문자열.
+        """
+        if not self.has_page(page):
+            return None
+        if page not in self._texts:
+            self.prefetch_texts([page])
+        return self._texts[page]
+
+    def prefetch_texts(self, pages, workers=None):
+        """여러 페이지의 텍스트를 한꺼번에 추출해 둠 (text 가 바로 돌려줌)
+
+        캐시에 없는 페이지만 text_backend 엔진으로 추출하며, 페이지가 많으면
+        text_backends 의 프로세스 풀에서 병렬로 처리한다.
+        """
+        pending = []
+        for page in pages:
+            if not self.has_page(page) or page in self._texts:
+                continue
+            if self.profile(page).skip_reason():
+                self._texts[page] = ''
+                continue
+            text = None
+            if self.cache is not None:
+                text = self.cache.get_text(self.doc_hash, page, self._text_options)
+            if text is None:
+                pending.append(page)
+            else:
+                self._texts[page] = text
+        if not pending:
+            return
+
+        workers = text_backends.TEXT_WORKERS if workers is None else workers
+        if self.text_backend == 'pypdf2' and (workers <= 1 or len(pending) < text_backends.PARALLEL_MIN_PAGES):
+            # 몇 페이지뿐이면 이미 열어 둔 핸들로 바로
+            texts = {
+                page: self._with_page(page, lambda page_object: page_object.extract_text())
+                for page in pending
+            }
+        else:
+            texts = text_backends.extract_texts(self.pdf_path, pending, self.text_backend, workers)
+        for page, text in texts.items():
+            if self.cache is not None:
+                self.cache.put_text(self.doc_hash, page, text, self._text_options)
+            self._texts[page] = text
+
+    def close(self):
+        if self._map is not None and not self._map.closed:
+            self._map.close()
+        if not self._file.closed:
+            self._file.close()
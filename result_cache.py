@@ -0,0 +1,216 @@
+"""추출 결과 디스크 캐시
+
+같은 PDF 를 다시 올리면 tabula/PyPDF2 를 다시 실행하지 않도록, 페이지별 추출 결과를
+PDF 내용의 SHA-256 + 페이지 번호 + 추출 옵션으로 찾아 쓴다. 캐시는 서버를 다시 띄워도
+남아 있으며, 전체 크기가 상한을 넘으면 가장 오래 쓰지 않은 항목부터 지운다.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+import pandas as pd
+
+# 캐시 위치와 크기 상한 (환경 변수로 변경 가능)
+CACHE_DIR = os.environ.get(
+    'PDF_EXTRACTOR_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+)
+CACHE_MAX_MB = int(os.environ.get('PDF_EXTRACTOR_CACHE_MB', '1024'))
+
+# 상한을 넘으면 상한의 이 비율까지 줄임 (상한 바로 아래에서 멈추면 다음 저장마다 다시 넘어
+# 캐시 전체를 훑게 되므로 여유를 둠)
+CACHE_LOW_WATER = 0.9
+
+logger = logging.getLogger('pdf_extractor.cache')
+
+_digest_memo = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(file_path):
+    """PDF 파일 내용의 SHA-256 (같은 파일을 다시 읽지 않도록 크기·수정 시각으로 기억)"""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        if memo_key in _digest_memo:
+            return _digest_memo[memo_key]
+
+    sha = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha.update(chunk)
+    digest = sha.hexdigest()
+
+    with _digest_lock:
+        _digest_memo[memo_key] = digest
+    return digest
+
+
+def remember_digest(file_path, digest):
+    """이미 계산한 해시를 기억해 file_digest 가 파일을 다시 읽지 않게 함"""
+    stat = os.stat(file_path)
+    with _digest_lock:
+        _digest_memo[(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)] = digest
+
+
+def _write_frame(df, path):
+    """DataFrame 을 Parquet 으로 저장 (pyarrow 가 없으면 pickle)"""
+    try:
+        df.to_parquet(path + '.parquet', index=False)
+    except ImportError:
+        df.to_pickle(path + '.pkl')
+
+
+def _read_frame(path):
+    if os.path.exists(path + '.parquet'):
+        return pd.read_parquet(path + '.parquet')
+    return pd.read_pickle(path + '.pkl')
+
+
+class ResultCache:
+    """페이지 단위 표/텍스트 결과 캐시 (크기 상한 + LRU 삭제)"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_MB * 1024 * 1024, low_water=CACHE_LOW_WATER):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.low_water_bytes = int(max_bytes * low_water)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _key_path(self, doc_hash, kind, page, options):
+        raw = json.dumps([doc_hash, kind, page, options], sort_keys=True, ensure_ascii=False)
+        key = hashlib.sha256(raw.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def _entries(self):
+        """(경로, 크기, 마지막 사용 시각) 목록"""
+        entries = []
+        for bucket in os.listdir(self.cache_dir):
+            bucket_path = os.path.join(self.cache_dir, bucket)
+            if not os.path.isdir(bucket_path):
+                continue
+            for name in os.listdir(bucket_path):
+                path = os.path.join(bucket_path, name)
+                try:
+                    files = [os.path.join(path, f) for f in os.listdir(path)]
+                    size = sum(os.path.getsize(f) for f in files)
+                    used = os.path.getmtime(os.path.join(path, 'meta.json'))
+                except OSError:
+                    continue
+                entries.append((path, size, used))
+        return entries
+
+    def _load(self, path):
+        """항목의 meta.json 을 읽고 마지막 사용 시각 갱신"""
+        meta_path = os.path.join(path, 'meta.json')
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(meta_path)
+        except (OSError, ValueError):
+            return None
+        return meta
+
+    def _record(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _store(self, path, meta, write_files):
+        """임시 디렉토리에 쓴 뒤 이름을 바꿔 원자적으로 저장"""
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = tempfile.mkdtemp(dir=os.path.dirname(path))
+        try:
+            write_files(staging)
+            with open(os.path.join(staging, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump(meta, f, ensure_ascii=False)
+            size = sum(os.path.getsize(os.path.join(staging, f)) for f in os.listdir(staging))
+            os.rename(staging, path)
+        except OSError:
+            # 다른 세션이 같은 항목을 먼저 저장한 경우 등
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        except Exception as e:
+            # 표를 파일로 바꾸지 못한 경우 등 (캐시에만 넣지 않고 추출은 계속함)
+            shutil.rmtree(staging, ignore_errors=True)
+            logger.warning("결과 캐시 저장 실패 (%s): %s: %s", path, type(e).__name__, e)
+            return
+
+        with self._lock:
+            self._size += size
+            over_limit = self._size > self.max_bytes
+        if over_limit:
+            self.evict()
+
+    def evict(self):
+        """전체 크기가 low_water_bytes 아래로 내려갈 때까지 오래 쓰지 않은 항목 삭제"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.low_water_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+        with self._lock:
+            self._size = total
+
+    def get_tables(self, doc_hash, page, options):
+        """캐시된 (표 목록, 전략 이름) 또는 None"""
+        path = self._key_path(doc_hash, 'tables', page, options)
+        meta = self._load(path)
+        try:
+            tables = [_read_frame(os.path.join(path, f'table_{i}')) for i in range(meta['tables'])]
+        except Exception:
+            self._record(False)
+            return None
+        self._record(True)
+        return tables, meta['strategy']
+
+    def put_tables(self, doc_hash, page, options, tables, strategy):
+        def write_files(directory):
+            for i, df in enumerate(tables):
+                _write_frame(df, os.path.join(directory, f'table_{i}'))
+
+        path = self._key_path(doc_hash, 'tables', page, options)
+        self._store(path, {'tables': len(tables), 'strategy': strategy}, write_files)
+
+    def get_text(self, doc_hash, page, options=None):
+        """캐시된 페이지 텍스트 또는 None (options 는 텍스트 엔진처럼 결과를 바꾸는 설정)"""
+        meta = self._load(self._key_path(doc_hash, 'text', page, options))
+        self._record(meta is not None)
+        if meta is None:
+            return None
+        return meta['text']
+
+    def put_text(self, doc_hash, page, text, options=None):
+        path = self._key_path(doc_hash, 'text', page, options)
+        self._store(path, {'text': text}, lambda directory: None)
+
+    def stats(self):
+        """UI 표시용 적중/실패 횟수와 현재 크기"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size_mb': self._size / (1024 * 1024)}
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """프로세스 전역 결과 캐시"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResultCache()
+        return _cache
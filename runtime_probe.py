@@ -0,0 +1,155 @@
+"""실행 환경 점검 (서버 프로세스당 한 번)
+
+Java 설치와 버전, tabula jar 위치, jpype 사용 여부, CPU 수, 사용할 수 있는 메모리를
+처음 한 번만 조사해 기억해 둔다. java 프로세스는 이때 한 번만 띄우며
+(-XX:+PrintFlagsFinal -version 으로 버전과 기본 최대 힙을 함께 읽음), 결과는 화면의
+실행 환경 패널과 API 의 /diagnostics 에 보여 주고 tabula 워커 풀 크기를 정하는 데 쓴다.
+"""
+import os
+import platform
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+
+# 워커 수를 자동으로 정할 때 워커 하나에 주고 싶은 힙(MB)과 최대 워커 수
+AUTO_WORKER_HEAP_MB = 1024
+AUTO_MAX_WORKERS = 4
+
+# 메모리 예산을 자동으로 정할 때 쓰는 사용 가능 메모리 비율과 상한(MB)
+AUTO_BUDGET_FRACTION = 0.5
+AUTO_BUDGET_MAX_MB = 4096
+
+_MAX_HEAP_PATTERN = re.compile(r'\bMaxHeapSize\s*=\s*(\d+)')
+
+
+def _java_command():
+    """tabula-py 와 같이 PATH 의 java, 없으면 JAVA_HOME 의 java"""
+    found = shutil.which('java')
+    if found:
+        return found
+    java_home = os.environ.get('JAVA_HOME')
+    if java_home:
+        candidate = os.path.join(java_home, 'bin', 'java.exe' if os.name == 'nt' else 'java')
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def _probe_java(java):
+    """(버전 문자열, 기본 최대 힙 MB, 오류) - java 를 한 번만 실행"""
+    if java is None:
+        return None, None, "java 명령을 찾을 수 없습니다."
+    try:
+        completed = subprocess.run(
+            [java, '-XX:+PrintFlagsFinal', '-version'],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=30
+        )
+    except (OSError, subprocess.TimeoutExpired) as e:
+        return None, None, str(e)
+    version = completed.stderr.decode(errors='replace').strip()
+    match = _MAX_HEAP_PATTERN.search(completed.stdout.decode(errors='replace'))
+    max_heap_mb = int(match.group(1)) // (1024 * 1024) if match else None
+    if completed.returncode != 0:
+        return version or None, max_heap_mb, f"java 실행 실패 (종료 코드 {completed.returncode})"
+    return version, max_heap_mb, None
+
+
+def _tabula_jar():
+    try:
+        from tabula.backend import jar_path
+    except ImportError:
+        return None
+    path = jar_path()
+    return path if os.path.exists(path) else None
+
+
+def _jpype_version():
+    try:
+        import jpype
+    except ImportError:
+        return None
+    return getattr(jpype, '__version__', 'unknown')
+
+
+def _cpu_count():
+    """이 프로세스가 쓸 수 있는 CPU 수 (CPU 제한이 있으면 그만큼)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _available_memory_mb():
+    """사용 가능한 메모리(MB) - /proc/meminfo 의 MemAvailable 과 cgroup 메모리 제한 중 작은 값"""
+    limits = []
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    limits.append(int(line.split()[1]) // 1024)
+    except OSError:
+        try:
+            limits.append(os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_AVPHYS_PAGES') // (1024 * 1024))
+        except (AttributeError, ValueError, OSError):
+            pass
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60:
+            limits.append(int(value) // (1024 * 1024))
+    return min(limits) if limits else None
+
+
+def probe():
+    """실행 환경을 조사해 dict 로 반환 (get_probe 를 통해 한 번만 부름)"""
+    started = time.time()
+    java = _java_command()
+    version, max_heap_mb, java_error = _probe_java(java)
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'java_path': java,
+        'java_version': version,
+        'java_ok': java_error is None,
+        'java_error': java_error,
+        'jvm_default_max_heap_mb': max_heap_mb,
+        'tabula_jar': _tabula_jar(),
+        'jpype': _jpype_version(),
+        'cpu_count': _cpu_count(),
+        'available_memory_mb': _available_memory_mb(),
+        'probe_seconds': round(time.time() - started, 3),
+    }
+
+
+def pool_settings(info, workers=None, memory_budget_mb=None):
+    """(워커 수, 전체 JVM 힙 예산 MB) - 지정하지 않은 값은 CPU 수와 사용 가능 메모리로 정함
+
+    예산은 사용 가능 메모리의 AUTO_BUDGET_FRACTION (AUTO_BUDGET_MAX_MB 이하),
+    워커 수는 CPU 수와 워커당 AUTO_WORKER_HEAP_MB 가 예산에 들어가는 개수 중 작은 값.
+    """
+    if memory_budget_mb is None:
+        memory = info.get('available_memory_mb')
+        memory_budget_mb = AUTO_BUDGET_MAX_MB
+        if memory:
+            memory_budget_mb = min(AUTO_BUDGET_MAX_MB, int(memory * AUTO_BUDGET_FRACTION))
+    if workers is None:
+        workers = min(AUTO_MAX_WORKERS, info.get('cpu_count') or 1, memory_budget_mb // AUTO_WORKER_HEAP_MB)
+    return max(1, workers), memory_budget_mb
+
+
+_probe = None
+_probe_lock = threading.Lock()
+
+
+def get_probe():
+    """프로세스 전역 실행 환경 점검 결과 (처음 부를 때 한 번만 조사)"""
+    global _probe
+    with _probe_lock:
+        if _probe is None:
+            _probe = probe()
+        return _probe
@@ -0,0 +1,122 @@
+"""작업 실행 순서 정하기 (모든 화면 세션과 API 요청이 함께 쓰는 대기열)
+
+작업 관리자는 서버 프로세스에 하나뿐이므로, 동시에 실행하는 작업 수(workers)와
+tabula 워커 풀의 JVM 힙 예산은 세션이 몇 개든 프로세스 전체에 한 번만 적용된다.
+이 모듈은 그 안에서 대기 중인 작업 가운데 다음에 실행할 작업을 고른다.
+
+    1. 지금 실행 중인 작업이 적은 사용자의 작업 먼저 (한 사용자가 실행 칸을 모두 차지하지 않게)
+    2. 짧은 작업(short_pages 페이지 이하) 먼저, 긴 작업도 max_wait 초 넘게 기다렸으면 같은 대우
+    3. 이번 대기열에서 처리한 페이지가 적은 사용자 먼저 (사용자의 작업이 모두 끝나면 0 부터 다시)
+    4. 먼저 제출한 작업 먼저
+
+대기열에 넣는 항목은 owner(사용자), cost(페이지 수), created(제출 시각) 속성을 가진다.
+"""
+import os
+import threading
+import time
+
+# 짧은 작업으로 보고 긴 작업보다 먼저 실행할 페이지 수, 긴 작업이 이 시간(초) 넘게
+# 기다리면 짧은 작업과 같은 순위로 올림 (환경 변수로 변경 가능)
+SHORT_JOB_PAGES = int(os.environ.get('PDF_EXTRACTOR_SHORT_JOB_PAGES', '20'))
+MAX_QUEUE_WAIT = float(os.environ.get('PDF_EXTRACTOR_MAX_QUEUE_WAIT', '300'))
+
+
+class FairScheduler:
+    """사용자별로 공평하게, 짧은 작업은 먼저 실행하는 대기열과 실행 스레드 workers 개"""
+
+    def __init__(self, run, workers, short_pages=SHORT_JOB_PAGES, max_wait=MAX_QUEUE_WAIT, name='pdf-job'):
+        self.run = run
+        self.workers = max(1, workers)
+        self.short_pages = short_pages
+        self.max_wait = max_wait
+        self._queued = []
+        # 사용자 → 실행 중인 작업 수, 이번 대기열에서 실행을 시작한 페이지 수
+        self._running = {}
+        self._served = {}
+        self._condition = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f'{name}_{index}', daemon=True)
+            for index in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item):
+        with self._condition:
+            self._queued.append(item)
+            self._condition.notify()
+
+    def discard(self, item):
+        """아직 시작하지 않은 항목을 대기열에서 뺌 (뺐으면 True)"""
+        with self._condition:
+            if item not in self._queued:
+                return False
+            self._queued.remove(item)
+            self._forget(item.owner)
+            return True
+
+    def position(self, item):
+        """대기 중인 항목의 실행 순서 (1 이면 다음 차례, 대기 중이 아니면 None)
+
+        지금 대기열에서 순서대로 고를 때의 순번이며, 나중에 들어온 짧은 작업이나 다른
+        사용자의 작업이 앞설 수 있다.
+        """
+        with self._condition:
+            if item not in self._queued:
+                return None
+            queued = list(self._queued)
+            running = dict(self._running)
+            served = dict(self._served)
+            now = time.time()
+            for number in range(1, len(queued) + 1):
+                chosen = min(queued, key=lambda other: self._rank(other, running, served, now))
+                if chosen is item:
+                    return number
+                queued.remove(chosen)
+                running[chosen.owner] = running.get(chosen.owner, 0) + 1
+                served[chosen.owner] = served.get(chosen.owner, 0) + chosen.cost
+        return None
+
+    def stats(self):
+        """(실행 중인 작업 수, 대기 중인 작업 수, 실행 칸 수)"""
+        with self._condition:
+            return sum(self._running.values()), len(self._queued), self.workers
+
+    def _rank(self, item, running, served, now):
+        urgent = item.cost <= self.short_pages or now - item.created >= self.max_wait
+        return (running.get(item.owner, 0), not urgent, served.get(item.owner, 0), item.created)
+
+    def _next(self):
+        """다음에 실행할 항목 (대기열이 빌 동안 기다림)"""
+        with self._condition:
+            while not self._queued:
+                self._condition.wait()
+            now = time.time()
+            item = min(self._queued, key=lambda queued: self._rank(queued, self._running, self._served, now))
+            self._queued.remove(item)
+            self._running[item.owner] = self._running.get(item.owner, 0) + 1
+            self._served[item.owner] = self._served.get(item.owner, 0) + item.cost
+            return item
+
+    def _finished(self, item):
+        with self._condition:
+            self._running[item.owner] -= 1
+            if not self._running[item.owner]:
+                del self._running[item.owner]
+            self._forget(item.owner)
+
+    def _forget(self, owner):
+        # 대기·실행 중인 작업이 없는 사용자는 처리한 페이지 수를 지워 다음에 불리하지 않게 함
+        if owner not in self._running and all(queued.owner != owner for queued in self._queued):
+            self._served.pop(owner, None)
+
+    def _loop(self):
+        while True:
+            item = self._next()
+            try:
+                self.run(item)
+            except Exception:
+                # run 은 작업 상태에 오류를 남기므로 여기서는 실행 스레드만 살려 둠
+                pass
+            finally:
+                self._finished(item)
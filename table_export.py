@@ -0,0 +1,190 @@
+"""모든 표를 하나로 합친 "long" 형식 내보내기
+
+표마다 시트를 만드는 대신 모든 표를 한 표로 이어 붙이고, 각 행에 page, table_index,
+row_index 열을 붙인다. 목차(index)에는 표마다 합친 표 안의 행 범위를 남겨, 받는 쪽에서
+표 하나를 읽을 때도 한 번 읽은 뒤 잘라 쓰면 된다. XLSX 한 파일(목차 + 표 시트),
+CSV/Parquet 묶음(zip), 또는 합친 표 하나를 Parquet·Feather·Arrow IPC 파일로 내보낸다.
+Arrow 계열 형식은 pyarrow 가 필요하다.
+"""
+import io
+import os
+import tempfile
+import zipfile
+
+import pandas as pd
+
+import excel_export
+
+# 합친 표 앞에 붙는 열
+KEY_COLUMNS = ['page', 'table_index', 'row_index']
+
+# XLSX 한 시트의 최대 행 수 (머리글 포함)
+EXCEL_MAX_ROWS = 1048576
+
+
+def iter_tables(results):
+    """표를 찾은 페이지의 비어 있지 않은 표를 (페이지, 페이지 안 표 번호, 표) 로 순서대로"""
+    for result in list(results):
+        if not result.strategy or result.error:
+            continue
+        for table_index, df in enumerate(result.tables, start=1):
+            if not df.empty:
+                yield result.page, table_index, df
+
+
+def _keyed_frame(page, table_index, df):
+    """표 앞에 page/table_index/row_index 열을 붙인 사본 (열 이름은 문자열로 통일)"""
+    columns = []
+    for column in df.columns:
+        name = str(column)
+        # 표 머리글이 page 같은 열 이름과 겹치면 뒤에 _ 를 붙여 구분
+        while name in KEY_COLUMNS or name in columns:
+            name += '_'
+        columns.append(name)
+    frame = df.copy()
+    frame.columns = columns
+    frame.insert(0, 'row_index', range(len(frame)))
+    frame.insert(0, 'table_index', table_index)
+    frame.insert(0, 'page', page)
+    return frame
+
+
+def long_frames(results):
+    """(합친 표, 목차) DataFrame
+
+    합친 표의 열은 모든 표 머리글의 합집합이며, 표에 없는 열은 비어 있다.
+    목차의 start_row/end_row 는 합친 표 안의 위치(0부터, end_row 는 포함하지 않음),
+    excel_first_row/excel_last_row 는 XLSX 의 tables 시트 행 번호다.
+    """
+    frames = []
+    index = []
+    offset = 0
+    for page, table_index, df in iter_tables(results):
+        frames.append(_keyed_frame(page, table_index, df))
+        index.append({
+            'page': page,
+            'table_index': table_index,
+            'rows': len(df),
+            'columns': len(df.columns),
+            'start_row': offset,
+            'end_row': offset + len(df),
+            'excel_first_row': offset + 2,
+            'excel_last_row': offset + len(df) + 1,
+        })
+        offset += len(df)
+
+    if not frames:
+        return pd.DataFrame(columns=KEY_COLUMNS), pd.DataFrame(index)
+    return pd.concat(frames, ignore_index=True, sort=False), pd.DataFrame(index)
+
+
+def long_excel(results):
+    """목차 시트(index)와 합친 표 시트(tables) 두 장을 쓴 ExcelExport (표가 없으면 None)"""
+    table, index = long_frames(results)
+    if index.empty:
+        return None
+    if len(table) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"합친 표가 {len(table)}행으로 XLSX 한 시트에 들어가지 않습니다. CSV/Parquet 묶음을 사용하세요.")
+    export = excel_export.ExcelExport()
+    export.add_sheet('index', index)
+    export.add_sheet('tables', table)
+    return export
+
+
+def write_long_excel(results, path):
+    """long 형식 XLSX 를 경로에 저장 (표가 없으면 None)"""
+    export = long_excel(results)
+    return export.save(path) if export is not None else None
+
+
+def _arrow_frame(table):
+    """Arrow 로 바꿀 수 있게 정리한 합친 표 (여러 표에서 값 종류가 섞인 열은 문자열로)"""
+    table = table.copy()
+    for column in table.columns[len(KEY_COLUMNS):]:
+        if table[column].dtype == object:
+            table[column] = table[column].astype('string')
+    return table
+
+
+def _parquet_bytes(table):
+    """합친 표를 Parquet 으로"""
+    output = io.BytesIO()
+    _arrow_frame(table).to_parquet(output, index=False)
+    return output.getvalue()
+
+
+def _atomic_write(path, write):
+    """write(파일 객체) 로 저장 (경로면 임시 이름으로 쓴 뒤 이름을 바꿔 반쯤 쓴 파일이 보이지 않게 함)"""
+    if not isinstance(path, (str, os.PathLike)):
+        write(path)
+        return path
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, staging = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            write(f)
+        os.replace(staging, path)
+    except BaseException:
+        if os.path.exists(staging):
+            os.remove(staging)
+        raise
+    return path
+
+
+def write_bundle(results, path):
+    """합친 표(tables.csv, tables.parquet)와 목차(index.csv)를 zip 으로 저장 (표가 없으면 None)
+
+    path 에는 파일 경로나 쓰기 가능한 파일 객체를 줄 수 있다. pyarrow 가 없으면
+    tables.parquet 은 빠진다.
+    """
+    table, index = long_frames(results)
+    if index.empty:
+        return None
+
+    def write(f):
+        with zipfile.ZipFile(f, 'w', compression=zipfile.ZIP_DEFLATED) as bundle:
+            # 엑셀에서 바로 열어도 한글이 깨지지 않도록 BOM 포함
+            bundle.writestr('index.csv', index.to_csv(index=False).encode('utf-8-sig'))
+            bundle.writestr('tables.csv', table.to_csv(index=False).encode('utf-8-sig'))
+            try:
+                bundle.writestr('tables.parquet', _parquet_bytes(table))
+            except ImportError:
+                pass
+
+    return _atomic_write(path, write)
+
+
+def write_parquet(results, path):
+    """합친 표를 Parquet 파일로 저장 (표가 없으면 None)"""
+    table, index = long_frames(results)
+    if index.empty:
+        return None
+    return _atomic_write(path, lambda f: _arrow_frame(table).to_parquet(f, index=False))
+
+
+def write_feather(results, path):
+    """합친 표를 Feather(Arrow IPC 파일, 압축) 파일로 저장 (표가 없으면 None)"""
+    table, index = long_frames(results)
+    if index.empty:
+        return None
+    return _atomic_write(path, lambda f: _arrow_frame(table).to_feather(f))
+
+
+def write_arrow(results, path):
+    """합친 표를 압축하지 않은 Arrow IPC 파일로 저장 (표가 없으면 None)
+
+    메모리 매핑으로 바로 열 수 있어 pyarrow.ipc.open_file / pyarrow.memory_map 으로
+    읽으면 복사 없이 열을 쓸 수 있다.
+    """
+    table, index = long_frames(results)
+    if index.empty:
+        return None
+    import pyarrow as pa
+
+    arrow_table = pa.Table.from_pandas(_arrow_frame(table), preserve_index=False)
+
+    def write(f):
+        with pa.ipc.new_file(f, arrow_table.schema) as writer:
+            writer.write_table(arrow_table)
+
+    return _atomic_write(path, write)
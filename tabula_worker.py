@@ -0,0 +1,586 @@
+"""상주 tabula 추출 워커
+
+tabula.read_pdf 를 호출할 때마다 java 프로세스를 새로 띄우지 않도록,
+서버 프로세스당 한 번 JVM 을 띄워 두고 모든 세션의 요청을 여기로 보낸다.
+워커를 여러 개 띄우면 페이지 구간을 나눠 병렬로 추출하며, 각 워커의 힙은
+전체 메모리 예산을 워커 수로 나눈 만큼으로 제한한다.
+JVM 은 별도의 워커 프로세스 안에서 jpype 로 실행되며, 워커가 죽으면
+다음 요청 때 자동으로 다시 띄운다.
+
+Streamlit 은 앱 스크립트를 __main__ 으로 실행하므로 multiprocessing 의 spawn 을
+쓰면 자식 프로세스가 앱 스크립트를 다시 실행한다. 그래서 워커는 이 파일을
+직접 실행하는 하위 프로세스로 띄우고, 표준 입출력으로 pickle 메시지를 주고받는다.
+페이지별 추출 결과의 표는 DataFrame 을 pickle 하지 않고 Arrow IPC 스트림 바이트로
+보내므로, 문자열 열도 값마다 직렬화하지 않고 버퍼 하나로 넘어간다.
+
+워커는 구간의 페이지를 하나 끝낼 때마다 결과를 보내고, 페이지마다 시간 제한(PAGE_TIMEOUT)을
+둔다. 다음 페이지 결과가 제한 안에 오지 않거나 작업이 취소되면(CancelToken) 응답을 기다리지
+않고 워커 프로세스를 종료해 JVM 과 힙을 바로 돌려준다. 워커는 다음 요청 때 다시 뜬다.
+멈춘 페이지만 시간 초과로 표시하고, 이미 받은 페이지는 그대로 두고 남은 페이지만 이어서
+추출한다.
+"""
+import atexit
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import runtime_probe
+import tracing
+
+# 워커 JVM 옵션 (JVM 기동 시 한 번만 적용됨, 힙 크기는 워커 수에 따라 따로 붙임)
+JAVA_OPTIONS = ['-Dfile.encoding=UTF8']
+
+# 워커 프로세스 수와 전체 JVM 힙 예산 (워커마다 예산 / 워커 수 만큼 힙을 받음)
+# 환경 변수를 비워 두면 runtime_probe 가 CPU 수와 사용 가능 메모리로 정함
+POOL_SIZE = int(os.environ['TABULA_WORKERS']) if os.environ.get('TABULA_WORKERS') else None
+MEMORY_BUDGET_MB = (
+    int(os.environ['TABULA_MEMORY_BUDGET_MB']) if os.environ.get('TABULA_MEMORY_BUDGET_MB') else None
+)
+MIN_HEAP_MB = 256
+
+# 페이지 하나에 주는 tabula 시간 제한(초), 구간을 보내도 페이지 결과가 올 때마다 다시 잼
+# (환경 변수로 변경 가능, 0 이면 제한 없음)
+PAGE_TIMEOUT = float(os.environ.get('PDF_EXTRACTOR_PAGE_TIMEOUT', '120'))
+
+# 응답을 기다리는 동안 시간 제한과 취소를 확인하는 간격(초)
+POLL_INTERVAL = 0.2
+
+# JVM 예열용 빈 1페이지 PDF
+_BLANK_PDF = (
+    b"%PDF-1.4\n"
+    b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+    b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+    b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n"
+    b"trailer<</Root 1 0 R>>\n"
+    b"%%EOF\n"
+)
+
+
+class TabulaWorkerError(Exception):
+    """워커 안에서 발생한 추출 오류"""
+
+
+class TabulaTimeout(TabulaWorkerError):
+    """시간 제한 안에 끝나지 않아 워커를 종료한 추출"""
+
+
+class ExtractionCancelled(Exception):
+    """작업이 취소되었거나 작업 전체 시간 제한을 넘어 추출을 멈춤"""
+
+
+class CancelToken:
+    """작업 하나의 취소 요청과 작업 전체 마감 시각 (여러 스레드에서 함께 확인)"""
+
+    def __init__(self):
+        self.reason = None
+        self.limit = None
+        self.deadline = None
+        self._event = threading.Event()
+
+    def start(self, limit):
+        """지금부터 limit 초를 작업 전체 시간 제한으로 (0 이나 None 이면 제한 없음)"""
+        if limit:
+            self.limit = limit
+            self.deadline = time.time() + limit
+
+    def cancel(self, reason="작업을 취소했습니다."):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        """취소됐거나 마감을 넘었으면 ExtractionCancelled"""
+        if self.deadline is not None and not self._event.is_set() and time.time() >= self.deadline:
+            self.cancel(f"작업 시간 제한({self.limit:.0f}초)을 넘었습니다.")
+        if self._event.is_set():
+            raise ExtractionCancelled(self.reason)
+
+
+def page_timeout(limit=PAGE_TIMEOUT):
+    """페이지 결과 하나를 기다리는 시간 제한(초), 제한이 없으면 None"""
+    return limit if limit and limit > 0 else None
+
+
+def _warm_up(java_options):
+    """빈 PDF 를 한 번 읽어 JVM 과 tabula 클래스를 미리 적재"""
+    import tabula
+
+    fd, path = tempfile.mkstemp(suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(_BLANK_PDF)
+        tabula.read_pdf(path, pages='1', silent=True, java_options=list(java_options))
+    except Exception:
+        # 예열 실패는 무시하고 실제 요청에서 오류를 보고
+        pass
+    finally:
+        os.unlink(path)
+
+
+def _jvm_resident():
+    """jpype 로 JVM 이 이 프로세스 안에 떠 있는지 확인"""
+    try:
+        import jpype
+    except ImportError:
+        return False
+    return jpype.isJVMStarted()
+
+
+def _extraction_method(lattice, stream, guess):
+    """tabula-java CommandLineApp 과 같은 규칙으로 추출 방식 결정"""
+    if lattice:
+        return 'spreadsheet'
+    if stream or guess:
+        return 'basic'
+    return 'decide'
+
+
+def _extract_java_pages(file_path, pages, lattice=False, stream=False, guess=True):
+    """상주 JVM 에서 문서를 한 번만 열고 페이지마다 (페이지, tabula-java JSON 형태의 표) 를 내놓음"""
+    import jpype.imports  # noqa: F401
+    from java.io import File
+    from org.apache.pdfbox.pdmodel import PDDocument
+    from technology.tabula import ObjectExtractor
+    from technology.tabula.detectors import NurminenDetectionAlgorithm
+    from technology.tabula.extractors import BasicExtractionAlgorithm, SpreadsheetExtractionAlgorithm
+
+    method = _extraction_method(lattice, stream, guess)
+    basic = BasicExtractionAlgorithm()
+    spreadsheet = SpreadsheetExtractionAlgorithm()
+
+    document = PDDocument.load(File(file_path))
+    try:
+        extractor = ObjectExtractor(document)
+        for page_number in pages:
+            page = extractor.extract(int(page_number))
+            page_method = method
+            if page_method == 'decide':
+                page_method = 'spreadsheet' if spreadsheet.isTabular(page) else 'basic'
+
+            if page_method == 'spreadsheet':
+                tables = list(spreadsheet.extract(page))
+            elif guess:
+                tables = []
+                for area in NurminenDetectionAlgorithm().detect(page):
+                    tables.extend(basic.extract(page.getArea(area)))
+            else:
+                tables = list(basic.extract(page))
+
+            yield page_number, [
+                {'data': [[{'text': str(cell.getText())} for cell in row] for row in table.getRows()]}
+                for table in tables
+            ]
+    finally:
+        document.close()
+
+
+def _encode_table(df):
+    """표를 Arrow IPC 스트림 바이트로 (pyarrow 가 없거나 Arrow 로 바꿀 수 없는 표는 DataFrame 그대로)"""
+    try:
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return ('arrow', sink.getvalue().to_pybytes())
+    except Exception:
+        # 열 이름 중복, 한 열에 숫자와 문자열이 섞인 경우 등
+        return ('frame', df)
+
+
+def _decode_table(encoded):
+    """_encode_table 의 결과를 DataFrame 으로 (Arrow 버퍼는 복사 없이 감싸서 읽음)"""
+    kind, payload = encoded
+    if kind == 'arrow':
+        import pyarrow as pa
+
+        return pa.ipc.open_stream(pa.py_buffer(payload)).read_pandas()
+    return payload
+
+
+def _read_pages(file_path, pages, java_options, pandas_options=None, **kwargs):
+    """페이지 범위를 한 번의 실행으로 추출하며 페이지가 끝나는 대로 (페이지, [DataFrame]) 를 내놓음"""
+    import tabula
+    from tabula.io import _extract_from
+
+    if _jvm_resident():
+        raw_pages = _extract_java_pages(file_path, pages, **kwargs)
+    else:
+        # subprocess 모드에서는 tabula-java 가 페이지 번호를 돌려주지 않으므로 페이지 단위로 실행
+        raw_pages = (
+            (page, tabula.read_pdf(
+                file_path,
+                pages=str(page),
+                output_format='json',
+                java_options=java_options,
+                **kwargs
+            ))
+            for page in pages
+        )
+
+    # 페이지 단위 호출과 같은 결과가 나오도록 tabula-py 의 DataFrame 변환을 그대로 사용
+    for page, tables in raw_pages:
+        yield page, _extract_from(tables, dict(pandas_options or {}))
+
+
+def _worker_main(java_options):
+    """워커 프로세스 본체: 요청을 받아 tabula 추출을 실행"""
+    # 프로토콜용 입출력을 따로 잡아 두고, JVM 과 라이브러리 출력은 stderr 로 보냄
+    reader = os.fdopen(os.dup(0), 'rb')
+    writer = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    import tabula
+
+    _warm_up(java_options)
+    # 예열이 끝났음을 알림 (JVM 기동 시간이 요청의 시간 제한에 들어가지 않게)
+    pickle.dump(('ready', None), writer, protocol=pickle.HIGHEST_PROTOCOL)
+    writer.flush()
+    while True:
+        try:
+            request = pickle.load(reader)
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+
+        kind, file_path, kwargs = request
+        # 상주 JVM 에는 옵션이 이미 적용되어 있으므로 subprocess 모드일 때만 전달
+        options = None if _jvm_resident() else list(java_options)
+        try:
+            if kind != 'pages':
+                raise ValueError(f"알 수 없는 요청: {kind}")
+            # 페이지가 끝날 때마다 보내 받는 쪽이 페이지마다 시간 제한을 잴 수 있게 함
+            for page, tables in _read_pages(file_path, java_options=options, **kwargs):
+                pickle.dump(('page', (page, [_encode_table(df) for df in tables])), writer,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+                writer.flush()
+            response = ('ok', None)
+        except Exception as e:
+            response = ('error', f"{type(e).__name__}: {e}")
+        pickle.dump(response, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        writer.flush()
+
+
+class TabulaWorker:
+    """JVM 을 품은 상주 워커 프로세스 핸들"""
+
+    def __init__(self, java_options=None):
+        self.java_options = list(java_options or JAVA_OPTIONS + ['-Xmx4g'])
+        self._lock = threading.Lock()
+        self._process = None
+        self._ready = False
+        self.restarts = 0
+        # 띄운 워커 프로세스 수와 보낸 추출 요청 수 (벤치마크에서 JVM 기동 횟수를 셀 때 사용)
+        self.launches = 0
+        self.requests = 0
+        self.timeouts = 0
+
+    def start(self):
+        """워커 프로세스 시작 (이미 살아 있으면 그대로 둠)"""
+        if self.is_alive():
+            return
+        if self._process is not None:
+            self.restarts += 1
+        self._close()
+        self.launches += 1
+        self._ready = False
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), *self.java_options],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def is_alive(self):
+        return self._process is not None and self._process.poll() is None
+
+    def _close(self):
+        """끊어진 파이프와 죽은 프로세스 정리"""
+        if self._process is None:
+            return
+        for stream in (self._process.stdin, self._process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait(timeout=5)
+        self._process = None
+
+    def stop(self):
+        """워커 프로세스 종료"""
+        with self._lock:
+            if self.is_alive():
+                try:
+                    pickle.dump(None, self._process.stdin)
+                    self._process.stdin.flush()
+                    self._process.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self._close()
+
+    def read_pdf_pages(self, file_path, pages, timeout=None, cancel=None, results=None, **kwargs):
+        """여러 페이지를 한 번의 tabula 실행으로 추출해 {페이지: [DataFrame]} 으로 반환
+
+        timeout 은 페이지 하나의 시간 제한으로, 다음 페이지 결과가 timeout 초 안에 오지 않으면
+        TabulaTimeout, cancel 이 취소되면 ExtractionCancelled (두 경우 모두 워커 프로세스를
+        종료함). results 에 dict 를 주면 끝난 페이지를 받는 대로 넣으므로 예외가 나도 그때까지
+        추출한 페이지는 남는다.
+        """
+        results = {} if results is None else results
+        kwargs['pages'] = [int(page) for page in pages]
+
+        def received(payload):
+            page, tables = payload
+            results[page] = [_decode_table(table) for table in tables]
+
+        self._request('pages', file_path, kwargs, timeout, cancel, received)
+        return results
+
+    def _receive(self, timeout=None, cancel=None):
+        """응답을 기다림 (시간 제한을 넘거나 취소되면 워커를 종료하고 예외)"""
+        if timeout is None and cancel is None:
+            return pickle.load(self._process.stdout)
+
+        outcome = {}
+        stdout = self._process.stdout
+
+        def read():
+            try:
+                outcome['response'] = pickle.load(stdout)
+            except BaseException as e:
+                outcome['error'] = e
+
+        reader = threading.Thread(target=read, name='tabula-reply', daemon=True)
+        reader.start()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            reader.join(POLL_INTERVAL)
+            if not reader.is_alive():
+                break
+            stop = None
+            if cancel is not None:
+                try:
+                    cancel.check()
+                except ExtractionCancelled as e:
+                    stop = e
+            if stop is None and deadline is not None and time.monotonic() >= deadline:
+                self.timeouts += 1
+                stop = TabulaTimeout(f"시간 초과: {timeout:g}초 안에 끝나지 않아 tabula 워커를 종료했습니다.")
+            if stop is not None:
+                # 먼저 프로세스를 죽여 읽던 스레드가 EOF 로 빠져나오게 한 뒤 파이프 정리
+                self._process.kill()
+                reader.join()
+                self._close()
+                # _close 가 _process 를 비우므로 다음 start 대신 여기서 재시작으로 셈
+                self.restarts += 1
+                raise stop
+        if 'error' in outcome:
+            raise outcome['error']
+        return outcome['response']
+
+    def _request(self, kind, file_path, kwargs, timeout=None, cancel=None, received=None):
+        """워커에 요청을 보내고 응답을 기다림 (페이지별 결과는 오는 대로 received 로 넘김)"""
+        request = (kind, os.path.abspath(file_path), kwargs)
+        with self._lock:
+            self.requests += 1
+            # 워커가 죽어 있으면 다시 띄우고, 요청 도중 죽으면 한 번만 재시도
+            for attempt in range(2):
+                if cancel is not None:
+                    cancel.check()
+                self.start()
+                try:
+                    if not self._ready:
+                        # 새로 띄운 워커는 예열 완료 신호를 받은 뒤부터 시간 제한을 잼
+                        self._receive(None, cancel)
+                        self._ready = True
+                    pickle.dump(request, self._process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+                    self._process.stdin.flush()
+                    status, payload = self._receive(timeout, cancel)
+                    while status == 'page':
+                        received(payload)
+                        status, payload = self._receive(timeout, cancel)
+                    break
+                except (EOFError, OSError, pickle.UnpicklingError):
+                    self._close()
+                    self.restarts += 1
+                    if attempt == 1:
+                        raise TabulaWorkerError("tabula 워커가 비정상 종료되었습니다.")
+
+        if status == 'error':
+            raise TabulaWorkerError(payload)
+        return payload
+
+
+def heap_per_worker(workers, budget_mb):
+    """전체 메모리 예산을 워커 수로 나눈 워커당 힙 크기 (MB)"""
+    return max(MIN_HEAP_MB, budget_mb // max(1, workers))
+
+
+def _chunk_pages(pages, chunks):
+    """페이지 목록을 순서를 유지한 채 연속 구간으로 나눔"""
+    pages = list(pages)
+    size, extra = divmod(len(pages), chunks)
+    result, start = [], 0
+    for i in range(chunks):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            result.append(pages[start:end])
+        start = end
+    return result
+
+
+class WorkerPool:
+    """상주 워커 여러 개를 묶어 페이지 구간을 병렬로 나눠 추출"""
+
+    def __init__(self, size=POOL_SIZE, memory_budget_mb=MEMORY_BUDGET_MB):
+        if size is None or memory_budget_mb is None:
+            size, memory_budget_mb = runtime_probe.pool_settings(
+                runtime_probe.get_probe(), size, memory_budget_mb
+            )
+        self.size = max(1, size)
+        self.memory_budget_mb = memory_budget_mb
+        self.heap_mb = heap_per_worker(self.size, memory_budget_mb)
+        java_options = JAVA_OPTIONS + [f'-Xmx{self.heap_mb}m']
+        self.workers = [TabulaWorker(java_options) for _ in range(self.size)]
+        self._idle = queue.Queue()
+        for worker in self.workers:
+            self._idle.put(worker)
+
+    def start(self):
+        """모든 워커 프로세스 시작 (JVM 예열)"""
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    @property
+    def restarts(self):
+        return sum(worker.restarts for worker in self.workers)
+
+    @property
+    def launches(self):
+        return sum(worker.launches for worker in self.workers)
+
+    @property
+    def requests(self):
+        return sum(worker.requests for worker in self.workers)
+
+    @property
+    def timeouts(self):
+        return sum(worker.timeouts for worker in self.workers)
+
+    @contextmanager
+    def worker(self, cancel=None):
+        """쉬고 있는 워커 하나를 빌려 씀 (모두 바쁘면 기다리되, 그동안 취소되면 ExtractionCancelled)"""
+        if cancel is None:
+            worker = self._idle.get()
+        else:
+            while True:
+                cancel.check()
+                try:
+                    worker = self._idle.get(timeout=POLL_INTERVAL)
+                    break
+                except queue.Empty:
+                    pass
+        try:
+            yield worker
+        finally:
+            self._idle.put(worker)
+
+    def _read_traced(self, worker, file_path, pages, kwargs, trace, cancel, results, retry=False):
+        """워커 하나의 tabula 실행을 구간으로 남기며 추출해 results 에 넣음 (페이지마다 시간 제한)"""
+        with tracing.span(trace, 'tabula', pages=pages, worker=self.workers.index(worker)) as span:
+            if retry:
+                span.set(retry=True)
+            worker.read_pdf_pages(file_path, pages, timeout=page_timeout(), cancel=cancel, results=results, **kwargs)
+            span.set(tables=sum(len(results[page]) for page in pages if page in results))
+
+    def _read_chunk(self, file_path, pages, kwargs, trace=None, cancel=None):
+        """한 구간을 한 워커에서 추출하고, 실패하면 결과가 없는 페이지만 같은 워커에서 이어서 추출
+
+        워커는 페이지 순서대로 결과를 보내므로 실패한 페이지는 결과가 없는 첫 페이지이며, 그
+        페이지만 오류(시간 초과면 시간 초과 페이지)로 남긴다. (결과, 오류, 실행 횟수, 시간 초과
+        페이지) 를 반환한다. 취소는 다시 시도하지 않고 그대로 올린다.
+        """
+        results, errors, runs, timed_out = {}, {}, 0, set()
+        remaining = list(pages)
+        with self.worker(cancel) as worker:
+            while remaining:
+                runs += 1
+                try:
+                    self._read_traced(worker, file_path, remaining, kwargs, trace, cancel, results, retry=runs > 1)
+                    break
+                except ExtractionCancelled:
+                    raise
+                except Exception as e:
+                    missing = [page for page in remaining if page not in results]
+                    if not missing:
+                        break
+                    errors[missing[0]] = str(e)
+                    if isinstance(e, TabulaTimeout):
+                        timed_out.add(missing[0])
+                    remaining = missing[1:]
+        return results, errors, runs, timed_out
+
+    def map_pages(self, file_path, pages, trace=None, cancel=None, **kwargs):
+        """페이지를 워커 수만큼 구간으로 나눠 병렬 추출
+
+        ({페이지: [DataFrame]}, {페이지: 오류 메시지}, tabula 실행 횟수, 시간 초과 페이지 집합) 을
+        반환하며, 결과는 요청한 페이지 순서대로 다시 합친다. trace 를 주면 워커별 tabula
+        실행을 구간으로 남기고, cancel(CancelToken) 이 취소되면 진행 중인 실행을 멈추고
+        ExtractionCancelled 를 낸다.
+        """
+        pages = list(pages)
+        chunks = _chunk_pages(pages, min(self.size, len(pages))) if pages else []
+        if len(chunks) <= 1:
+            outcomes = [self._read_chunk(file_path, chunk, kwargs, trace, cancel) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+                outcomes = list(executor.map(
+                    lambda chunk: self._read_chunk(file_path, chunk, kwargs, trace, cancel), chunks
+                ))
+
+        merged, errors, runs, timed_out = {}, {}, 0, set()
+        for chunk_results, chunk_errors, chunk_runs, chunk_timed_out in outcomes:
+            merged.update(chunk_results)
+            errors.update(chunk_errors)
+            runs += chunk_runs
+            timed_out |= chunk_timed_out
+        ordered = {page: merged[page] for page in pages if page in merged}
+        return ordered, errors, runs, timed_out
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """프로세스 전역 워커 풀을 반환 (없으면 만들어 예열 시작)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool()
+            _pool.start()
+            atexit.register(_pool.stop)
+        return _pool
+
+
+if __name__ == '__main__':
+    _worker_main(sys.argv[1:])
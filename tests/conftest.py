@@ -0,0 +1,45 @@
+"""테스트 공용 준비물 (저장소 최상위 모듈을 가져오고, 보관소·작업 관리자를 임시 디렉토리로 바꿈)"""
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jobs  # noqa: E402
+import upload_spool  # noqa: E402
+
+
+@pytest.fixture
+def spool(tmp_path, monkeypatch):
+    """임시 디렉토리의 업로드 보관소를 전역 보관소로 사용"""
+    spool = upload_spool.UploadSpool(str(tmp_path / 'uploads'), lease=60)
+    monkeypatch.setattr(upload_spool, '_spool', spool)
+    return spool
+
+
+@pytest.fixture
+def make_pdf(tmp_path):
+    """빈 페이지 pages 개짜리 PDF 를 만들어 경로 반환"""
+    def make(name='sample.pdf', pages=1):
+        import PyPDF2
+        writer = PyPDF2.PdfWriter()
+        for _ in range(pages):
+            writer.add_blank_page(width=200, height=200)
+        path = tmp_path / name
+        with open(path, 'wb') as f:
+            writer.write(f)
+        return str(path)
+    return make
+
+
+@pytest.fixture
+def manager(tmp_path, spool, monkeypatch):
+    """추출을 실행하지 않고 끝날 때까지 멈춰 있는 작업 관리자 (tabula 워커를 띄우지 않음)"""
+    release = threading.Event()
+    monkeypatch.setattr(jobs, '_run', lambda job, excel_path: release.wait(10))
+    manager = jobs.JobManager(workers=1, job_dir=str(tmp_path / 'jobs'), queue_limit=10, user_limit=2)
+    monkeypatch.setattr(jobs, '_manager', manager)
+    yield manager
+    release.set()
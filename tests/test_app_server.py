@@ -0,0 +1,111 @@
+"""app_server 의 제출 검사 (경로 제출 제한, JSON 필드 형식, 접속 주소별 작업 수 제한)"""
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+import app_server
+
+
+def _post_jobs(*bodies):
+    """POST /jobs 를 차례로 보내고 (상태 코드, 본문) 목록 반환"""
+    async def run():
+        responses = []
+        async with TestClient(TestServer(app_server.create_app(warm_up=False))) as client:
+            for body in bodies:
+                if isinstance(body, (str, bytes)):
+                    response = await client.post('/jobs', data=body, headers={'Content-Type': 'application/json'})
+                else:
+                    response = await client.post('/jobs', json=body)
+                responses.append((response.status, await response.text()))
+        return responses
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def path_root(tmp_path, monkeypatch):
+    root = tmp_path / 'pdfs'
+    root.mkdir()
+    monkeypatch.setattr(app_server, 'PATH_ROOT', str(root))
+    return root
+
+
+def test_check_path_disabled_without_root(monkeypatch, make_pdf):
+    monkeypatch.setattr(app_server, 'PATH_ROOT', '')
+    with pytest.raises(web.HTTPForbidden):
+        app_server._check_path(make_pdf())
+
+
+def test_check_path_inside_root(path_root):
+    pdf = path_root / 'a.pdf'
+    pdf.write_bytes(b'%PDF-1.4')
+    assert app_server._check_path(str(pdf)) == str(pdf.resolve())
+
+
+def test_check_path_rejects_outside_root(path_root, make_pdf):
+    with pytest.raises(web.HTTPForbidden):
+        app_server._check_path(make_pdf('outside.pdf'))
+    with pytest.raises(web.HTTPForbidden):
+        app_server._check_path(str(path_root / '..' / 'outside.pdf'))
+
+
+def test_check_path_rejects_symlink_out_of_root(path_root, make_pdf):
+    link = path_root / 'link.pdf'
+    link.symlink_to(make_pdf('outside.pdf'))
+    with pytest.raises(web.HTTPForbidden):
+        app_server._check_path(str(link))
+
+
+def test_check_path_requires_existing_pdf(path_root):
+    with pytest.raises(web.HTTPBadRequest):
+        app_server._check_path(str(path_root / 'notes.txt'))
+    with pytest.raises(web.HTTPBadRequest):
+        app_server._check_path('')
+    with pytest.raises(web.HTTPNotFound):
+        app_server._check_path(str(path_root / 'missing.pdf'))
+
+
+def test_path_submission_forbidden_by_default(spool, monkeypatch, make_pdf):
+    monkeypatch.setattr(app_server, 'PATH_ROOT', '')
+    [(status, _)] = _post_jobs({'path': make_pdf()})
+    assert status == 403
+
+
+@pytest.mark.parametrize('body', [
+    'not json',
+    '[1, 2]',
+    {'path': 5},
+    {'path': ['a.pdf']},
+])
+def test_malformed_body_is_bad_request(spool, path_root, body):
+    [(status, _)] = _post_jobs(body)
+    assert status == 400
+
+
+@pytest.mark.parametrize('fields', [
+    {'kind': 5},
+    {'kind': 'images'},
+    {'kind': 'info', 'text_backend': 3},
+    {'user': {'name': 'x'}},
+    {'start_page': 'one'},
+    {'start_page': 3, 'end_page': 2},
+])
+def test_wrong_field_is_bad_request(spool, path_root, fields):
+    pdf = path_root / 'a.pdf'
+    pdf.write_bytes(b'%PDF-1.4')
+    [(status, text)] = _post_jobs({'path': str(pdf), **fields})
+    assert status == 400, text
+
+
+def test_user_limit_keyed_on_client_address(spool, manager, path_root, make_pdf):
+    path = make_pdf('pdfs/doc.pdf', pages=5)
+    # 요청마다 user 를 바꿔도 같은 접속 주소의 작업으로 셈
+    responses = _post_jobs(*[
+        {'path': path, 'start_page': page, 'end_page': page, 'user': f'user-{page}'}
+        for page in (1, 2, 3)
+    ])
+    assert [status for status, _ in responses] == [202, 202, 429]
+    owners = {job.owner for job in manager._jobs.values()}
+    assert len(owners) == 1 and owners.pop().startswith('api:')
+    assert any('user-1' in message for job in manager._jobs.values() for message in job.messages)
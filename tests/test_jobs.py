@@ -0,0 +1,42 @@
+"""JobManager 의 대기열 상한 (전체, 사용자별)"""
+import pytest
+
+import jobs
+
+
+def _submit(manager, path, page, owner):
+    return manager.submit(jobs.TABLES, path, [page], {'auto': False}, owner=owner)
+
+
+def test_user_limit_per_owner(manager, make_pdf):
+    path = make_pdf(pages=5)
+    _submit(manager, path, 1, 'alice')
+    _submit(manager, path, 2, 'alice')
+    with pytest.raises(jobs.JobQueueFull):
+        _submit(manager, path, 3, 'alice')
+    # 다른 사용자는 그대로 제출할 수 있음
+    _submit(manager, path, 3, 'bob')
+
+
+def test_same_request_returns_existing_job(manager, make_pdf):
+    path = make_pdf(pages=2)
+    first = _submit(manager, path, 1, 'alice')
+    assert _submit(manager, path, 1, 'alice') is first
+    assert manager.load() == (1, manager.queue_limit)
+
+
+def test_cancelled_job_frees_user_slot(manager, make_pdf):
+    path = make_pdf(pages=5)
+    _submit(manager, path, 1, 'alice')
+    queued = _submit(manager, path, 2, 'alice')
+    assert manager.cancel(queued.id)
+    _submit(manager, path, 3, 'alice')
+
+
+def test_queue_limit(manager, make_pdf):
+    manager.queue_limit = 2
+    path = make_pdf(pages=5)
+    _submit(manager, path, 1, 'alice')
+    _submit(manager, path, 2, 'bob')
+    with pytest.raises(jobs.JobQueueFull):
+        _submit(manager, path, 3, 'carol')
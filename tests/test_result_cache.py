@@ -0,0 +1,82 @@
+"""ResultCache 의 저장·조회, 크기 상한 삭제, 저장 실패 처리"""
+import os
+import time
+
+import pandas as pd
+
+import result_cache
+
+
+def _entry_count(cache):
+    return len(cache._entries())
+
+
+def test_tables_round_trip(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+    df = pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']})
+    cache.put_tables('doc', 1, {'lattice': True}, [df], 'lattice')
+    tables, strategy = cache.get_tables('doc', 1, {'lattice': True})
+    assert strategy == 'lattice'
+    pd.testing.assert_frame_equal(tables[0], df)
+    assert cache.get_tables('doc', 1, {'lattice': False}) is None
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_text_options_are_part_of_key(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+    cache.put_text('doc', 1, 'plain')
+    cache.put_text('doc', 1, 'other', {'backend': 'pdfium'})
+    assert cache.get_text('doc', 1) == 'plain'
+    assert cache.get_text('doc', 1, {'backend': 'pdfium'}) == 'other'
+    assert cache.get_text('doc', 2) is None
+
+
+def test_evicts_least_recently_used_to_low_water(tmp_path):
+    text = 'x' * 1000
+    cache = result_cache.ResultCache(str(tmp_path), max_bytes=10_000, low_water=0.5)
+    for page in range(1, 9):
+        cache.put_text('doc', page, text)
+        # 마지막 사용 시각으로 순서를 정하므로 항목마다 시각을 벌려 둠
+        os.utime(os.path.join(cache._key_path('doc', 'text', page, None), 'meta.json'),
+                 (time.time() - 100 + page, time.time() - 100 + page))
+    # 1 페이지를 다시 읽으면 가장 최근에 쓴 항목이 됨
+    assert cache.get_text('doc', 1) == text
+    for page in range(9, 12):
+        cache.put_text('doc', page, text)
+
+    assert cache.stats()['size_mb'] * 1024 * 1024 <= cache.max_bytes
+    assert _entry_count(cache) < 8
+    assert cache.get_text('doc', 1) == text
+    assert cache.get_text('doc', 2) is None
+    assert cache.get_text('doc', 11) == text
+
+
+def test_failed_write_is_skipped_and_cleaned_up(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+
+    class Unwritable(pd.DataFrame):
+        def to_parquet(self, *args, **kwargs):
+            raise ValueError("변환할 수 없는 열")
+
+    cache.put_tables('doc', 1, None, [Unwritable({'a': [1]})], 'stream')
+
+    assert cache.get_tables('doc', 1, None) is None
+    assert _entry_count(cache) == 0
+    # 임시 디렉토리도 남지 않음
+    assert all(not os.listdir(tmp_path / bucket) for bucket in os.listdir(tmp_path))
+    assert cache.stats()['size_mb'] == 0
+
+
+def test_existing_entry_is_not_rewritten(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+    cache.put_text('doc', 1, 'first')
+    cache.put_text('doc', 1, 'second')
+    assert cache.get_text('doc', 1) == 'first'
+    assert _entry_count(cache) == 1
+
+
+def test_size_survives_restart(tmp_path):
+    cache = result_cache.ResultCache(str(tmp_path))
+    cache.put_text('doc', 1, 'x' * 5000)
+    reopened = result_cache.ResultCache(str(tmp_path))
+    assert reopened.stats()['size_mb'] == cache.stats()['size_mb'] > 0
@@ -0,0 +1,123 @@
+"""FairScheduler 의 실행 순서 (사용자별 공평, 짧은 작업 먼저, 오래 기다린 작업 올림)"""
+import threading
+import time
+
+import scheduler
+
+
+class Item:
+    def __init__(self, name, owner, cost, created):
+        self.name = name
+        self.owner = owner
+        self.cost = cost
+        self.created = created
+
+    def __repr__(self):
+        return self.name
+
+
+class Recorder:
+    """실행 순서를 기록하고, 첫 항목은 풀어 줄 때까지 실행 칸을 잡고 있는 run 함수"""
+
+    def __init__(self):
+        self.order = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.finished = threading.Event()
+        self.expected = 0
+
+    def __call__(self, item):
+        self.order.append(item.name)
+        if len(self.order) == 1:
+            self.started.set()
+            self.release.wait(5)
+        if len(self.order) == self.expected:
+            self.finished.set()
+
+
+def _run_order(items, max_wait=300, short_pages=20):
+    """실행 칸 하나에서 blocker 가 도는 동안 items 를 넣고, 풀어 준 뒤 실행된 순서 반환"""
+    recorder = Recorder()
+    recorder.expected = len(items) + 1
+    fair = scheduler.FairScheduler(recorder, 1, short_pages=short_pages, max_wait=max_wait, name='test')
+    fair.submit(Item('blocker', 'blocker', 1, time.time()))
+    assert recorder.started.wait(5)
+    for item in items:
+        fair.submit(item)
+    positions = {item.name: fair.position(item) for item in items}
+    recorder.release.set()
+    assert recorder.finished.wait(5)
+    return recorder.order[1:], positions
+
+
+def test_short_jobs_first_then_submission_order():
+    now = time.time()
+    items = [
+        Item('long', 'a', 100, now - 2),
+        Item('short-1', 'b', 5, now - 1),
+        Item('short-2', 'c', 5, now),
+    ]
+    order, positions = _run_order(items)
+    assert order == ['short-1', 'short-2', 'long']
+    assert positions == {'short-1': 1, 'short-2': 2, 'long': 3}
+
+
+def test_long_job_promoted_after_max_wait():
+    now = time.time()
+    items = [
+        Item('long', 'a', 100, now - 10),
+        Item('short', 'b', 5, now),
+    ]
+    order, _ = _run_order(items, max_wait=5)
+    assert order == ['long', 'short']
+
+
+def test_users_alternate_by_pages_served():
+    now = time.time()
+    items = [
+        Item('a-1', 'a', 10, now - 4),
+        Item('a-2', 'a', 10, now - 3),
+        Item('a-3', 'a', 10, now - 2),
+        Item('b-1', 'b', 10, now - 1),
+        Item('b-2', 'b', 10, now),
+    ]
+    order, _ = _run_order(items)
+    assert order == ['a-1', 'b-1', 'a-2', 'b-2', 'a-3']
+
+
+def test_running_user_goes_after_idle_users():
+    recorder = Recorder()
+    recorder.expected = 3
+    fair = scheduler.FairScheduler(recorder, 1, name='test')
+    now = time.time()
+    fair.submit(Item('a-1', 'a', 1, now))
+    assert recorder.started.wait(5)
+    later = Item('a-2', 'a', 1, now + 1)
+    other = Item('b-1', 'b', 1, now + 2)
+    fair.submit(later)
+    fair.submit(other)
+    # a 는 이미 실행 칸을 잡고 있으므로 늦게 온 b 가 먼저
+    assert fair.position(other) == 1
+    assert fair.position(later) == 2
+    assert fair.stats() == (1, 2, 1)
+    recorder.release.set()
+    assert recorder.finished.wait(5)
+    assert recorder.order == ['a-1', 'b-1', 'a-2']
+
+
+def test_discard_removes_queued_item():
+    recorder = Recorder()
+    recorder.expected = 2
+    fair = scheduler.FairScheduler(recorder, 1, name='test')
+    fair.submit(Item('blocker', 'x', 1, time.time()))
+    assert recorder.started.wait(5)
+    dropped = Item('dropped', 'a', 1, time.time())
+    kept = Item('kept', 'b', 1, time.time())
+    fair.submit(dropped)
+    fair.submit(kept)
+    assert fair.discard(dropped)
+    assert not fair.discard(dropped)
+    assert fair.position(dropped) is None
+    recorder.release.set()
+    assert recorder.finished.wait(5)
+    assert recorder.order == ['blocker', 'kept']
@@ -0,0 +1,97 @@
+"""UploadSpool 의 참조 관리 (참조가 모두 풀린 파일만 정리)"""
+import io
+import json
+import os
+import time
+
+import upload_spool
+
+
+def _ref_files(spool, digest):
+    refs_dir = os.path.join(spool.spool_dir, upload_spool.REFS_DIR, digest)
+    return os.listdir(refs_dir) if os.path.isdir(refs_dir) else []
+
+
+def test_same_content_stored_once(spool):
+    first, path = spool.store(io.BytesIO(b'%PDF same'), 'session:a')
+    second, same_path = spool.store(io.BytesIO(b'%PDF same'), 'session:b')
+    assert first == second and path == same_path
+    assert spool.references(first) == 2
+    assert spool.stats()['files'] == 1
+
+
+def test_file_removed_after_last_release(spool):
+    digest, path = spool.store(io.BytesIO(b'%PDF shared'), 'session:a')
+    spool.store(io.BytesIO(b'%PDF shared'), 'job:1')
+
+    spool.release('session:a')
+    assert os.path.exists(path)
+    assert spool.references(digest) == 1
+
+    spool.release('job:1')
+    assert not os.path.exists(path)
+    assert _ref_files(spool, digest) == []
+
+
+def test_release_unknown_owner_is_harmless(spool):
+    digest, path = spool.store(io.BytesIO(b'%PDF kept'), 'session:a')
+    spool.release('session:nobody')
+    assert os.path.exists(path)
+    assert spool.references(digest) == 1
+
+
+def test_new_upload_releases_previous_file(spool):
+    old_digest, old_path = spool.store(io.BytesIO(b'%PDF old'), 'session:a')
+    _, new_path = spool.store(io.BytesIO(b'%PDF new'), 'session:a')
+    assert os.path.exists(new_path)
+    assert not os.path.exists(old_path)
+    assert spool.references(old_digest) == 0
+
+
+def test_expired_lease_is_swept(spool):
+    digest, path = spool.store(io.BytesIO(b'%PDF lease'), 'session:a', lease=60)
+    [name] = _ref_files(spool, digest)
+    ref_path = os.path.join(spool.spool_dir, upload_spool.REFS_DIR, digest, name)
+    with open(ref_path, encoding='utf-8') as f:
+        ref = json.load(f)
+    ref['expires'] = time.time() - 1
+    with open(ref_path, 'w', encoding='utf-8') as f:
+        json.dump(ref, f)
+
+    spool.sweep()
+    assert not os.path.exists(path)
+
+
+def test_reference_of_dead_process_is_dropped(spool):
+    digest, path = spool.store(io.BytesIO(b'%PDF dead'), 'job:1')
+    [name] = _ref_files(spool, digest)
+    ref_path = os.path.join(spool.spool_dir, upload_spool.REFS_DIR, digest, name)
+    with open(ref_path, encoding='utf-8') as f:
+        ref = json.load(f)
+    # 기한 없는 참조를 잡은 프로세스가 죽은 것으로 만듦
+    ref['pid'] = 2 ** 22 + 12345
+    with open(ref_path, 'w', encoding='utf-8') as f:
+        json.dump(ref, f)
+
+    assert spool.references(digest) == 0
+    spool.sweep()
+    assert not os.path.exists(path)
+
+
+def test_references_shared_between_spool_instances(spool):
+    # 다른 프로세스의 보관소처럼 같은 디렉토리를 쓰는 두 번째 인스턴스
+    other = upload_spool.UploadSpool(spool.spool_dir, lease=60)
+    digest, path = spool.store(io.BytesIO(b'%PDF both'), 'app:session')
+    other.store_file(path, 'api:job')
+
+    spool.release('app:session')
+    assert os.path.exists(path)
+    other.release('api:job')
+    assert not os.path.exists(path)
+
+
+def test_aborted_writer_leaves_nothing(spool):
+    writer = spool.writer()
+    writer.write(b'%PDF partial')
+    writer.abort()
+    assert os.listdir(spool.spool_dir) == [upload_spool.REFS_DIR]
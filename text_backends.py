@@ -0,0 +1,391 @@
+"""페이지 텍스트 추출 엔진과 병렬 추출
+
+기본 엔진은 PyPDF2(순수 파이썬)이고, 설치되어 있으면 더 빠른 pypdfium2(PDFium) 나
+pdfminer.six(레이아웃 분석 없이) 를 고를 수 있다. 엔진마다 줄바꿈·공백 처리가 조금씩
+다르므로 결과 캐시는 엔진별로 따로 둔다.
+
+페이지가 많으면 페이지를 연속 구간으로 나눠 상주 워커 프로세스들에서 동시에 추출한다
+(순수 파이썬인 PyPDF2 는 스레드로는 빨라지지 않음). tabula_worker 와 같은 이유로
+multiprocessing 대신 이 파일을 직접 실행하는 하위 프로세스를 띄우고 표준 입출력으로
+pickle 메시지를 주고받는다. 각 워커는 마지막에 연 문서를 기억해 같은 문서의 다음
+구간에서 다시 파싱하지 않는다.
+
+엔진 비교:
+
+    python text_backends.py spec.pdf --pages 1-50
+"""
+import argparse
+import atexit
+import io
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 기본 엔진, 텍스트 추출 프로세스 수 (환경 변수로 변경 가능)
+TEXT_BACKEND = os.environ.get('PDF_EXTRACTOR_TEXT_BACKEND', 'pypdf2')
+TEXT_WORKERS = int(os.environ.get('PDF_EXTRACTOR_TEXT_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# 이보다 페이지가 적으면 프로세스 풀을 거치지 않고 바로 추출
+PARALLEL_MIN_PAGES = 4
+
+
+class PyPDF2Backend:
+    """PyPDF2 (기본, 추가 설치 없음) - pdf_document.PdfDocument 로 페이지마다 객체를 버리며 추출"""
+
+    name = 'pypdf2'
+    label = 'PyPDF2 (기본)'
+
+    @staticmethod
+    def available():
+        return True
+
+    def __init__(self, pdf_path):
+        import pdf_document
+
+        self._document = pdf_document.PdfDocument(pdf_path, text_backend=self.name)
+
+    def text(self, page):
+        # 이 엔진 자체가 작업 프로세스 안에서 돌 수 있으므로 다시 병렬로 나누지 않음
+        self._document.prefetch_texts([page], workers=1)
+        return self._document.text(page)
+
+    def close(self):
+        self._document.close()
+
+
+class PdfiumBackend:
+    """pypdfium2 (PDFium C++ 엔진, 가장 빠름)"""
+
+    name = 'pdfium'
+    label = 'pypdfium2 (빠름)'
+
+    @staticmethod
+    def available():
+        try:
+            import pypdfium2  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self, pdf_path):
+        import pypdfium2
+
+        self._document = pypdfium2.PdfDocument(pdf_path)
+
+    def text(self, page):
+        pdf_page = self._document[page - 1]
+        try:
+            textpage = pdf_page.get_textpage()
+            try:
+                # 다른 엔진과 같이 줄바꿈은 \n
+                return textpage.get_text_range().replace('\r\n', '\n')
+            finally:
+                textpage.close()
+        finally:
+            pdf_page.close()
+
+    def close(self):
+        self._document.close()
+
+
+class PdfminerBackend:
+    """pdfminer.six (줄 묶음만 하고 단락·읽기 순서 분석은 끔)"""
+
+    name = 'pdfminer'
+    label = 'pdfminer (배치 분석 끔)'
+
+    @staticmethod
+    def available():
+        try:
+            import pdfminer  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self, pdf_path):
+        from pdfminer.pdfdocument import PDFDocument
+        from pdfminer.pdfinterp import PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+        from pdfminer.pdfparser import PDFParser
+
+        # 문서는 한 번만 파싱 (high_level.extract_text 는 부를 때마다 문서 전체를 다시 파싱)
+        self._file = open(pdf_path, 'rb')
+        try:
+            self._pages = list(PDFPage.create_pages(PDFDocument(PDFParser(self._file))))
+        except Exception:
+            self._file.close()
+            raise
+        self._resources = PDFResourceManager(caching=True)
+
+    def text(self, page):
+        from pdfminer.converter import TextConverter
+        from pdfminer.layout import LAParams
+        from pdfminer.pdfinterp import PDFPageInterpreter
+
+        output = io.StringIO()
+        # laparams=None 이면 글자 사이 공백·줄바꿈도 사라지므로, 줄 묶음만 남기고
+        # 비용이 큰 텍스트 상자 배치 분석(boxes_flow)만 끔
+        device = TextConverter(self._resources, output, laparams=LAParams(boxes_flow=None))
+        try:
+            PDFPageInterpreter(self._resources, device).process_page(self._pages[page - 1])
+        finally:
+            device.close()
+        # 페이지 끝의 폼 피드 제거
+        return output.getvalue().rstrip('\x0c')
+
+    def close(self):
+        self._file.close()
+
+
+BACKENDS = {backend.name: backend for backend in (PyPDF2Backend, PdfiumBackend, PdfminerBackend)}
+
+
+def available_backends():
+    """설치되어 있어 쓸 수 있는 엔진 이름 목록 (기본 엔진부터)"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def resolve(name=None):
+    """엔진 이름 확인 (비우면 TEXT_BACKEND, 모르는 이름이나 설치되지 않은 엔진이면 ValueError)"""
+    name = name or TEXT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"텍스트 엔진은 {', '.join(BACKENDS)} 중 하나여야 합니다.")
+    if not BACKENDS[name].available():
+        raise ValueError(f"텍스트 엔진 {name} 이(가) 설치되어 있지 않습니다.")
+    return name
+
+
+class TextWorkerError(Exception):
+    """텍스트 워커 안에서 발생한 추출 오류"""
+
+
+def _worker_main():
+    """워커 프로세스 본체: (경로, 엔진, 페이지 목록) 요청을 받아 {페이지: 텍스트} 로 응답"""
+    reader = os.fdopen(os.dup(0), 'rb')
+    writer = os.fdopen(os.dup(1), 'wb')
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+
+    # 마지막에 연 문서: (경로, 엔진 이름, 엔진 객체)
+    opened = None
+    while True:
+        try:
+            request = pickle.load(reader)
+        except (EOFError, OSError):
+            break
+        if request is None:
+            break
+        pdf_path, backend, pages = request
+        try:
+            if opened is None or opened[:2] != (pdf_path, backend):
+                if opened is not None:
+                    opened[2].close()
+                opened = None
+                opened = (pdf_path, backend, BACKENDS[backend](pdf_path))
+            response = ('ok', {page: opened[2].text(page) for page in pages})
+        except Exception as e:
+            response = ('error', f"{type(e).__name__}: {e}")
+        pickle.dump(response, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        writer.flush()
+
+
+class TextWorker:
+    """텍스트 추출 상주 워커 프로세스 핸들 (죽으면 다음 요청 때 다시 띄움)"""
+
+    def __init__(self):
+        self._process = None
+
+    def start(self):
+        if self._process is not None and self._process.poll() is None:
+            return
+        self._close()
+        self._process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--worker'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def _close(self):
+        if self._process is None:
+            return
+        for stream in (self._process.stdin, self._process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        if self._process.poll() is None:
+            self._process.kill()
+        self._process.wait(timeout=5)
+        self._process = None
+
+    def stop(self):
+        if self._process is not None and self._process.poll() is None:
+            try:
+                pickle.dump(None, self._process.stdin)
+                self._process.stdin.flush()
+                self._process.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                pass
+        self._close()
+
+    def extract(self, pdf_path, backend, pages):
+        """페이지 구간 텍스트 추출 (요청 도중 워커가 죽으면 한 번만 다시 시도)"""
+        request = (os.path.abspath(pdf_path), backend, list(pages))
+        for attempt in range(2):
+            self.start()
+            try:
+                pickle.dump(request, self._process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+                self._process.stdin.flush()
+                status, payload = pickle.load(self._process.stdout)
+                break
+            except (EOFError, OSError, pickle.UnpicklingError):
+                self._close()
+                if attempt == 1:
+                    raise TextWorkerError("텍스트 워커가 비정상 종료되었습니다.")
+        if status == 'error':
+            raise TextWorkerError(payload)
+        return payload
+
+
+class TextWorkerPool:
+    """텍스트 워커 여러 개를 묶어 페이지 구간을 병렬로 나눠 추출"""
+
+    def __init__(self, size=TEXT_WORKERS):
+        self.size = max(1, size)
+        self.workers = [TextWorker() for _ in range(self.size)]
+        self._idle = queue.Queue()
+        for worker in self.workers:
+            self._idle.put(worker)
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def _extract_chunk(self, pdf_path, backend, pages):
+        worker = self._idle.get()
+        try:
+            return worker.extract(pdf_path, backend, pages)
+        finally:
+            self._idle.put(worker)
+
+    def extract(self, pdf_path, backend, pages):
+        """페이지를 워커 수만큼 연속 구간으로 나눠 병렬 추출 → {페이지: 텍스트}"""
+        if not pages:
+            return {}
+        chunks = _split(list(pages), min(self.size, len(pages)))
+        texts = {}
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            for chunk_texts in executor.map(lambda chunk: self._extract_chunk(pdf_path, backend, chunk), chunks):
+                texts.update(chunk_texts)
+        return texts
+
+
+def _split(pages, parts):
+    """페이지 목록을 길이가 비슷한 연속 구간으로 나눔"""
+    size, extra = divmod(len(pages), parts)
+    chunks, start = [], 0
+    for i in range(parts):
+        end = start + size + (1 if i < extra else 0)
+        if end > start:
+            chunks.append(pages[start:end])
+        start = end
+    return chunks
+
+
+def extract_texts(pdf_path, pages, backend=None, workers=None):
+    """여러 페이지의 텍스트 → {페이지: 텍스트} (페이지가 많으면 프로세스 풀에서 병렬로)"""
+    backend = resolve(backend)
+    pages = list(pages)
+    workers = TEXT_WORKERS if workers is None else workers
+    if workers <= 1 or len(pages) < PARALLEL_MIN_PAGES:
+        engine = BACKENDS[backend](pdf_path)
+        try:
+            return {page: engine.text(page) for page in pages}
+        finally:
+            engine.close()
+
+    return get_pool(workers).extract(pdf_path, backend, pages)
+
+
+_pools = {}
+_pool_lock = threading.Lock()
+
+
+def get_pool(workers=TEXT_WORKERS):
+    """워커 수별 프로세스 전역 텍스트 워커 풀 (처음 필요할 때 워커 시작)"""
+    with _pool_lock:
+        if workers not in _pools:
+            pool = TextWorkerPool(workers)
+            pool.start()
+            atexit.register(pool.stop)
+            _pools[workers] = pool
+        return _pools[workers]
+
+
+def benchmark(pdf_path, pages, backends=None, workers=None):
+    """엔진별로 같은 페이지의 텍스트를 추출해 (엔진, 초, 페이지/초, 글자 수) 목록 반환
+
+    프로세스 시작 비용이 섞이지 않도록 워커를 먼저 띄워 둔 뒤 잰다.
+    """
+    pages = list(pages)
+    workers = TEXT_WORKERS if workers is None else workers
+    if workers > 1 and len(pages) >= PARALLEL_MIN_PAGES:
+        get_pool(workers)
+    rows = []
+    for backend in backends or available_backends():
+        started = time.perf_counter()
+        texts = extract_texts(pdf_path, pages, backend, workers)
+        seconds = time.perf_counter() - started
+        rows.append((
+            backend,
+            seconds,
+            len(pages) / max(seconds, 1e-6),
+            sum(len(text or '') for text in texts.values()),
+        ))
+    return rows
+
+
+def _page_range(value, page_count):
+    if not value:
+        return list(range(1, page_count + 1))
+    start, _, end = value.partition('-')
+    return list(range(int(start), min(int(end or start), page_count) + 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="텍스트 추출 엔진 비교 (같은 파일·같은 페이지)")
+    parser.add_argument('pdf', help="비교할 PDF 파일")
+    parser.add_argument('--pages', help="페이지 범위 (예: 1-50, 기본은 전체)")
+    parser.add_argument('--backends', nargs='+', choices=list(BACKENDS),
+                        help="비교할 엔진 (기본은 설치된 모든 엔진)")
+    parser.add_argument('--workers', type=int, default=TEXT_WORKERS,
+                        help="텍스트 추출 프로세스 수 (1 이면 한 프로세스에서 순서대로)")
+    args = parser.parse_args(argv)
+
+    import pdf_document
+
+    with pdf_document.PdfDocument(args.pdf) as document:
+        pages = _page_range(args.pages, document.page_count)
+    for backend in args.backends or []:
+        resolve(backend)
+
+    print(f"{args.pdf}: {len(pages)}페이지, 프로세스 {args.workers}개")
+    for backend, seconds, rate, chars in benchmark(args.pdf, pages, args.backends, args.workers):
+        print(f"  {BACKENDS[backend].label:<28} {seconds:8.2f}초  {rate:8.1f} 페이지/초  {chars:>10,} 글자")
+    return 0
+
+
+if __name__ == '__main__':
+    if sys.argv[1:] == ['--worker']:
+        _worker_main()
+    else:
+        sys.exit(main())
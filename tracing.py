@@ -0,0 +1,256 @@
+"""단계별 시간 기록 (추적)
+
+추출 작업의 각 단계(업로드 저장, 검사, 페이지 점검, 텍스트, 전략별 표 추출 시도, tabula
+실행, Excel 쓰기, 내보내기)를 구간(span) 하나로 재서 "페이지 7 / lattice 시도 / 1.8초 /
+표 0개" 처럼 남긴다. 구간은 작업마다 Trace 에 모여 화면의 성능 패널과 API 에 보이고,
+끝날 때마다 JSON 한 줄로 'pdf_extractor.trace' 로거에 기록되며, 프로세스 전체의 단계별
+시간 분포(Prometheus 텍스트 형식)에도 더해진다.
+
+    with tracing.span(job.trace, 'tables', pages=pages, strategy='lattice') as span:
+        ...
+        span.set(tables=3)
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+# JSON 로그 출력: '-' 면 표준 오류, 경로면 그 파일에 이어 쓰기, 비워 두면 로거에만 보냄
+TRACE_LOG = os.environ.get('PDF_EXTRACTOR_TRACE_LOG', '')
+
+# Prometheus 텍스트 형식 지표를 작업이 끝날 때마다 써 둘 파일 (node_exporter 의 textfile 수집용)
+METRICS_FILE = os.environ.get('PDF_EXTRACTOR_METRICS_FILE', '')
+
+# 작업 하나에 보관하는 최대 구간 수 (넘으면 목록에는 남기지 않고 합계에만 더함)
+MAX_SPANS = 2000
+
+# 단계별 시간 분포의 구간 경계(초)
+BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+STAGE_LABELS = {
+    'upload': '업로드 저장',
+    'validate': '파일 검사',
+    'plan': '페이지 점검',
+    'cache': '캐시 조회',
+    'text': '텍스트 추출',
+    'tables': '표 추출',
+    'tabula': 'tabula 실행',
+    'excel': 'Excel 시트 쓰기',
+    'excel.save': 'Excel 저장',
+    'export': '내보내기',
+    'job': '작업 전체',
+}
+
+logger = logging.getLogger('pdf_extractor.trace')
+if TRACE_LOG:
+    _handler = logging.StreamHandler(sys.stderr) if TRACE_LOG == '-' else logging.FileHandler(TRACE_LOG, encoding='utf-8')
+    _handler.setFormatter(logging.Formatter('%(message)s'))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+def page_label(pages):
+    """페이지 목록을 짧게 ('7', '1-10', '3-40 중 12개')"""
+    pages = sorted(pages)
+    if not pages:
+        return ''
+    if len(pages) == 1:
+        return str(pages[0])
+    if pages[-1] - pages[0] + 1 == len(pages):
+        return f'{pages[0]}-{pages[-1]}'
+    return f'{pages[0]}-{pages[-1]} 중 {len(pages)}개'
+
+
+class Span:
+    """구간 하나 (단계 이름, 속성, 시작 시각, 걸린 시간, 오류)"""
+
+    def __init__(self, stage, attrs, trace_id=None):
+        self.stage = stage
+        self.trace_id = trace_id
+        self.attrs = {}
+        self.started = time.time()
+        self.seconds = None
+        self.error = None
+        self.thread = threading.current_thread().name
+        self.set(**attrs)
+
+    def set(self, **attrs):
+        """속성 추가 (pages 는 페이지 목록을 받아 짧은 표기와 개수로 바꿔 둠)"""
+        pages = attrs.pop('pages', None)
+        if pages is not None:
+            pages = list(pages)
+            self.attrs['pages'] = page_label(pages)
+            self.attrs['page_count'] = len(pages)
+        self.attrs.update(attrs)
+
+    def describe(self):
+        """'페이지 7 / lattice 시도 / 1.80초 / 표 0개' 형식의 한 줄"""
+        parts = []
+        if self.attrs.get('pages'):
+            parts.append(f"페이지 {self.attrs['pages']}")
+        label = STAGE_LABELS.get(self.stage, self.stage)
+        if self.attrs.get('strategy'):
+            label = f"{self.attrs['strategy']} 시도" if self.stage == 'tables' else f"{label} ({self.attrs['strategy']})"
+        if self.attrs.get('worker') is not None:
+            label += f" [워커 {self.attrs['worker']}]"
+        parts.append(label)
+        if self.seconds is not None:
+            parts.append(f"{self.seconds:.2f}초")
+        if 'tables' in self.attrs:
+            parts.append(f"표 {self.attrs['tables']}개")
+        if 'sheets' in self.attrs:
+            parts.append(f"시트 {self.attrs['sheets']}개")
+        if 'chars' in self.attrs:
+            parts.append(f"{self.attrs['chars']:,}자")
+        if self.error:
+            parts.append(f"오류: {self.error}")
+        return ' / '.join(parts)
+
+    def to_dict(self):
+        record = {'stage': self.stage, 'started': round(self.started, 3), 'seconds': self.seconds}
+        if self.trace_id:
+            record['trace'] = self.trace_id
+        record.update(self.attrs)
+        if self.error:
+            record['error'] = self.error
+        record['thread'] = self.thread
+        return record
+
+
+class Trace:
+    """작업 하나의 구간 목록과 단계별 합계 (여러 스레드에서 함께 씀)"""
+
+    def __init__(self, trace_id=None, max_spans=MAX_SPANS):
+        self.id = trace_id
+        self.max_spans = max_spans
+        self.spans = []
+        self.dropped = 0
+        self._totals = {}
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            if len(self.spans) < self.max_spans:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+            count, seconds, longest = self._totals.get(span.stage, (0, 0.0, 0.0))
+            self._totals[span.stage] = (count + 1, seconds + span.seconds, max(longest, span.seconds))
+
+    def summary(self):
+        """단계 → {'count', 'seconds', 'max'} (처음 기록된 단계 순서)"""
+        with self._lock:
+            return {
+                stage: {'count': count, 'seconds': round(seconds, 4), 'max': round(longest, 4)}
+                for stage, (count, seconds, longest) in self._totals.items()
+            }
+
+    def to_dicts(self):
+        with self._lock:
+            spans = list(self.spans)
+        return [span.to_dict() for span in spans]
+
+
+class _SpanContext:
+    def __init__(self, trace, stage, attrs):
+        self.trace = trace
+        self.span = Span(stage, attrs, trace.id if trace is not None else None)
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.seconds = round(time.perf_counter() - self._started, 4)
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        finish(self.trace, self.span)
+        return False
+
+
+def span(trace, stage, **attrs):
+    """구간을 재는 with 문 (trace 가 None 이어도 로그와 지표에는 남김)"""
+    return _SpanContext(trace, stage, attrs)
+
+
+def record(trace, stage, seconds, **attrs):
+    """이미 잰 시간을 구간 하나로 기록 (여러 번에 나눠 잰 시간을 합쳐 남길 때)"""
+    finished = Span(stage, attrs, trace.id if trace is not None else None)
+    finished.seconds = round(seconds, 4)
+    finish(trace, finished)
+    return finished
+
+
+def finish(trace, finished):
+    """끝난 구간을 작업 추적·JSON 로그·지표에 넣음"""
+    if trace is not None:
+        trace.add(finished)
+    get_metrics().observe(finished.stage, finished.seconds, finished.error is not None)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(finished.to_dict(), ensure_ascii=False, default=str))
+
+
+class Metrics:
+    """프로세스 전체의 단계별 시간 분포와 오류 수 (Prometheus 텍스트 형식으로 내보냄)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # 단계 → [구간별 누적 개수..., 합계 초, 개수, 오류 수]
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds, error=False):
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0] * len(self.buckets) + [0.0, 0, 0])
+            for index, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    entry[index] += 1
+            entry[-3] += seconds
+            entry[-2] += 1
+            if error:
+                entry[-1] += 1
+
+    def prometheus_text(self):
+        with self._lock:
+            stages = {stage: list(entry) for stage, entry in self._stages.items()}
+        lines = [
+            '# HELP pdf_extractor_stage_seconds Time spent in each extraction stage.',
+            '# TYPE pdf_extractor_stage_seconds histogram',
+        ]
+        for stage, entry in sorted(stages.items()):
+            label = f'stage="{stage}"'
+            for bound, count in zip(self.buckets, entry):
+                lines.append(f'pdf_extractor_stage_seconds_bucket{{{label},le="{bound}"}} {count}')
+            lines.append(f'pdf_extractor_stage_seconds_bucket{{{label},le="+Inf"}} {entry[-2]}')
+            lines.append(f'pdf_extractor_stage_seconds_sum{{{label}}} {entry[-3]:.4f}')
+            lines.append(f'pdf_extractor_stage_seconds_count{{{label}}} {entry[-2]}')
+        lines.append('# HELP pdf_extractor_stage_errors_total Stages that ended with an error.')
+        lines.append('# TYPE pdf_extractor_stage_errors_total counter')
+        for stage, entry in sorted(stages.items()):
+            lines.append(f'pdf_extractor_stage_errors_total{{stage="{stage}"}} {entry[-1]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path=METRICS_FILE):
+        """지표를 파일에 씀 (임시 이름으로 쓴 뒤 이름을 바꿔 수집기가 반쯤 쓴 파일을 읽지 않게 함)"""
+        if not path:
+            return None
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(path + '.tmp', path)
+        return path
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics():
+    """프로세스 전역 단계별 지표"""
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = Metrics()
+        return _metrics
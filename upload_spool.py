@@ -0,0 +1,309 @@
+"""업로드 PDF 보관소 (내용 주소 방식)
+
+업로드한 PDF 를 내용의 SHA-256 이름(<해시>.pdf)으로 한 번만 디스크에 쓰고, 같은 내용은
+몇 번을 올리든 같은 파일을 쓴다. 파일은 1MB 조각 단위로 해시를 계산하며 쓰므로 업로드
+전체를 한 번 더 복사해 들고 있지 않는다.
+
+파일을 쓰는 쪽(화면 세션, 추출 작업, API 요청)은 소유자 ID 로 파일 하나를 참조하고,
+참조가 모두 풀린 파일은 정리기(sweep)가 지운다. 세션처럼 사라졌는지 알 수 없는
+소유자는 기한이 있는 참조(lease)를 잡고, 다시 실행될 때마다 touch 로 기한을 늘린다.
+
+화면과 API 서버처럼 여러 프로세스가 같은 보관소를 쓰므로 참조는 디스크에 둔다
+(refs/<해시>/ 아래 소유자마다 파일 하나). 기한 없는 참조는 잡은 프로세스가 죽으면
+풀린 것으로 보아, 재시작한 프로세스가 남은 참조 때문에 파일을 영영 못 지우는 일도 없다.
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+import result_cache
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: 프로세스 간 잠금 없이 프로세스 안의 잠금만 사용
+    fcntl = None
+
+# 보관 위치, 세션 참조가 갱신 없이 유지되는 시간(초) (환경 변수로 변경 가능)
+UPLOAD_DIR = os.environ.get(
+    'PDF_EXTRACTOR_UPLOAD_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
+)
+UPLOAD_LEASE = int(os.environ.get('PDF_EXTRACTOR_UPLOAD_LEASE', '1800'))
+
+CHUNK_SIZE = 1024 * 1024
+
+REFS_DIR = 'refs'
+LOCK_NAME = '.lock'
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # 권한이 없을 뿐 살아 있는 프로세스
+        return True
+    return True
+
+
+class SpoolWriter:
+    """조각 단위로 받아 해시를 계산하며 임시 파일에 쓰고, commit 할 때 해시 이름으로 옮김"""
+
+    def __init__(self, spool):
+        self.spool = spool
+        self.size = 0
+        self._sha = hashlib.sha256()
+        self._staging = os.path.join(spool.spool_dir, f'{uuid.uuid4().hex}.tmp')
+        self._file = open(self._staging, 'wb')
+
+    def write(self, chunk):
+        self._sha.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self, owner, lease=None):
+        """보관소에 넣고 owner 의 참조로 잡은 뒤 (해시, 경로) 반환"""
+        self._file.close()
+        digest = self._sha.hexdigest()
+        return digest, self.spool._adopt(self._staging, digest, owner, lease)
+
+    def abort(self):
+        self._file.close()
+        if os.path.exists(self._staging):
+            os.remove(self._staging)
+
+
+class UploadSpool:
+    """해시 → 경로 PDF 보관소와 소유자별 참조 (디스크의 참조가 모두 풀린 파일은 sweep 이 삭제)"""
+
+    def __init__(self, spool_dir=UPLOAD_DIR, lease=UPLOAD_LEASE):
+        self.spool_dir = spool_dir
+        self.lease = lease
+        # 이 프로세스가 잡은 참조: 소유자 → (해시, 참조 만료 시각 또는 None)
+        self._owners = {}
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(self.spool_dir, REFS_DIR), exist_ok=True)
+
+    def path(self, digest):
+        return os.path.join(self.spool_dir, f'{digest}.pdf')
+
+    def _ref_path(self, digest, owner):
+        name = hashlib.sha1(owner.encode('utf-8')).hexdigest()[:20]
+        return os.path.join(self.spool_dir, REFS_DIR, digest, f'{name}.ref')
+
+    @contextmanager
+    def _locked(self):
+        """프로세스 안과 프로세스 사이 모두에서 보관소 잠금 (파일 확인·참조·삭제를 한 번에)"""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.spool_dir, LOCK_NAME), 'a') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def writer(self):
+        return SpoolWriter(self)
+
+    def store(self, fileobj, owner, lease=None):
+        """파일 객체의 내용을 보관하고 (해시, 경로) 반환
+
+        getbuffer() 가 있는 메모리 파일(업로드 파일)은 먼저 해시만 계산해, 이미 보관된
+        내용이면 디스크에 쓰지 않는다.
+        """
+        if hasattr(fileobj, 'getbuffer'):
+            with fileobj.getbuffer() as view:
+                return self._store_buffer(view, owner, lease)
+
+        writer = self.writer()
+        try:
+            for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+                writer.write(chunk)
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit(owner, lease)
+
+    def _store_buffer(self, view, owner, lease):
+        sha = hashlib.sha256()
+        for offset in range(0, len(view), CHUNK_SIZE):
+            sha.update(view[offset:offset + CHUNK_SIZE])
+        digest = sha.hexdigest()
+        path = self._acquire_existing(digest, owner, lease)
+        if path is not None:
+            return digest, path
+        writer = self.writer()
+        try:
+            for offset in range(0, len(view), CHUNK_SIZE):
+                writer.write(view[offset:offset + CHUNK_SIZE])
+        except BaseException:
+            writer.abort()
+            raise
+        return writer.commit(owner, lease)
+
+    def store_file(self, file_path, owner, lease=None):
+        """디스크의 PDF 를 보관하고 (해시, 경로) 반환 (이미 보관소의 파일이면 참조만 추가)"""
+        digest = result_cache.file_digest(file_path)
+        path = self._acquire_existing(digest, owner, lease)
+        if path is not None:
+            return digest, path
+        staging = os.path.join(self.spool_dir, f'{uuid.uuid4().hex}.tmp')
+        shutil.copyfile(file_path, staging)
+        return digest, self._adopt(staging, digest, owner, lease)
+
+    def _acquire_existing(self, digest, owner, lease):
+        path = self.path(digest)
+        with self._locked():
+            if not os.path.exists(path):
+                return None
+            self._hold(owner, digest, lease)
+        return path
+
+    def _adopt(self, staging, digest, owner, lease):
+        """임시 파일을 해시 이름으로 옮기고 참조 (같은 내용이 먼저 들어왔으면 임시 파일은 버림)"""
+        path = self.path(digest)
+        with self._locked():
+            if os.path.exists(path):
+                os.remove(staging)
+            else:
+                os.replace(staging, path)
+            self._hold(owner, digest, lease)
+        result_cache.remember_digest(path, digest)
+        self.sweep()
+        return path
+
+    def _hold(self, owner, digest, lease):
+        """owner 의 참조를 디스크에 기록 (잠금을 잡고 호출, 다른 파일을 잡고 있었으면 그 참조는 풂)"""
+        previous = self._owners.get(owner)
+        if previous is not None and previous[0] != digest:
+            self._drop(owner, previous[0])
+        expires = time.time() + lease if lease else None
+        path = self._ref_path(digest, owner)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'owner': owner, 'pid': os.getpid(), 'expires': expires}, f)
+        os.replace(path + '.tmp', path)
+        self._owners[owner] = (digest, expires)
+
+    def _drop(self, owner, digest):
+        try:
+            os.remove(self._ref_path(digest, owner))
+        except OSError:
+            pass
+
+    def touch(self, owner, lease=None):
+        """owner 의 기한 있는 참조를 연장"""
+        with self._locked():
+            if owner in self._owners:
+                digest, expires = self._owners[owner]
+                if expires is not None:
+                    self._hold(owner, digest, lease or self.lease)
+
+    def release(self, owner):
+        """owner 의 참조를 풀고 남는 참조가 없는 파일 정리"""
+        with self._locked():
+            held = self._owners.pop(owner, None)
+            if held is not None:
+                self._drop(owner, held[0])
+        self.sweep()
+
+    def _live_refs(self, digest, now):
+        """해시의 살아 있는 참조 수 (기한이 지났거나 잡은 프로세스가 죽은 참조는 지움)"""
+        refs_dir = os.path.join(self.spool_dir, REFS_DIR, digest)
+        try:
+            names = os.listdir(refs_dir)
+        except OSError:
+            return 0
+        live = 0
+        for name in names:
+            path = os.path.join(refs_dir, name)
+            if not name.endswith('.ref'):
+                continue
+            try:
+                with open(path, encoding='utf-8') as f:
+                    ref = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if ref['expires'] is not None:
+                stale = ref['expires'] < now
+            else:
+                stale = not _process_alive(ref['pid'])
+            if stale:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            else:
+                live += 1
+        if not live:
+            try:
+                os.rmdir(refs_dir)
+            except OSError:
+                pass
+        return live
+
+    def references(self, digest):
+        """해시를 참조하는 소유자 수 (모든 프로세스)"""
+        with self._locked():
+            return self._live_refs(digest, time.time())
+
+    def sweep(self):
+        """기한이 지난 참조를 풀고 어느 프로세스도 참조하지 않는 PDF 와 오래된 임시 파일 삭제"""
+        now = time.time()
+        with self._locked():
+            for owner in [owner for owner, (_, expires) in self._owners.items()
+                          if expires is not None and expires < now]:
+                del self._owners[owner]
+            for name in os.listdir(self.spool_dir):
+                path = os.path.join(self.spool_dir, name)
+                if name.endswith('.pdf'):
+                    stale = not self._live_refs(name[:-len('.pdf')], now)
+                elif name.endswith('.tmp'):
+                    # 쓰는 중인 임시 파일은 남기고, 중간에 멈춰 버려진 것만
+                    try:
+                        stale = now - os.path.getmtime(path) > self.lease
+                    except OSError:
+                        continue
+                else:
+                    continue
+                if stale:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def stats(self):
+        """보관 중인 파일 수와 크기(MB), 이 프로세스가 잡은 참조 수"""
+        with self._lock:
+            owners = len(self._owners)
+        files = [name for name in os.listdir(self.spool_dir) if name.endswith('.pdf')]
+        size = 0
+        for name in files:
+            try:
+                size += os.path.getsize(os.path.join(self.spool_dir, name))
+            except OSError:
+                pass
+        return {'files': len(files), 'size_mb': size / (1024 * 1024), 'references': owners}
+
+
+_spool = None
+_spool_lock = threading.Lock()
+
+
+def get_spool():
+    """프로세스 전역 업로드 보관소"""
+    global _spool
+    with _spool_lock:
+        if _spool is None:
+            _spool = UploadSpool()
+        return _spool